@@ -1,29 +1,65 @@
 import os
+import time
+import queue
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import cv2
-import pandas as pd
-from face_analyzer import FaceAnalyzer
+import numpy as np
+from face_analyzer import FaceAnalyzer, EXTRACTOR_VERSION
 from face_visualizer import FaceVisualizer
+from feature_cache import FeatureCache
+from feature_writer import FeatureCsvWriter
+from image_loader import background_iter, prefetch_images, read_image
+import face_geometry
+import feature_store
 
+# Supported image extensions
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
 
-def process_folder(root_folder_path, output_csv_path):
+
+def process_folder(root_folder_path, output_csv_path, batch_size=16, workers=1, timeout=None, cache_path=None,
+                   decode_threads=4, queue_depth=32, max_side=None):
     """
     Traverses the folder and its subfolders, reads images, analyzes facial features,
-    and saves the results to a CSV file.
+    and streams the results to a CSV file.
 
     It uses the 'subfolder name' as the 'Celebrity Name'.
     It also saves the first 5 processed visualization images as examples.
 
+    Images are handled one chunk at a time (walk -> cache lookup -> analysis -> CSV),
+    so memory stays flat and the rows written so far survive if the run dies.
+    The directory walk and image decoding run ahead on background threads, bounded by queue_depth.
+
     Args:
         root_folder_path (str): Root directory containing celebrity subfolders.
         output_csv_path (str): Path for the output CSV file.
+        batch_size (int): Number of images measured together by FaceAnalyzer.process_batch.
+        workers (int): Number of worker processes. 1 analyzes everything in this process.
+        timeout (float): Per-image time limit in seconds (only enforced when workers > 1).
+        cache_path (str): Optional SQLite feature cache. Unchanged images are read from it
+                          instead of being analyzed again, and an interrupted run resumes from it.
+        decode_threads (int): Threads decoding images ahead of inference (when workers == 1).
+        queue_depth (int): How many walked/decoded images may be queued ahead of inference.
+        max_side (int): Optional resolution bound. Large JPEGs are decoded at reduced scale and
+                        every image is downsized to this longest side before detection.
     """
 
-    # 1. Initialize analyzer and visualizer
-    analyzer = FaceAnalyzer()
+    # 1. Initialize analyzer (or worker pool) and visualizer
+    if workers > 1:
+        analyzer = _WorkerPool(workers, timeout, max_side)
+        # Keep every worker busy within a chunk
+        chunk_size = max(batch_size, 8 * workers)
+    else:
+        analyzer = _SerialAnalyzer(batch_size, decode_threads, queue_depth, max_side)
+        # Large enough that the decode queue rarely drains at chunk boundaries
+        chunk_size = max(batch_size, 4 * queue_depth)
     visualizer = FaceVisualizer()
 
-    # List to store all analysis results
-    all_results = []
+    # List of (image_path, reason) for every image that could not be analyzed
+    failed = []
 
     # Configuration for sample image output
     sample_output_folder = "processed_samples"
@@ -33,89 +69,364 @@ def process_folder(root_folder_path, output_csv_path):
     max_samples = 5  # Maximum number of samples to save
     sample_count = 0  # Counter for saved samples
 
-    # Supported image extensions
-    image_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
-
     if not os.path.exists(root_folder_path):
         print(f"Error: Folder '{root_folder_path}' not found.")
+        analyzer.close()
         return
 
     print(f"Starting traversal of '{root_folder_path}'...")
-
+    if workers > 1:
+        print(f"Analyzing images with {workers} worker processes...")
+
+    # Bounded resolution slightly changes the features, so it gets its own cache entries
+    version = EXTRACTOR_VERSION if not max_side else f"{EXTRACTOR_VERSION}/max_side-{max_side}"
+    cache = FeatureCache(cache_path, version) if cache_path else None
+    # The binary store (feature_store.py) lets merge and training skip CSV parsing
+    writer = FeatureCsvWriter(output_csv_path, store_path=feature_store.store_path(output_csv_path))
+    cached_count = 0
     image_count = 0
 
-    # 2. Walk through the directory tree
+    # 2. Walk through the directory tree (sorted, so the output order is deterministic), chunk by chunk
+    try:
+        try:
+            entries = background_iter(iter_image_files(root_folder_path), depth=queue_depth)
+            while True:
+                chunk = list(itertools.islice(entries, chunk_size))
+                if not chunk:
+                    break
+
+                if cache:
+                    chunk_results, hits = _cached_analyze(chunk, cache, analyzer)
+                    cached_count += hits
+                else:
+                    chunk_results = list(analyzer.analyze(chunk))
+
+                # 3. Report, visualize and stream the chunk to the CSV
+                sample_count = _collect_chunk(chunk, chunk_results, image_count, visualizer, writer, failed,
+                                              sample_output_folder, sample_count, max_samples)
+                image_count += len(chunk)
+                if cache:
+                    cache.commit()
+        finally:
+            analyzer.close()
+            if cache:
+                cache.close()
+            # Also when the run fails: the rows analyzed so far stay in the CSV
+            writer.close()
+    except OSError as e:
+        if e.filename and os.path.abspath(e.filename) == os.path.abspath(output_csv_path):
+            print(f"Failed to save CSV: {e}")
+            print("Tip: Check if the CSV file is currently open in Excel or another program.")
+        else:
+            print(f"Error: {e}")
+        return
+
+    # 4. Summary
+    if cache:
+        print(f"\nFeature cache: {cached_count} of {image_count} images were already analyzed.")
+
+    if writer.rows_written:
+        print(f"\nAnalysis complete. Extracted {writer.rows_written} records.")
+        print(f"Success! CSV file created: {output_csv_path}")
+
+        if sample_count > 0:
+            print(
+                f"\nGenerated {sample_count} visualization samples. Please check the folder: '{sample_output_folder}'")
+
+    else:
+        print("\nNo valid face data extracted from any images.")
+
+    if failed:
+        print(f"\n{len(failed)} image(s) could not be analyzed:")
+        for image_path, reason in failed:
+            print(f"  - {image_path}: {reason}")
+
+
+def iter_image_files(root_folder_path):
+    """Yields (celebrity_name, filename, image_path) for every image, in sorted order."""
     for current_root, dirs, files in os.walk(root_folder_path):
+        dirs.sort()
         celebrity_name = os.path.basename(current_root)
 
-        if current_root == root_folder_path:
-            pass
+        for filename in sorted(files):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield celebrity_name, filename, os.path.join(current_root, filename)
 
-        for filename in files:
-            if filename.lower().endswith(image_extensions):
-                image_count += 1
-                image_path = os.path.join(current_root, filename)
 
-                print(f"[{image_count}] Processing: {celebrity_name} - {filename}...")
+def _cached_analyze(chunk, cache, analyzer):
+    """
+    Serves unchanged images of a chunk from the feature cache and analyzes only the rest.
 
-                image = cv2.imread(image_path)
+    Returns:
+        tuple: (results, hits) where results holds (status, features_row, landmarks) for
+               every entry, in order (landmarks are None for cache hits).
+    """
+    keys = [_try_file_hash(cache, path) for _, _, path in chunk]
+    results = [None] * len(chunk)
+    for i, key in enumerate(keys):
+        hit = cache.get(key) if key else None
+        if hit is not None:
+            results[i] = (hit[0], hit[1], None)
 
-                if image is None:
-                    print(f"  -> Warning: Could not read image '{image_path}'. Skipping.")
-                    continue
+    todo = [i for i, result in enumerate(results) if result is None]
+    for i, result in zip(todo, analyzer.analyze([chunk[i] for i in todo])):
+        status, features, _ = result
+        # Timeouts and errors are not cached so they are retried next run
+        if keys[i] and status in ('ok', 'no_face', 'unreadable'):
+            cache.put(keys[i], status, features)
+        results[i] = result
 
-                stats = analyzer.process_image(image)
+    return results, len(chunk) - len(todo)
 
-                if stats:
-                    # --- Visualization & Sample Saving Logic ---
-                    if sample_count < max_samples:
-                        print(f"  -> Generating visualization sample ({sample_count + 1}/{max_samples})...")
-                        vis_img = visualizer.draw_landmarks(image, analyzer.landmarks_np)
-                        vis_img = visualizer.draw_custom_points(vis_img, analyzer.custom_points)
 
-                        sample_filename = f"sample_{sample_count + 1}_{filename}"
-                        save_path = os.path.join(sample_output_folder, sample_filename)
+def _try_file_hash(cache, path):
+    """Content hash of a file, or None if it cannot be read (it is then analyzed and reported as usual)."""
+    try:
+        return cache.file_hash(path)
+    except OSError:
+        return None
 
-                        cv2.imwrite(save_path, vis_img)
-                        sample_count += 1
-                    # -------------------------------------------
 
-                    record = {
-                        'Celebrity': celebrity_name,
-                        'Filename': filename,
-                    }
-                    record.update(stats)
-                    all_results.append(record)
+class _SerialAnalyzer:
+    """
+    Analyzes images in this process, batch by batch, while a thread pool decodes the next images.
+    The decode pool lives as long as the analyzer (one per process_folder run); close() shuts it down.
+    """
+
+    def __init__(self, batch_size, decode_threads, queue_depth, max_side):
+        self.analyzer = FaceAnalyzer()
+        self.decode_pool = ThreadPoolExecutor(max_workers=decode_threads)
+        self.batch_size = batch_size
+        self.decode_threads = decode_threads
+        self.queue_depth = queue_depth
+        self.max_side = max_side
+
+    def analyze(self, entries):
+        """Yields (status, features_row, landmarks) for every (celebrity, filename, path) entry, in order."""
+        images = prefetch_images([path for _, _, path in entries], self.decode_threads, self.queue_depth,
+                                 self.max_side, pool=self.decode_pool)
+
+        for start in range(0, len(entries), self.batch_size):
+            batch_len = min(self.batch_size, len(entries) - start)
+            readable = []
+
+            def batch_images():
+                for image in itertools.islice(images, batch_len):
+                    readable.append(image is not None)
+                    yield image
+
+            features, valid = self.analyzer.process_batch(batch_images())
+
+            for i in range(batch_len):
+                if not readable[i]:
+                    yield 'unreadable', None, None
+                elif not valid[i]:
+                    yield 'no_face', None, None
                 else:
-                    print(f"  -> No face detected in: {filename}")
+                    yield 'ok', features[i], self.analyzer.batch_landmarks[i]
 
-    # 3. Save to CSV (Modified)
-    if all_results:
-        print(f"\nAnalysis complete. Extracted {len(all_results)} records. Saving to '{output_csv_path}'...")
+    def close(self):
+        self.decode_pool.shutdown(wait=True, cancel_futures=True)
 
-        # Create DataFrame
-        df = pd.DataFrame(all_results)
 
-        # Reorder columns
-        cols = list(df.columns)
-        if 'Celebrity' in cols: cols.remove('Celebrity')
-        if 'Filename' in cols: cols.remove('Filename')
-        final_cols = ['Celebrity', 'Filename'] + cols
-        df = df[final_cols]
+# --- Parallel mode ---
 
-        try:
-            df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
-            print(f"Success! CSV file created: {output_csv_path}")
-        except Exception as e:
-            print(f"Failed to save CSV: {e}")
-            print("Tip: Check if the CSV file is currently open in Excel or another program.")
+# Warm FaceAnalyzer and resolution bound of the current worker process (set once by _init_worker)
+_worker_analyzer = None
+_worker_max_side = None
 
-        if sample_count > 0:
-            print(
-                f"\nGenerated {sample_count} visualization samples. Please check the folder: '{sample_output_folder}'")
 
-    else:
-        print("\nNo valid face data extracted from any images.")
+def _init_worker(max_side=None, ready=None):
+    global _worker_analyzer, _worker_max_side
+    _worker_analyzer = FaceAnalyzer()
+    _worker_max_side = max_side
+    if ready is not None:
+        ready.put(os.getpid())  # Lets the parent notice when this worker dies
+
+
+def _analyze_file(image_path):
+    """Worker task: returns (status, features_row, landmarks) for one image."""
+    image = read_image(image_path, _worker_max_side)
+    if image is None:
+        return 'unreadable', None, None
+
+    features, valid = _worker_analyzer.process_batch([image])
+    if not valid[0]:
+        return 'no_face', None, None
+    return 'ok', features[0], _worker_analyzer.batch_landmarks[0]
+
+
+class _WorkerPool:
+    """
+    Analyzes images in a pool of worker processes, each keeping one warm FaceMesh.
+    The pool lives across analyze() calls.
+
+    Every worker gets exactly one image at a time, so an image's deadline starts when
+    it is submitted. A worker stuck past its deadline cannot be interrupted, so the
+    image is reported as a timeout and the pool is recycled; the other in-flight
+    images are resubmitted to the new pool. (The first images of a fresh pool also
+    wait for the worker to start, so keep the timeout well above that.)
+
+    A worker that dies (segfault, OOM kill) never reports back, so every worker reports
+    its pid once it is ready and those pids are checked every LIVENESS_POLL seconds. After a death the pool is recycled and the
+    images that were in flight are rerun one at a time; one that kills its worker
+    when running alone is reported as an error.
+    """
+
+    LIVENESS_POLL = 1.0
+
+    def __init__(self, workers, timeout, max_side=None, task=_analyze_file):
+        """
+        Args:
+            workers (int): Number of worker processes.
+            timeout (float): Per-image time limit in seconds. None = no limit.
+            max_side (int): Resolution bound passed to the workers.
+            task: Picklable function image_path -> (status, features_row, landmarks).
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.max_side = max_side
+        self.task = task
+        self.ctx = multiprocessing.get_context('spawn')
+        self.pool = None
+        self.ready = None  # Queue on which the workers of the current pool report their pids
+        self.worker_pids = set()
+        self.generation = 0  # Ignores late results from a recycled pool
+
+    def analyze(self, entries):
+        """Yields (status, features_row, landmarks) for every (celebrity, filename, path) entry, in order."""
+        paths = [path for _, _, path in entries]
+        done = queue.Queue()
+        todo = deque(range(len(paths)))
+        pending = {}  # index -> deadline of every in-flight image
+        finished = {}  # index -> result, waiting for its turn to be yielded
+        suspects = set()  # In flight when a worker died: rerun alone to find the culprit
+        next_index = 0
+
+        def on_result(gen, i, result):
+            done.put((gen, i, result))
+
+        def on_error(gen, i, e):
+            done.put((gen, i, (f'error: {e}', None, None)))
+
+        while next_index < len(paths):
+            if self.pool is None:
+                self.ready = self.ctx.SimpleQueue()
+                self.worker_pids = set()
+                self.pool = self.ctx.Pool(self.workers, initializer=_init_worker,
+                                          initargs=(self.max_side, self.ready))
+
+            # Keep every worker busy with exactly one image (a suspect runs alone)
+            while todo and len(pending) < self.workers and not (pending and todo[0] in suspects):
+                i = todo.popleft()
+                pending[i] = time.monotonic() + self.timeout if self.timeout else None
+                self.pool.apply_async(self.task, (paths[i],),
+                                      callback=partial(on_result, self.generation, i),
+                                      error_callback=partial(on_error, self.generation, i))
+                if i in suspects:
+                    break
+
+            # Wake up at the next deadline, and at least every LIVENESS_POLL seconds
+            deadlines = [d for d in pending.values() if d is not None]
+            wait = self.LIVENESS_POLL
+            if deadlines:
+                wait = min(wait, max(0.0, min(deadlines) - time.monotonic()))
+
+            try:
+                gen, i, result = done.get(timeout=wait)
+                if gen == self.generation and i in pending:
+                    del pending[i]
+                    finished[i] = result
+            except queue.Empty:
+                now = time.monotonic()
+                if not self._workers_alive():
+                    if len(pending) == 1 and next(iter(pending)) in suspects:
+                        finished[pending.popitem()[0]] = ('error: worker process died', None, None)
+                    else:
+                        suspects.update(pending)
+                else:
+                    expired = [i for i, deadline in pending.items() if deadline is not None and deadline <= now]
+                    if not expired:
+                        continue
+                    for i in expired:
+                        del pending[i]
+                        finished[i] = (f'timeout after {self.timeout}s', None, None)
+
+                self._recycle()
+                todo.extendleft(sorted(pending, reverse=True))
+                pending.clear()
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+    def _workers_alive(self):
+        """
+        False once a worker that reported ready has exited. The pool replaces dead workers
+        on its own, but the image the dead one held is lost. (A worker that dies while
+        starting never took an image, so it does not matter that it never reported.)
+        """
+        while not self.ready.empty():
+            self.worker_pids.add(self.ready.get())
+        return self.worker_pids <= {p.pid for p in multiprocessing.active_children()}
+
+    def _recycle(self):
+        self.close()
+        self.generation += 1
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+            self.ready.close()
+            self.ready = None
+
+
+def _collect_chunk(chunk, chunk_results, first_index, visualizer, writer, failed, sample_output_folder,
+                   sample_count, max_samples):
+    """
+    Reports the results of one chunk, saves visualization samples and streams its records to the writer.
+
+    Returns:
+        int: The updated sample_count.
+    """
+    rows = []
+    for i, ((celebrity_name, filename, image_path), (status, features, landmarks_np)) in enumerate(
+            zip(chunk, chunk_results)):
+        print(f"[{first_index + i + 1}] Processing: {celebrity_name} - {filename}...")
+
+        if status == 'unreadable':
+            print(f"  -> Warning: Could not read image '{image_path}'. Skipping.")
+            failed.append((image_path, status))
+            continue
+        if status == 'no_face':
+            print(f"  -> No face detected in: {filename}")
+            continue
+        if status != 'ok':
+            print(f"  -> Failed: {status}")
+            failed.append((image_path, status))
+            continue
+
+        # --- Visualization & Sample Saving Logic (not for cached results, which have no landmarks) ---
+        if sample_count < max_samples and landmarks_np is not None:
+            print(f"  -> Generating visualization sample ({sample_count + 1}/{max_samples})...")
+            _, custom_points = face_geometry.measure_faces(landmarks_np[np.newaxis])
+            vis_img = visualizer.draw_landmarks(cv2.imread(image_path), landmarks_np)
+            vis_img = visualizer.draw_custom_points(vis_img, {k: v[0] for k, v in custom_points.items()})
+
+            sample_filename = f"sample_{sample_count + 1}_{filename}"
+            save_path = os.path.join(sample_output_folder, sample_filename)
+
+            cv2.imwrite(save_path, vis_img)
+            sample_count += 1
+        # -------------------------------------------
+
+        rows.append(i)
+
+    if rows:
+        writer.write([chunk[i][0] for i in rows], [chunk[i][1] for i in rows],
+                     np.vstack([chunk_results[i][1] for i in rows]))
+    return sample_count
 
 
 if __name__ == "__main__":
@@ -126,8 +437,15 @@ if __name__ == "__main__":
     # Changed extension to .csv
     output_file = "celebrity_face_features.csv"
 
+    # Parallel mode: one warm FaceMesh per worker process
+    num_workers = os.cpu_count() or 1
+    image_timeout = 60  # Seconds before a single image is given up on
+
+    # Features of unchanged images are reused from here on the next run
+    cache_file = "feature_cache.sqlite"
+
     if os.path.exists(input_folder):
-        process_folder(input_folder, output_file)
+        process_folder(input_folder, output_file, workers=num_workers, timeout=image_timeout, cache_path=cache_file)
     else:
         print(f"Error: Folder '{input_folder}' not found in the current directory.")
-        print("Please check the path or move the script to the parent directory of the folder.")
\ No newline at end of file
+        print("Please check the path or move the script to the parent directory of the folder.")
@@ -0,0 +1,132 @@
+"""
+Benchmark for single (interactive) fortune predictions.
+
+Times one predict_fortune call per face, for:
+  - the previous DataFrame path (one-row DataFrame, LoveModel.predict(df), .values),
+  - the NumPy fast path on the pickled models (destiny_brain.pkl),
+  - the NumPy fast path on the compiled models (destiny_brain_compiled/, if present),
+  - DestinyPredictor with its prediction cache, on faces it has seen before,
+and checks that all paths give the same fortunes.
+With --profile it also prints how long each model takes (inference_plan.py).
+
+Usage:
+    python bench_predictor.py --rows 200 --repeat 5
+    python bench_predictor.py --profile
+"""
+import argparse
+import os
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import othermodels
+import tree_engine
+from destiny_predictor import DestinyPredictor
+from inference_plan import InferencePlan
+
+
+def legacy_predict(predictor, feature_dict):
+    """The pre-fast-path predict_fortune: DataFrame input for every model."""
+    input_data = [feature_dict.get(feat, 0) for feat in othermodels.ALL_FEATURES]
+    input_df = pd.DataFrame([input_data], columns=othermodels.ALL_FEATURES)
+
+    results = {}
+    if 'Love' in predictor.models:
+        results['Love'] = np.array([predictor.models['Love'].predict(input_df)])
+    for label in ['Wealth', 'Health', 'Later-life']:
+        if label in predictor.models:
+            results[label] = np.array([int(predictor.models[label].predict(input_df.values)[0])])
+    if 'GENERAL' in predictor.models:
+        gen_preds = predictor.models['GENERAL']['model'].predict(input_df.values)[0]
+        for i, target in enumerate(predictor.models['GENERAL']['targets']):
+            results[target] = np.array([int(gen_preds[i])])
+    return predictor._format_results(results, 1)[0]
+
+
+def _predictor_from(models, meaning_map):
+    predictor = DestinyPredictor.__new__(DestinyPredictor)
+    predictor.models = dict(models)
+    predictor.meaning_map = meaning_map
+    predictor.is_ready = True
+    predictor.is_compiled = False
+    predictor._row = None
+    predictor.cache_size = 0  # Time the models, not the prediction cache
+    predictor.plan = InferencePlan(predictor.models, othermodels.ALL_FEATURES)
+    return predictor
+
+
+def _time_calls(predict, rows, repeat):
+    """Returns (per-call latencies in microseconds, outputs of the last pass)."""
+    latencies = []
+    for _ in range(repeat):
+        outputs = []
+        for row in rows:
+            start = time.perf_counter()
+            outputs.append(predict(row))
+            latencies.append((time.perf_counter() - start) * 1e6)
+    return np.array(latencies), outputs
+
+
+def run_benchmark(rows, repeat=5, model_file='destiny_brain.pkl', compiled_dir=tree_engine.COMPILED_DIR):
+    """
+    Times every path over the given feature dictionaries and prints a latency table.
+
+    Returns:
+        dict: Path name -> {'median_us', 'p95_us', 'matches_legacy'}.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        saved_data = joblib.load(model_file)
+        meaning_map = saved_data.pop('meaning_map', {})
+        pickled = _predictor_from(saved_data, meaning_map)
+
+    paths = {
+        'DataFrame path (pkl)': lambda row: legacy_predict(pickled, row),
+        'NumPy fast path (pkl)': pickled.predict_fortune,
+    }
+    if os.path.exists(compiled_dir):
+        compiled = _predictor_from(tree_engine.load_compiled(compiled_dir), meaning_map)
+        paths['NumPy fast path (compiled)'] = compiled.predict_fortune
+
+    # Repeated faces (after the first pass every call is a prediction cache hit)
+    paths['Prediction cache (repeats)'] = DestinyPredictor(cache_size=len(rows)).predict_fortune
+
+    # Warm up every path once (first calls pay for lazy initialization)
+    for predict in paths.values():
+        predict(rows[0])
+
+    summary = {}
+    baseline = None
+    print(f"\n{'Path':30}{'median us':>12}{'p95 us':>12}{'speedup':>10}  same fortunes")
+    for name, predict in paths.items():
+        latencies, outputs = _time_calls(predict, rows, repeat)
+        if baseline is None:
+            baseline = (np.median(latencies), outputs)
+        summary[name] = {
+            'median_us': float(np.median(latencies)),
+            'p95_us': float(np.percentile(latencies, 95)),
+            'matches_legacy': outputs == baseline[1],
+        }
+        speedup = baseline[0] / summary[name]['median_us']
+        print(f"{name:30}{summary[name]['median_us']:12.1f}{summary[name]['p95_us']:12.1f}"
+              f"{speedup:9.1f}x  {summary[name]['matches_legacy']}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=othermodels.DATA_FILE, help='CSV with feature columns to sample faces from')
+    parser.add_argument('--rows', type=int, default=200, help='Number of faces')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the faces')
+    parser.add_argument('--profile', action='store_true', help='Also time every model on its own')
+    args = parser.parse_args()
+
+    if not os.path.exists('destiny_brain.pkl'):
+        print("Error: destiny_brain.pkl not found. Please run train_and_save.py first.")
+    else:
+        data = pd.read_csv(args.data)[othermodels.ALL_FEATURES].dropna().head(args.rows)
+        run_benchmark(data.to_dict('records'), args.repeat)
+        if args.profile:
+            predictor = DestinyPredictor(cache_size=0)
+            predictor._get_plan().print_profile(data.values[:1])
@@ -0,0 +1,96 @@
+"""
+Benchmark for the resolution-bounded detection mode.
+
+Compares, per image, full-resolution decode + FaceMesh against read_image(max_side)
++ FaceMesh: latency of both paths and how far every feature drifts.
+
+Usage:
+    python bench_resolution.py celebrity_faces --max-side 1024 --repeat 3
+"""
+import argparse
+import os
+import time
+import numpy as np
+import face_geometry
+from face_analyzer import FaceAnalyzer
+from image_loader import read_image
+from batch_process_faces import iter_image_files
+
+
+def _time_path(analyzer, path, max_side, repeat):
+    """Returns (best seconds for decode + detection, unrounded feature row or None)."""
+    best = float('inf')
+    landmarks = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        img = read_image(path, max_side)
+        landmarks = analyzer._detect_landmarks(img)
+        best = min(best, time.perf_counter() - start)
+
+    if landmarks is None:
+        return best, None
+    return best, face_geometry.featurize(landmarks[np.newaxis])[0]
+
+
+def run_benchmark(paths, max_side, repeat=3):
+    """
+    Runs both paths over every image and prints a latency and drift report.
+
+    Returns:
+        dict: Summary with mean latencies (ms), speedup and per-feature max abs drift.
+    """
+    full_analyzer = FaceAnalyzer()
+    bounded_analyzer = FaceAnalyzer()
+
+    full_times, bounded_times, drifts = [], [], []
+    for path in paths:
+        full_t, full_f = _time_path(full_analyzer, path, None, repeat)
+        bounded_t, bounded_f = _time_path(bounded_analyzer, path, max_side, repeat)
+        full_times.append(full_t)
+        bounded_times.append(bounded_t)
+
+        if full_f is not None and bounded_f is not None:
+            drifts.append(np.abs(full_f - bounded_f))
+        elif (full_f is None) != (bounded_f is None):
+            print(f"  Detection differs for {path} (full: {full_f is not None}, bounded: {bounded_f is not None})")
+
+    if not full_times:
+        print("No images to benchmark.")
+        return {}
+
+    full_ms = 1000 * np.mean(full_times)
+    bounded_ms = 1000 * np.mean(bounded_times)
+    summary = {
+        'images': len(full_times),
+        'faces_compared': len(drifts),
+        'full_ms': full_ms,
+        'bounded_ms': bounded_ms,
+        'speedup': full_ms / bounded_ms if bounded_ms > 0 else float('inf'),
+        'max_drift': dict(zip(face_geometry.FEATURE_NAMES, np.max(drifts, axis=0))) if drifts else {},
+        'mean_drift': dict(zip(face_geometry.FEATURE_NAMES, np.mean(drifts, axis=0))) if drifts else {},
+    }
+
+    print(f"\nImages: {summary['images']}  (faces compared: {summary['faces_compared']})")
+    print(f"Full resolution   : {full_ms:8.1f} ms / image (decode + FaceMesh)")
+    print(f"max_side={max_side:<8} : {bounded_ms:8.1f} ms / image")
+    print(f"Speedup           : {summary['speedup']:.2f}x")
+    if drifts:
+        print(f"\n{'Feature':22}{'max |drift|':>14}{'mean |drift|':>14}")
+        for name in face_geometry.FEATURE_NAMES:
+            print(f"{name:22}{summary['max_drift'][name]:14.5f}{summary['mean_drift'][name]:14.5f}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', nargs='?', default='celebrity_faces', help='Folder of celebrity subfolders')
+    parser.add_argument('--max-side', type=int, default=1024, help='Longest side for the bounded path')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repetitions per image (best is kept)')
+    parser.add_argument('--limit', type=int, default=50, help='Maximum number of images')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.folder):
+        print(f"Error: Folder '{args.folder}' not found.")
+    else:
+        image_paths = [path for _, _, path in iter_image_files(args.folder)][:args.limit]
+        run_benchmark(image_paths, args.max_side, args.repeat)
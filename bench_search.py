@@ -0,0 +1,62 @@
+"""
+Search time vs. accuracy: the full random search against budgeted successive halving.
+
+Trains each model once with RandomizedSearchCV and once per time budget with HalvingSearch
+(budgeted_search.py), on the same train/test split the trainers use, and prints the
+training time and held-out accuracy of every run.
+
+Usage:
+    python bench_search.py --labels Wealth Love GENERAL --budgets 1 2 5 --output search_tradeoff.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import warnings
+import othermodels
+import train_and_save
+
+
+def run_tradeoff(X, y, labels, budgets):
+    """
+    Returns:
+        list: One {'label', 'search', 'time_budget', 'seconds', 'accuracy'} dict per run.
+    """
+    runs = []
+    for label in labels:
+        for search_mode, budget in [('random', None)] + [('halving', b) for b in budgets]:
+            # The trainers print their progress; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                result = train_and_save.train_job(label, X, y, search_mode=search_mode, time_budget=budget)
+            accuracies = result['accuracies']
+            runs.append({
+                'label': label, 'search': search_mode, 'time_budget': budget,
+                'seconds': result['seconds'],
+                'accuracy': sum(accuracies) / len(accuracies) if accuracies else None,
+            })
+    return runs
+
+
+def print_tradeoff(runs):
+    print(f"\n{'model':12}{'search':10}{'budget s':>10}{'seconds':>10}{'accuracy':>10}")
+    for run in runs:
+        budget = '-' if run['time_budget'] is None else f"{run['time_budget']:g}"
+        accuracy = '-' if run['accuracy'] is None else f"{run['accuracy']:.2%}"
+        print(f"{run['label']:12}{run['search']:10}{budget:>10}{run['seconds']:10.1f}{accuracy:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=othermodels.DATA_FILE, help='Merged features + labels CSV')
+    parser.add_argument('--labels', nargs='+', default=['Wealth'], help="Models to tune ('Love', 'Wealth', 'GENERAL', ...)")
+    parser.add_argument('--budgets', nargs='+', type=float, default=[1, 2, 5], help='Halving time budgets (seconds)')
+    parser.add_argument('--output', help='Also write the runs as JSON')
+    args = parser.parse_args()
+
+    X, y = othermodels.load_data(args.data)
+    runs = run_tradeoff(X, y, args.labels, args.budgets)
+    print_tradeoff(runs)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(runs, f, indent=2)
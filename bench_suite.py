@@ -0,0 +1,266 @@
+"""
+Benchmark suite for every stage from landmarks to trained models, with regression checks.
+
+Times, on synthetic inputs:
+  - FaceAnalyzer._measure_face and _calculate_ratios (one face of random landmarks),
+  - EyeFeatureExtractor.extract_metrics,
+  - DestinyPredictor.predict_fortune (one row) and predict_fortune_batch (--batch-sizes),
+  - joblib.load of destiny_brain.pkl,
+  - othermodels.load_data of the training data (binary feature store if current, else CSV),
+  - train_and_save.train_models on --train-rows resampled training rows,
+writes the results as JSON and compares the medians with a stored baseline
+(bench_baseline.json). A stage that got slower than its tolerance allows fails the
+run (exit code 1), and so does a missing baseline (exit code 2). Baselines depend on the
+machine, so none is committed: record one on the kiosk hardware with --update-baseline.
+
+Usage:
+    python bench_suite.py                              # Run everything, compare with the baseline
+    python bench_suite.py --stages predict_single load_model --repeat 50
+    python bench_suite.py --train-rows 500 --update-baseline
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import face_geometry
+import othermodels
+import train_and_save
+from destiny_predictor import DestinyPredictor
+from eye_feature_extractor import EyeFeatureExtractor
+from face_analyzer import FaceAnalyzer
+
+BASELINE_FILE = 'bench_baseline.json'
+RESULTS_FILE = 'bench_results.json'
+MODEL_FILE = 'destiny_brain.pkl'
+
+# Allowed slowdown of a stage's median before it counts as a regression (0.5 = 50 % slower)
+DEFAULT_TOLERANCE = 0.5
+# Slowdowns smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.02
+
+STAGES = ['measure_face', 'calculate_ratios', 'eye_metrics', 'predict_single', 'predict_batch',
+          'load_model', 'load_data', 'train']
+
+
+def synthetic_landmarks(n_faces, seed=0):
+    """(n_faces, 478, 2) random normalized landmarks (the timing does not depend on the face)."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.2, 0.8, size=(n_faces, face_geometry.NUM_LANDMARKS, 2))
+
+
+def synthetic_training_data(rows, seed=0, data_file=othermodels.DATA_FILE):
+    """
+    Resamples the training CSV to the requested number of rows, jittering every feature by
+    5 % of its spread, so training can be timed at sizes larger than the real data.
+
+    Returns:
+        tuple: (X, y) in the layout of othermodels.load_data
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y = othermodels.load_data(data_file)
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(X), size=rows)
+    noise = rng.normal(0, 1, size=(rows, X.shape[1])) * (0.05 * X.std().values)
+    X_syn = pd.DataFrame(X.values[picks] + noise, columns=X.columns)
+    y_syn = y.iloc[picks].reset_index(drop=True)
+    return X_syn, y_syn
+
+
+def _time_calls(fn, repeat, warmup=1):
+    """Calls fn() warmup + repeat times; returns the timed durations in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return times
+
+
+def _summary(times, **params):
+    times = np.asarray(times)
+    return dict(params, calls=len(times), median_ms=float(np.median(times)),
+                p95_ms=float(np.percentile(times, 95)), min_ms=float(times.min()))
+
+
+def _quiet(fn):
+    """Runs fn with the trainers' progress output and warnings silenced."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return fn()
+    return run
+
+
+def run_suite(stages=None, repeat=200, batch_sizes=(32, 256), train_rows=200, train_repeat=1,
+              model_file=MODEL_FILE, cores=None):
+    """
+    Times the selected stages.
+
+    Args:
+        stages (list): Names from STAGES. None = all.
+        repeat (int): Timed calls per stage (training uses train_repeat).
+        batch_sizes (tuple): Rows per predict_fortune_batch call; one result per size.
+        train_rows (int): Size of the synthetic training set.
+        cores (int): Core budget for training (default: all).
+
+    Returns:
+        dict: Stage name (e.g. 'predict_batch_32') -> {'calls', 'median_ms', 'p95_ms', 'min_ms', ...}.
+    """
+    stages = STAGES if stages is None else stages
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)} (expected some of {STAGES})")
+    results = {}
+
+    # 1. Feature extraction on one synthetic face
+    if {'measure_face', 'calculate_ratios', 'eye_metrics'} & set(stages):
+        analyzer = FaceAnalyzer()
+        lms = synthetic_landmarks(1)[0]
+        measurements, _ = analyzer._measure_face(lms)
+        if 'measure_face' in stages:
+            results['measure_face'] = _summary(_time_calls(lambda: analyzer._measure_face(lms), repeat))
+        if 'calculate_ratios' in stages:
+            results['calculate_ratios'] = _summary(_time_calls(lambda: analyzer._calculate_ratios(measurements), repeat))
+        if 'eye_metrics' in stages:
+            results['eye_metrics'] = _summary(_time_calls(lambda: EyeFeatureExtractor(lms).extract_metrics(), repeat))
+
+    # 2. Prediction (no prediction cache: every call runs the models)
+    if {'predict_single', 'predict_batch'} & set(stages):
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictor = DestinyPredictor(cache_size=0)
+        if not predictor.is_ready:
+            raise RuntimeError("Models not loaded; run train_and_save.py first")
+
+        features, _ = synthetic_training_data(max(batch_sizes, default=1), seed=1)
+        if 'predict_single' in stages:
+            row = features.iloc[0].to_dict()
+            results['predict_single'] = _summary(_time_calls(lambda: predictor.predict_fortune(row), repeat), rows=1)
+        if 'predict_batch' in stages:
+            for size in batch_sizes:
+                batch = features.values[:size]
+                results[f'predict_batch_{size}'] = _summary(
+                    _time_calls(lambda: predictor.predict_fortune_batch(batch), max(1, repeat // 10)), rows=size)
+
+    # 3. Loading the pickled brain (what a kiosk pays at startup without the compiled copy)
+    if 'load_model' in stages:
+        results['load_model'] = _summary(_time_calls(_quiet(lambda: joblib.load(model_file)),
+                                                     max(1, repeat // 20)))
+
+    if 'load_data' in stages:
+        results['load_data'] = _summary(_time_calls(_quiet(lambda: othermodels.load_data(othermodels.DATA_FILE)),
+                                                    max(1, repeat // 20)))
+
+    # 4. Training every model on synthetic data (no search cache, so the searches run)
+    if 'train' in stages:
+        X, y = synthetic_training_data(train_rows)
+        train = _quiet(lambda: train_and_save.train_models(X, y, cores))
+        results['train'] = _summary(_time_calls(train, train_repeat, warmup=0), rows=train_rows)
+
+    return results
+
+
+def machine_info():
+    return {'platform': platform.platform(), 'python': platform.python_version(),
+            'cpu_count': os.cpu_count(), 'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares stage medians with a baseline. A stage regresses when its median is more than
+    (1 + tolerance) times the baseline median and also NOISE_FLOOR_MS slower. A stage's own
+    'tolerance' entry in the baseline overrides the default.
+
+    Returns:
+        list: One {'stage', 'baseline_ms', 'median_ms', 'ratio', 'status'} dict per timed stage;
+              status is 'ok', 'faster', 'REGRESSION' or 'no baseline'.
+    """
+    rows = []
+    for stage, result in results.items():
+        base = baseline.get('stages', {}).get(stage)
+        if base is None:
+            rows.append({'stage': stage, 'baseline_ms': None, 'median_ms': result['median_ms'],
+                         'ratio': None, 'status': 'no baseline'})
+            continue
+
+        allowed = base.get('tolerance', tolerance)
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] > 0 else float('inf')
+        slower_by = result['median_ms'] - base['median_ms']
+        if ratio > 1 + allowed and slower_by > NOISE_FLOOR_MS:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + allowed):
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append({'stage': stage, 'baseline_ms': base['median_ms'], 'median_ms': result['median_ms'],
+                     'ratio': ratio, 'status': status})
+    return rows
+
+
+def print_comparison(rows):
+    print(f"\n{'stage':20}{'baseline ms':>14}{'median ms':>14}{'ratio':>8}  status")
+    for row in rows:
+        base = '-' if row['baseline_ms'] is None else f"{row['baseline_ms']:.4f}"
+        ratio = '-' if row['ratio'] is None else f"{row['ratio']:.2f}x"
+        print(f"{row['stage']:20}{base:>14}{row['median_ms']:14.4f}{ratio:>8}  {row['status']}")
+
+
+def save_baseline(results, path=BASELINE_FILE, tolerance=DEFAULT_TOLERANCE):
+    """Stores the results as the new baseline, keeping per-stage tolerances already set in it."""
+    old = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            old = json.load(f).get('stages', {})
+    stages = {stage: dict(result, tolerance=old.get(stage, {}).get('tolerance', tolerance))
+              for stage, result in results.items()}
+    with open(path, 'w') as f:
+        json.dump({'machine': machine_info(), 'stages': stages}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=None, help='Stages to time (default: all)')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed calls per stage')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[32, 256], help='Rows per batch prediction')
+    parser.add_argument('--train-rows', type=int, default=200, help='Rows of synthetic training data')
+    parser.add_argument('--train-repeat', type=int, default=1, help='Timed training runs')
+    parser.add_argument('--cores', type=int, default=None, help='Core budget for training (default: all)')
+    parser.add_argument('--model-file', default=MODEL_FILE, help='Pickled brain for the load_model stage')
+    parser.add_argument('--output', default=RESULTS_FILE, help='Where to write the results (JSON)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed slowdown before a stage fails (0.5 = 50%% slower)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the baseline')
+    args = parser.parse_args()
+
+    results = run_suite(args.stages, args.repeat, args.batch_sizes, args.train_rows, args.train_repeat,
+                        args.model_file, args.cores)
+    with open(args.output, 'w') as f:
+        json.dump({'machine': machine_info(), 'stages': results}, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline, args.tolerance)
+        print(f"Baseline saved to {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        # Without a baseline nothing is checked, which must not pass as "no regressions"
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one.")
+        sys.exit(2)
+    else:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.tolerance)
+        print_comparison(rows)
+        regressions = [row['stage'] for row in rows if row['status'] == 'REGRESSION']
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSION in: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo performance regressions.")
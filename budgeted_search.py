@@ -0,0 +1,183 @@
+"""
+Budgeted hyperparameter search: successive halving over boosting rounds with a wall-clock limit.
+
+RandomizedSearchCV fits every candidate with its full n_estimators. HalvingSearch instead
+scores many candidates with a fraction of their trees, keeps the best 1/factor, and repeats
+with factor times more trees until the survivors run at full size. Before each round it
+estimates the round's cost from the fits so far and stops when the time budget would be
+exceeded, so the search time follows the budget rather than the size of the grid.
+"""
+import math
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import ParameterSampler, RandomizedSearchCV, check_cv
+
+
+def make_search(pipe, params, n_iter, n_jobs=-1, search='random', time_budget=None, random_state=42,
+                cache=None, name=None):
+    """
+    Builds the hyperparameter search used by the trainers.
+
+    Args:
+        pipe: Pipeline to tune.
+        params (dict): Parameter distributions (RandomizedSearchCV format).
+        n_iter (int): Candidates of the random search.
+        search (str): 'random' (RandomizedSearchCV, every candidate at full size) or
+                      'halving' (HalvingSearch over factor * n_iter candidates).
+        time_budget (float): Seconds allowed for a 'halving' search (None = no limit).
+        cache (SearchCache): Optional cache of earlier results (search_cache.py); name labels
+                             the entries (e.g. 'Wealth').
+
+    Returns:
+        Estimator with fit() and best_estimator_ / best_params_ / best_score_.
+    """
+    if search == 'random':
+        searcher = RandomizedSearchCV(pipe, params, n_iter=n_iter, cv=3, n_jobs=n_jobs, verbose=0,
+                                      random_state=random_state)
+    elif search == 'halving':
+        searcher = HalvingSearch(pipe, params, n_candidates=3 * n_iter, time_budget=time_budget, cv=3,
+                                 n_jobs=n_jobs, random_state=random_state)
+    else:
+        raise ValueError(f"Unknown search mode: {search}")
+
+    if cache is not None:
+        from search_cache import CachedSearch
+        return CachedSearch(searcher, cache, name)
+    return searcher
+
+
+def search_summary(search, seconds):
+    """One line describing a fitted search, e.g. 'halving: 87 fits in 12.3s, best CV 71.2%'."""
+    if hasattr(search, 'cache_hit'):
+        if search.cache_hit:
+            return f"cached result (search skipped, final fit {seconds:.1f}s), best CV {search.best_score_:.2%}"
+        search = search.search
+    if isinstance(search, HalvingSearch):
+        rounds = " -> ".join(str(entry['candidates']) for entry in search.history_)
+        return (f"halving ({rounds} candidates): {search.n_fits_} fits in {seconds:.1f}s, "
+                f"best CV {search.best_score_:.2%}")
+    n_fits = len(search.cv_results_['params']) * search.n_splits_
+    return f"random: {n_fits} fits in {seconds:.1f}s, best CV {search.best_score_:.2%}"
+
+
+class HalvingSearch:
+    """Successive halving over n_estimators, bounded by a wall-clock budget."""
+
+    def __init__(self, estimator, param_distributions, n_candidates=60, factor=3, time_budget=None,
+                 cv=3, n_jobs=-1, random_state=42):
+        """
+        Args:
+            estimator: Pipeline (or estimator) to tune.
+            param_distributions (dict): Search space. A parameter ending in 'n_estimators' is the
+                                        resource: early rounds fit a fraction of those trees.
+            n_candidates (int): Candidates sampled for the first round.
+            factor (int): Keep the best 1/factor of the candidates per round.
+            time_budget (float): Seconds for the search (the final refit is extra). None = no limit.
+        """
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.time_budget = time_budget
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        start = time.perf_counter()
+        deadline = None if self.time_budget is None else start + self.time_budget
+        cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        folds = list(cv.split(X, y))
+
+        resource = next((key for key in self.param_distributions if key.endswith('n_estimators')), None)
+        candidates = list(ParameterSampler(self.param_distributions, self.n_candidates,
+                                           random_state=self.random_state))
+
+        # Rounds shrink the field by factor until at most factor candidates run at full size
+        n_rounds = 1
+        while math.ceil(len(candidates) / self.factor ** (n_rounds - 1)) > self.factor:
+            n_rounds += 1
+
+        self.history_ = []  # One entry per round
+        self.n_fits_ = 0
+        fit_seconds, fitted_trees = 0.0, 0
+        best = None  # (score, params) of the best candidate of the last finished round
+        survivors = candidates
+
+        for round_id in range(n_rounds):
+            fraction = float(self.factor) ** (round_id - n_rounds + 1)
+            settings = [self._at_fraction(params, resource, fraction) for params in survivors]
+            trees = sum(self._trees(s, resource) for s in settings) * len(folds)
+
+            # Stop before a round that cannot finish in time (the first round always runs)
+            if deadline is not None and best is not None and fitted_trees:
+                estimate = fit_seconds / fitted_trees * trees
+                if time.perf_counter() + estimate > deadline:
+                    break
+
+            round_start = time.perf_counter()
+            scores = self._score(settings, folds, X, y, deadline)
+            seconds = time.perf_counter() - round_start
+            fit_seconds += seconds
+            fitted_trees += sum(self._trees(s, resource) for s in settings[:len(scores)]) * len(folds)
+            self.n_fits_ += len(scores) * len(folds)
+
+            order = np.argsort(-scores, kind='stable')  # Ties keep the earlier candidate
+            self.history_.append({'candidates': len(scores), 'fraction': fraction,
+                                  'seconds': seconds, 'best_score': float(scores[order[0]])})
+            best = (float(scores[order[0]]), survivors[order[0]])
+            if len(scores) < len(survivors):
+                break  # Ran out of time mid-round
+
+            keep = max(1, math.ceil(len(survivors) / self.factor))
+            survivors = [survivors[i] for i in order[:keep]]
+
+        self.search_seconds_ = time.perf_counter() - start
+        self.best_score_, self.best_params_ = best
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
+
+    def _score(self, settings, folds, X, y, deadline):
+        """Mean CV score per setting, in batches so the deadline is checked between them."""
+        batch = max(1, _effective_jobs(self.n_jobs))
+        scores = []
+        with Parallel(n_jobs=self.n_jobs) as parallel:
+            for i in range(0, len(settings), batch):
+                if scores and deadline is not None and time.perf_counter() > deadline:
+                    break
+                fold_scores = parallel(
+                    delayed(_fit_and_score)(self.estimator, params, X, y, train, test)
+                    for params in settings[i:i + batch] for train, test in folds
+                )
+                scores.extend(np.mean(np.reshape(fold_scores, (-1, len(folds))), axis=1))
+        return np.array(scores)
+
+    @staticmethod
+    def _at_fraction(params, resource, fraction):
+        if resource is None or fraction >= 1:
+            return params
+        return dict(params, **{resource: max(1, int(round(params[resource] * fraction)))})
+
+    @staticmethod
+    def _trees(params, resource):
+        return params[resource] if resource is not None else 1
+
+
+def _effective_jobs(n_jobs):
+    """Number of workers joblib uses for n_jobs (-1 = all cores)."""
+    if n_jobs is None:
+        return 1
+    return max(1, (os.cpu_count() or 1) + 1 + n_jobs) if n_jobs < 0 else n_jobs
+
+
+def _fit_and_score(estimator, params, X, y, train, test):
+    model = clone(estimator).set_params(**params)
+    model.fit(_rows(X, train), _rows(y, train))
+    return model.score(_rows(X, test), _rows(y, test))
+
+
+def _rows(data, index):
+    return data.iloc[index] if hasattr(data, 'iloc') else data[index]
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+import cv2
+
+
+class CameraGrabber:
+    """
+    Reads camera frames on a dedicated thread so a slow driver never stalls the UI.
+
+    Only the newest frames are kept (in a small ring buffer), so consumers always get
+    the most recent image instead of whatever has queued up in the driver.
+    """
+
+    STOP_TIMEOUT = 1.0  # Seconds stop() waits for the capture thread
+
+    def __init__(self, sources=(0, 1), buffer_size=2):
+        """
+        Args:
+            sources (tuple): Camera indices to try in order; the first one that opens is used.
+            buffer_size (int): Number of recent frames kept in the ring buffer.
+        """
+        self.sources = sources
+        self.capture = None
+        self.frames = deque(maxlen=buffer_size)  # (seq, timestamp, frame), newest last
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self._stop_event = None  # Set by stop(); one per capture thread
+
+        # Counters
+        self.frames_grabbed = 0
+        self.frames_dropped = 0  # Grabbed but replaced by a newer frame before anyone read them
+        self.read_failures = 0
+        self._last_read_seq = 0
+
+    def start(self):
+        """
+        Opens the camera and starts the capture thread.
+
+        Returns:
+            bool: True if a camera was opened.
+        """
+        if self.running:
+            return True
+
+        for source in self.sources:
+            self.capture = cv2.VideoCapture(source)
+            if self.capture.isOpened():
+                break
+            self.capture.release()
+        else:
+            self.capture = None
+            return False
+
+        # Ask the driver not to queue old frames (ignored by backends that don't support it)
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.running = True
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self.capture, self._stop_event), daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Stops the capture thread and releases the camera. The thread releases it when its
+        loop exits, so a read that is still blocked in the driver never races the release.
+        """
+        self.running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+            self._stop_event = None
+        if self.thread is not None:
+            self.thread.join(timeout=self.STOP_TIMEOUT)
+            if self.thread.is_alive():
+                print("[CameraGrabber] Capture thread still in a camera read; it releases the camera when done")
+            self.thread = None
+        self.capture = None
+        with self.lock:
+            self.frames.clear()
+
+    def is_opened(self):
+        return self.capture is not None and self.capture.isOpened()
+
+    def latest(self):
+        """
+        Returns the newest frame without waiting for the camera.
+
+        Returns:
+            tuple: (seq, timestamp, frame) or None if no frame has arrived yet.
+                   seq increases by one per grabbed frame; timestamp is time.monotonic()
+                   at grab time. The frame must be treated as read-only (copy it to modify).
+        """
+        with self.lock:
+            if not self.frames:
+                return None
+            entry = self.frames[-1]
+            seq = entry[0]
+            if seq > self._last_read_seq:
+                self.frames_dropped += seq - self._last_read_seq - 1
+                self._last_read_seq = seq
+        return entry
+
+    def _run(self, capture, stop_event):
+        """
+        Internal/Private function only works inside class. Capture thread loop.
+        Owns `capture` and releases it on exit; a restarted grabber has its own capture and event.
+        """
+        try:
+            while not stop_event.is_set():
+                ret, frame = capture.read()
+                timestamp = time.monotonic()
+                if stop_event.is_set():
+                    break  # Stopped during the read: don't publish a frame after stop() cleared them
+                if not ret:
+                    self.read_failures += 1
+                    time.sleep(0.01)  # Don't spin if the camera went away
+                    continue
+
+                with self.lock:
+                    self.frames_grabbed += 1
+                    self.frames.append((self.frames_grabbed, timestamp, frame))
+        finally:
+            capture.release()
@@ -1,4 +1,15 @@
+import sys
+import threading
+import startup  # Records the process start time; imports nothing heavy
+
+# --profile-startup prints time-to-window and an import-time profile.
+# Remove the flag before Kivy parses the command line.
+PROFILE_STARTUP = '--profile-startup' in sys.argv
+if PROFILE_STARTUP:
+    sys.argv.remove('--profile-startup')
+
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.lang import Builder
 from kivy.uix.screenmanager import ScreenManager
 from kivy.utils import platform
@@ -29,11 +40,26 @@ class DestinyMirror(App):
         sm.add_widget(ResultScreen(name='result'))
         return sm
 
+    def on_start(self):
+        if PROFILE_STARTUP:
+            # Runs on the next frame, i.e. once the window has been drawn
+            Clock.schedule_once(self.report_startup)
+
+    def report_startup(self, dt):
+        """Print how long the window took to appear and which heavy modules were loaded by then."""
+        elapsed = startup.seconds_since_start()
+        heavy = startup.loaded_heavy_modules()
+        print(f"[Startup] Window ready after {elapsed:.2f}s")
+        print(f"[Startup] Heavy modules loaded so far: {', '.join(heavy) or 'none'}")
+        # The import profile runs in a child interpreter; keep it off the UI thread
+        threading.Thread(target=startup.print_import_report, args=('screens',), daemon=True).start()
+
     def on_stop(self):
         """Handle app closure cleanup."""
         if self.root:
             main = self.root.get_screen('main')
             main.stop_camera()
+            main.executor.shutdown(wait=False)
 
 
 if __name__ == '__main__':
@@ -1,7 +1,10 @@
-import pandas as pd
-import joblib
+import numpy as np
 import os
-import othermodels
+from collections import OrderedDict
+# Feature names from face_geometry (numpy only): othermodels would import the training stack
+from face_geometry import FEATURE_NAMES
+import tree_engine
+from inference_plan import InferencePlan
 
 
 class DestinyPredictor:
@@ -9,36 +12,100 @@ class DestinyPredictor:
     Loads a pre-trained model file (.pkl) so raw CSVs are not required at runtime.
     """
 
-    def __init__(self):
+    def __init__(self, cache_size=0, cache_decimals=3, categories=None):
+        """
+        Args:
+            cache_size (int): Number of recent predictions kept (LRU). 0 (default) disables the cache.
+            cache_decimals (int): Features are quantized to this many decimals for the cache key
+                                  only (FaceAnalyzer already rounds to 3); inputs that share a key
+                                  share the cached result.
+            categories (list): Model keys to predict, e.g. ['Love', 'Wealth']. None = all.
+                               With compiled models the others are never loaded.
+        """
         self.models = {}
         self.meaning_map = {}
         self.is_ready = False
         self.model_file = 'destiny_brain.pkl'
+        self.compiled_dir = tree_engine.COMPILED_DIR  # Same models as plain arrays (tree_engine.py)
+        self.is_compiled = False
+        self.categories = categories
+        self._row = None  # Reused input row for single predictions
+        self.plan = None  # How the loaded models run together (inference_plan.py), built on first use
+
+        # Prediction cache: quantized feature tuple -> fortune results, least recent first
+        self.cache_size = cache_size
+        self.cache_scale = 10.0 ** cache_decimals
+        self.cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._files_signature = None  # Size / mtime of the model files when they were loaded
+
+        self.load()
+
+    def load(self):
+        """
+        (Re)loads the brain from disk, preferring the compiled copy when it is up to date.
 
+        Returns:
+            bool: True on success. On failure any previously loaded models are kept.
+        """
         print(f"[DestinyPredictor] Loading AI Brain: {self.model_file}...")
+        self._files_signature = self._file_signature()
 
-        if not os.path.exists(self.model_file):
+        if not os.path.exists(self.model_file) and not os.path.exists(self.compiled_dir):
             print(f"[Error] Model file {self.model_file} not found! Please run train_and_save.py first.")
-            return
+            return False
 
         try:
             # Load the brain from disk
-            saved_data = joblib.load(self.model_file)
+            is_compiled = self._compiled_is_current()
+            if is_compiled:
+                # Reads only the manifest; each model file is mapped when first requested
+                brain = tree_engine.load_compiled(self.compiled_dir)
+                meaning_map, models = brain.meaning_map, brain
+            else:
+                import joblib  # Only the pickled models need joblib (and, through them, the ML libraries)
+                saved_data = joblib.load(self.model_file)
+                meaning_map = saved_data.get('meaning_map', {})
+                models = {key: value for key, value in saved_data.items() if key != 'meaning_map'}
 
-            # Restore the meaning map (dictionary)
-            self.meaning_map = saved_data.get('meaning_map', {})
+            # Restore the meaning map (dictionary) and the models
+            self.meaning_map = meaning_map
+            self.models = models
 
-            # Restore the models
-            for key, value in saved_data.items():
-                if key != 'meaning_map':
-                    self.models[key] = value
+            # The inference plan is built by the first prediction, loading only the models it needs
+            self.plan = None
 
+            self.is_compiled = is_compiled
             self.is_ready = True
-            print("[DestinyPredictor] AI Loaded and Ready!")
+            print(f"[DestinyPredictor] AI Loaded and Ready!{' (compiled)' if self.is_compiled else ''}")
+            return True
 
         except Exception as e:
             print(f"[DestinyPredictor] Failed to load brain: {e}")
-            self.is_ready = False
+            return False
+
+    def _compiled_is_current(self):
+        """
+        True if the compiled models exist, expect the current feature columns and were built
+        from the current .pkl (if any).
+        """
+        if not os.path.exists(self.compiled_dir):
+            return False
+        try:
+            manifest = tree_engine.read_manifest(self.compiled_dir)
+            if manifest.get('feature_schema') != tree_engine.feature_schema_hash(FEATURE_NAMES):
+                print(f"[DestinyPredictor] {self.compiled_dir} was built for different features; ignoring it")
+                return False
+            if not os.path.exists(self.model_file):
+                return True
+            if manifest.get('source_hash') == tree_engine.file_digest(self.model_file):
+                return True
+        except Exception as e:
+            print(f"[DestinyPredictor] Could not read compiled models: {e}")
+            return False
+        print(f"[DestinyPredictor] {self.compiled_dir} is out of date (run tree_engine.py); using {self.model_file}")
+        return False
 
     def predict_fortune(self, feature_dict):
         """
@@ -49,69 +116,169 @@ class DestinyPredictor:
         if not self.is_ready:
             return {"Error": {'label': "Error", 'sentence': "AI Models not loaded."}}
 
-        # Convert input dictionary to DataFrame
+        # Fill the reusable one-row input buffer (no DataFrame on the interactive path)
         try:
-            input_data = [feature_dict.get(feat, 0) for feat in othermodels.ALL_FEATURES]
-            input_df = pd.DataFrame([input_data], columns=othermodels.ALL_FEATURES)
+            row = self._row_buffer()
+            for i, feat in enumerate(FEATURE_NAMES):
+                row[0, i] = feature_dict.get(feat, 0)
         except Exception as e:
             return {"Error": {'label': "Error", 'sentence': f"Data processing failed: {e}"}}
 
-        results = {}
-        fortune_results = {}
+        key = self._cache_key(row) if self.cache_size > 0 else None
+        if key is None:
+            return self._format_results(self._predict_matrix(row), 1)[0]
 
-        # 1. Predict Love
-        if 'Love' in self.models:
-            try:
-                # Use the loaded LoveModel
-                pred = self.models['Love'].predict(input_df)
-                results['Love'] = pred
-            except Exception as e:
-                print(f"Love prediction error: {e}")
-                results['Love'] = 0
-
-        # 2. Predict Specialized XGBoost (Wealth, Health, etc.)
-        special_keys = ['Wealth', 'Health', 'Later-life']
-        for label in special_keys:
-            if label in self.models:
-                try:
-                    pred = self.models[label].predict(input_df.values)[0]
-                    results[label] = int(pred)
-                except:
-                    results[label] = 0
+        self._check_model_file()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return {k: dict(v) for k, v in cached.items()}
+
+        self.cache_misses += 1
+        fortune_results = self._format_results(self._predict_matrix(row), 1)[0]
+        self.cache[key] = {k: dict(v) for k, v in fortune_results.items()}
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return fortune_results
+
+    def warm_up(self):
+        """
+        Builds the inference plan and runs every selected model once on a zero row, so the
+        first real prediction is fast. Bypasses the prediction cache and its counters.
+        """
+        if self.is_ready:
+            self._predict_matrix(np.zeros((1, len(FEATURE_NAMES))))
+
+    def cache_info(self):
+        """Prediction cache statistics."""
+        return {'hits': self.cache_hits, 'misses': self.cache_misses,
+                'size': len(self.cache), 'max_size': self.cache_size}
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def _cache_key(self, row):
+        """
+        The row quantized to a tuple of ints (the row itself is left as it is, so the models
+        always see the real input). None if the row is not finite.
+        """
+        scaled = np.rint(row[0] * self.cache_scale)
+        if not np.isfinite(scaled).all():
+            return None
+        return tuple(scaled.astype(np.int64).tolist())
 
-        # 3. Predict General Model
-        if 'GENERAL' in self.models:
+    def _file_signature(self):
+        """(size, mtime) of the .pkl and the compiled manifest, None for a missing file."""
+        signature = []
+        for path in (self.model_file, os.path.join(self.compiled_dir, tree_engine.MANIFEST_FILE)):
             try:
-                gen_data = self.models['GENERAL']
-                gen_model = gen_data['model']
-                gen_targets = gen_data['targets']
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _check_model_file(self):
+        """Reloads the models and clears the cache when a model file has changed on disk."""
+        if self._file_signature() != self._files_signature:
+            print("[DestinyPredictor] Model file changed on disk; reloading and clearing the prediction cache")
+            self.load()
+            self.cache.clear()
+
+    def predict_fortune_batch(self, features):
+        """
+        Predicts many faces at once: every model runs a single time over the whole batch.
+
+        Args:
+            features: (n, 13) array in FEATURE_NAMES column order, or a list of
+                      feature dictionaries (missing features count as 0).
+
+        Returns:
+            list: One fortune result dictionary per row (same format as predict_fortune).
+        """
+        n = len(features)
+        if not self.is_ready:
+            return [{"Error": {'label': "Error", 'sentence': "AI Models not loaded."}} for _ in range(n)]
+
+        # Convert input to a feature matrix
+        try:
+            X = self._to_matrix(features)
+        except Exception as e:
+            return [{"Error": {'label': "Error", 'sentence': f"Data processing failed: {e}"}} for _ in range(n)]
+
+        return self._format_results(self._predict_matrix(X), n)
 
-                gen_preds = gen_model.predict(input_df.values)[0]
-                for i, target in enumerate(gen_targets):
-                    results[target] = int(gen_preds[i])
-            except:
-                pass
+    def _row_buffer(self):
+        """
+        The (1, n_features) float64 input row reused by predict_fortune.
+        Not safe for concurrent predict_fortune calls (the app predicts from one worker thread).
+        """
+        if self._row is None or self._row.shape[1] != len(FEATURE_NAMES):
+            self._row = np.zeros((1, len(FEATURE_NAMES)))
+        return self._row
 
-        # 4. Convert Numbers to Text and format the output
+    def _format_results(self, results, n):
+        """Converts {label: (n,) predictions} into n fortune result dictionaries."""
+        # Convert Numbers to Text and format the output
         display_order = ['Love', 'Wealth', 'Health', 'Career', 'Later-life', 'Authority']
+        keys = [key for key in display_order if key in results]
+        keys += [key for key in results if key not in keys]
 
-        # Add prioritized items first
-        for key in display_order:
-            if key in results:
-                self._add_result(fortune_results, key, results[key])
+        if n == 1:
+            return [{key: self._make_result(key, int(results[key][0])) for key in keys}]
 
-        # Add remaining items
-        for key, val in results.items():
-            self._add_result(fortune_results, key, val)
+        fortune_results = [{} for _ in range(n)]
+        for key in keys:
+            # Look up each distinct prediction once, then hand the entries out per row
+            values, inverse = np.unique(results[key], return_inverse=True)
+            entries = [self._make_result(key, int(val)) for val in values]
+            for row, idx in zip(fortune_results, inverse.reshape(-1)):
+                row[key] = dict(entries[idx])
 
         return fortune_results
 
-    def _add_result(self, fortune_results, key, val):
-        """Helper to format and add a result to the dictionary."""
-        if key not in fortune_results:
-            text = self._get_text(key, val)
-            label = key.replace("_", " ").upper()
-            fortune_results[key] = {'label': label, 'sentence': text}
+    def _to_matrix(self, features):
+        """Feature dicts or an array -> (n, len(ALL_FEATURES)) float64 matrix."""
+        if isinstance(features, np.ndarray):
+            X = np.asarray(features, dtype=np.float64)
+        else:
+            X = np.array([[row.get(feat, 0) for feat in FEATURE_NAMES] for row in features],
+                         dtype=np.float64)
+        X = X.reshape(len(X), -1)
+        if X.shape[1] != len(FEATURE_NAMES):
+            raise ValueError(f"Expected {len(FEATURE_NAMES)} features, got {X.shape[1]}")
+        return X
+
+    def _predict_matrix(self, X):
+        """
+        Runs every loaded model once over X (see InferencePlan.predict).
+
+        Returns:
+            dict: Label -> (n,) int array of predictions (a failing model predicts 0).
+        """
+        return self._get_plan().predict(X)
+
+    def _get_plan(self):
+        """The inference plan for the selected categories (loads their models on first use)."""
+        if self.plan is None:
+            models = {}
+            for key in self.models:
+                if self.categories is not None and key not in self.categories:
+                    continue
+                try:
+                    models[key] = self.models[key]
+                except Exception as e:
+                    print(f"[DestinyPredictor] Could not load model '{key}': {e}")
+            self.plan = InferencePlan(models, FEATURE_NAMES)
+            print(f"[DestinyPredictor] Inference plan: {self.plan.describe()}")
+        return self.plan
+
+    def _make_result(self, key, val):
+        """Helper to format one result entry."""
+        text = self._get_text(key, val)
+        label = key.replace("_", " ").upper()
+        return {'label': label, 'sentence': text}
 
     def _get_text(self, label, val):
         """Helper to look up the meaning in the dictionary"""
@@ -0,0 +1,250 @@
+import numpy as np
+
+
+# Number of landmarks MediaPipe FaceMesh returns with refine_landmarks=True
+NUM_LANDMARKS = 478
+
+# Output feature order (must match othermodels.ALL_FEATURES)
+RATIO_FEATURES = [
+    'face_lw_ratio', 'forehead_ratio', 'midface_ratio', 'lowerface_ratio',
+    'eye_distance_ratio', 'nose_ratio', 'mouth_chin_ratio', 'jaw_angle',
+    'upper_lip_ratio', 'lower_lip_ratio'
+]
+EYE_FEATURES = ['eye_aspect_ratio', 'eye_curvature_ratio', 'eye_symmetry']
+FEATURE_NAMES = RATIO_FEATURES + EYE_FEATURES
+
+# Forehead vertex projection factor (see FaceAnalyzer._measure_face)
+FOREHEAD_SCALE = 1.7
+
+# --- Precomputed index arrays ---
+
+# Named points as (landmark_a, landmark_b). The point is the midpoint of both,
+# so single landmarks simply repeat the same index.
+_POINTS = {
+    'chin': (152, 152), 'chin_l': (176, 176), 'chin_r': (400, 400),
+    'nose_tip': (1, 1), 'nose_bridge': (168, 168),
+    'nose_l': (48, 48), 'nose_r': (331, 331),
+    'brow_mid': (70, 300),  # inner ends of the eyebrows, close to the glabella
+    'brow_center': (105, 334),  # center of each eyebrow, closer to the arch
+    'face_l': (234, 234), 'face_r': (454, 454),
+    'jaw_l_pt': (172, 172), 'jaw_r_pt': (288, 288),
+    'mouth_l': (61, 61), 'mouth_r': (291, 291),
+    'mouth_l_top': (37, 37), 'mouth_l_mid': (82, 82), 'mouth_l_bottom': (84, 84),
+    'mouth_r_top': (267, 267), 'mouth_r_mid': (312, 312), 'mouth_r_bottom': (314, 314),
+    'top_forehead': (10, 10),
+    'eye_l_in': (133, 133), 'eye_r_in': (362, 362),
+}
+_POINT_NAMES = list(_POINTS)
+_POINT_COL = {name: i for i, name in enumerate(_POINT_NAMES)}
+_POINT_A = np.array([_POINTS[n][0] for n in _POINT_NAMES], dtype=np.intp)
+_POINT_B = np.array([_POINTS[n][1] for n in _POINT_NAMES], dtype=np.intp)
+
+# Segments whose lengths are needed by the measurements
+_SEGMENTS = [
+    ('face_l', 'face_r'),
+    ('brow_mid', 'chin'),
+    ('top_forehead', 'brow_mid'),
+    ('nose_tip', 'brow_center'),
+    ('nose_tip', 'chin'),
+    ('eye_l_in', 'eye_r_in'),
+    ('nose_l', 'nose_r'),
+    ('nose_bridge', 'nose_tip'),
+    ('mouth_l', 'mouth_r'),
+    ('chin_l', 'chin_r'),
+    ('mouth_l_top', 'mouth_l_mid'),
+    ('mouth_r_top', 'mouth_r_mid'),
+    ('mouth_l_bottom', 'mouth_l_mid'),
+    ('mouth_r_bottom', 'mouth_r_mid'),
+]
+_SEG_COL = {seg: i for i, seg in enumerate(_SEGMENTS)}
+_SEG_A = np.array([_POINT_COL[a] for a, _ in _SEGMENTS], dtype=np.intp)
+_SEG_B = np.array([_POINT_COL[b] for _, b in _SEGMENTS], dtype=np.intp)
+
+# Angles as (p1, vertex, p3): left jaw, right jaw
+_ANGLES = [
+    ('face_l', 'jaw_l_pt', 'chin_l'),
+    ('face_r', 'jaw_r_pt', 'chin_r'),
+]
+_ANG_P1 = np.array([_POINT_COL[a] for a, _, _ in _ANGLES], dtype=np.intp)
+_ANG_V = np.array([_POINT_COL[v] for _, v, _ in _ANGLES], dtype=np.intp)
+_ANG_P3 = np.array([_POINT_COL[c] for _, _, c in _ANGLES], dtype=np.intp)
+
+# Eye landmarks as [left, right] for each role (see EyeFeatureExtractor)
+_EYE_OUTER = np.array([33, 263], dtype=np.intp)
+_EYE_INNER = np.array([133, 362], dtype=np.intp)
+_EYE_TOP = np.array([159, 386], dtype=np.intp)
+_EYE_BOTTOM = np.array([145, 374], dtype=np.intp)
+
+
+def landmarks_to_array(landmarks, out=None):
+    """
+    Reads a MediaPipe landmark sequence (e.g. face.landmark) into an (N, 2)
+    array of normalized x, y coordinates in a single pass.
+
+    Args:
+        landmarks: Repeated field / sequence of objects with .x and .y.
+        out (np.array): Optional preallocated (N, 2) float64 array to fill.
+
+    Returns:
+        np.array: The filled (N, 2) array.
+    """
+    n = len(landmarks)
+    if out is None:
+        out = np.empty((n, 2), dtype=np.float64)
+    flat = out.reshape(-1)
+    flat[:] = np.fromiter((c for lm in landmarks for c in (lm.x, lm.y)), dtype=np.float64, count=2 * n)
+    return out
+
+
+def _norm(v):
+    return np.sqrt(np.sum(v * v, axis=-1))
+
+
+def measure_faces(stack):
+    """
+    Vectorized version of FaceAnalyzer._measure_face.
+
+    Args:
+        stack (np.array): (n_faces, N, 2) normalized landmarks.
+
+    Returns:
+        tuple: (measurements, custom_points) where every measurement is an
+               (n_faces,) array and every custom point an (n_faces, 2) array.
+    """
+    stack = np.asarray(stack, dtype=np.float64)
+    pts = (stack[:, _POINT_A] + stack[:, _POINT_B]) / 2  # (n, P, 2)
+
+    seg = _norm(pts[:, _SEG_A] - pts[:, _SEG_B])  # (n, S)
+
+    def d(a, b): return seg[:, _SEG_COL[(a, b)]]
+
+    # Angle at each vertex between vertex->p1 and vertex->p3
+    v1 = pts[:, _ANG_P1] - pts[:, _ANG_V]
+    v2 = pts[:, _ANG_P3] - pts[:, _ANG_V]
+    dot = np.sum(v1 * v2, axis=-1)
+    norm = _norm(v1) * _norm(v2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_theta = np.clip(dot / norm, -1.0, 1.0)
+    angles = np.where(norm == 0, 0.0, np.degrees(np.arccos(cos_theta)))
+
+    top = pts[:, _POINT_COL['top_forehead']]
+    brow_mid = pts[:, _POINT_COL['brow_mid']]
+    forehead_h = FOREHEAD_SCALE * d('top_forehead', 'brow_mid')
+    vertex_point = top + (FOREHEAD_SCALE - 1) * (top - brow_mid)
+
+    measurements = {
+        'face_width': d('face_l', 'face_r'),
+        'face_length': d('brow_mid', 'chin') + forehead_h,
+        'forehead_height': forehead_h,
+        'midface_height': d('nose_tip', 'brow_center'),
+        'lower_face_height': d('nose_tip', 'chin'),
+        'eye_distance': d('eye_l_in', 'eye_r_in'),
+        'nose_width': d('nose_l', 'nose_r'),
+        'nose_length': d('nose_bridge', 'nose_tip'),
+        'mouth_width': d('mouth_l', 'mouth_r'),
+        'chin_width': d('chin_l', 'chin_r'),
+        'upper_lip_h': (d('mouth_l_top', 'mouth_l_mid') + d('mouth_r_top', 'mouth_r_mid')) / 2,
+        'lower_lip_h': (d('mouth_l_bottom', 'mouth_l_mid') + d('mouth_r_bottom', 'mouth_r_mid')) / 2,
+        'jaw_angle_left': angles[:, 0],
+        'jaw_angle_right': angles[:, 1],
+    }
+    custom_points = {
+        "vertex": vertex_point,
+        "brow_mid": brow_mid
+    }
+    return measurements, custom_points
+
+
+def _safe_div(num, den):
+    """num / den where den > 0, otherwise 0 (matches the scalar safety checks)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / den, 0.0)
+
+
+def calculate_ratios(m):
+    """
+    Vectorized version of FaceAnalyzer._calculate_ratios.
+
+    Args:
+        m (dict): Measurements as returned by measure_faces().
+
+    Returns:
+        dict: Ratio name -> (n_faces,) array. Faces with a zero face length
+              get NaN for every ratio.
+    """
+    m = {k: np.asarray(v, dtype=np.float64) for k, v in m.items()}
+    face_length = m['face_length']
+    valid = face_length != 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = {
+            "face_lw_ratio": m['face_width'] / face_length,
+            "forehead_ratio": m['forehead_height'] / face_length,
+            "midface_ratio": m['midface_height'] / face_length,
+            "lowerface_ratio": m['lower_face_height'] / face_length,
+            "eye_distance_ratio": m['eye_distance'] / m['face_width'],
+            "nose_ratio": _safe_div(m['nose_width'], m['nose_length']),
+            "mouth_chin_ratio": _safe_div(m['mouth_width'], m['chin_width']),
+            "jaw_angle": (m['jaw_angle_left'] + m['jaw_angle_right']) / 2,
+            "upper_lip_ratio": _safe_div(m['upper_lip_h'], m['mouth_width']),
+            "lower_lip_ratio": _safe_div(m['lower_lip_h'], m['mouth_width'])
+        }
+    return {k: np.where(valid, v, np.nan) for k, v in ratios.items()}
+
+
+def eye_metrics(stack):
+    """
+    Vectorized version of EyeFeatureExtractor.extract_metrics.
+
+    Args:
+        stack (np.array): (n_faces, N, 2) normalized landmarks.
+
+    Returns:
+        dict: Eye feature name -> (n_faces,) array.
+    """
+    stack = np.asarray(stack, dtype=np.float64)
+    outer = stack[:, _EYE_OUTER]  # (n, 2 eyes, 2)
+    inner = stack[:, _EYE_INNER]
+    top = stack[:, _EYE_TOP]
+    bottom = stack[:, _EYE_BOTTOM]
+
+    width = _norm(outer - inner)  # (n, 2)
+    height = _norm(top - bottom)
+    curv = _norm(top - (outer + inner) / 2)
+    interocular = _norm(outer[:, 0] - outer[:, 1])
+
+    # Prevent division by zero
+    width = np.where(width == 0, 0.001, width)
+    interocular = np.where(interocular == 0, 0.001, interocular)
+
+    eye_aspect_ratio = np.mean(height / width, axis=1)
+    eye_curvature_ratio = np.mean(curv / interocular[:, None], axis=1)
+
+    def sym(v):
+        avg = (v[:, 0] + v[:, 1]) / 2
+        return _safe_div(np.abs(v[:, 0] - v[:, 1]), avg)
+
+    symmetry_score = 0.3 * sym(width) + 0.3 * sym(height) + 0.4 * sym(curv)
+
+    return {
+        "eye_aspect_ratio": eye_aspect_ratio,
+        "eye_curvature_ratio": eye_curvature_ratio,
+        "eye_symmetry": 1 - symmetry_score
+    }
+
+
+def featurize(stack):
+    """
+    Computes the full feature matrix for a stack of faces.
+
+    Args:
+        stack (np.array): (n_faces, N, 2) normalized landmarks.
+
+    Returns:
+        np.array: (n_faces, len(FEATURE_NAMES)) float64 matrix in FEATURE_NAMES order.
+    """
+    stack = np.asarray(stack, dtype=np.float64)
+    measurements, _ = measure_faces(stack)
+    columns = calculate_ratios(measurements)
+    columns.update(eye_metrics(stack))
+    return np.column_stack([columns[name] for name in FEATURE_NAMES])
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import sqlite3
+import numpy as np
+
+
+class FeatureCache:
+    """
+    Persistent on-disk (SQLite) cache of extracted face features.
+
+    Results are keyed by the image's content hash and the extractor version, so
+    renamed or moved files are still hits, while a changed extractor misses.
+    A second table remembers (size, mtime) per path so unchanged files are not re-hashed.
+    """
+
+    def __init__(self, db_path, extractor_version):
+        """
+        Args:
+            db_path (str): SQLite file to create or reuse.
+            extractor_version (str): Identifies the feature extraction code/config.
+        """
+        self.db_path = db_path
+        self.extractor_version = extractor_version
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            " content_hash TEXT NOT NULL, extractor_version TEXT NOT NULL,"
+            " status TEXT NOT NULL, features BLOB,"
+            " PRIMARY KEY (content_hash, extractor_version))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, content_hash TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def file_hash(self, path):
+        """Returns the content hash of a file, reusing the stored one if size and mtime are unchanged."""
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, content_hash)
+        )
+        return content_hash
+
+    def get(self, content_hash):
+        """Returns the cached (status, features_row) for a content hash, or None on a miss."""
+        row = self.conn.execute(
+            "SELECT status, features FROM features WHERE content_hash = ? AND extractor_version = ?",
+            (content_hash, self.extractor_version)
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, blob = row
+        features = np.frombuffer(blob, dtype=np.float64) if blob is not None else None
+        return status, features
+
+    def put(self, content_hash, status, features):
+        """Stores the result of one image (features may be None, e.g. for 'no_face')."""
+        blob = np.asarray(features, dtype=np.float64).tobytes() if features is not None else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO features (content_hash, extractor_version, status, features) VALUES (?, ?, ?, ?)",
+            (content_hash, self.extractor_version, status, blob)
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,261 @@
+"""
+Typed binary copy of a feature CSV, read without parsing.
+
+A store is a directory next to its CSV (merged_celebrity_data.csv -> merged_celebrity_data.store/):
+  - features.npy   (n_rows, n_features) float32, NaN where a feature is missing
+  - labels.npy     (n_rows, n_labels) int8, MISSING_LABEL where a label is missing
+  - text_<i>.npy   one fixed-width unicode array per text column ('Celebrity', 'Filename')
+  - manifest.json  column names and order, row count, and the size / mtime of the CSV it matches
+
+Arrays are memory-mapped on load, so FeatureStore.X() hands training a DataFrame over the
+file pages without parsing or copying. batch_process_faces.py and merge.py write the store
+together with their CSV; for an existing CSV run the converter once:
+
+    python feature_store.py merged_celebrity_data.csv celebrity_face_features.csv
+"""
+import argparse
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import face_geometry
+
+FORMAT_VERSION = 1
+STORE_SUFFIX = '.store'
+MANIFEST_FILE = 'manifest.json'
+MISSING_LABEL = -1
+CHUNK_ROWS = 100_000  # CSV rows parsed at a time by convert_csv
+
+
+def store_path(csv_path):
+    """The store directory belonging to a CSV file."""
+    return os.path.splitext(csv_path)[0] + STORE_SUFFIX
+
+
+def source_signature(csv_path):
+    """(size, mtime_ns) of a CSV, recorded in the store so a changed CSV is noticed."""
+    st = os.stat(csv_path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def is_current(path, csv_path):
+    """True if the store exists and was written for the CSV as it is now."""
+    try:
+        manifest = read_manifest(path)
+        return manifest['format'] == FORMAT_VERSION and manifest['source'] == source_signature(csv_path)
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def write_store(frame, path, source=None):
+    """
+    Writes a DataFrame as a store. Columns named in face_geometry.FEATURE_NAMES become float32
+    features, other numeric columns int8 labels and the rest text.
+
+    Args:
+        frame (pd.DataFrame): e.g. the merged features + labels table.
+        path (str): Store directory.
+        source (list): source_signature() of the CSV holding the same rows.
+    """
+    features = [c for c in frame.columns if c in face_geometry.FEATURE_NAMES]
+    labels = [c for c in frame.columns if c not in features and pd.api.types.is_numeric_dtype(frame[c])]
+    text = [c for c in frame.columns if c not in features and c not in labels]
+
+    arrays = {'features': np.ascontiguousarray(frame[features].to_numpy(np.float32, na_value=np.nan)),
+              'labels': _encode_labels(frame[labels])}
+    for i, column in enumerate(text):
+        arrays[f'text_{i}'] = frame[column].to_numpy(dtype=str, na_value='')
+
+    _save(path, arrays, {'format': FORMAT_VERSION, 'rows': len(frame), 'columns': list(frame.columns),
+                         'features': features, 'labels': labels, 'text': text, 'source': source})
+
+
+def append_rows(path, frame, source=None):
+    """Adds rows (same columns as the store) at the end; creates the store if there is none."""
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        write_store(frame, path, source)
+        return
+
+    store = FeatureStore(path)
+    if list(frame.columns) != store.manifest['columns']:
+        raise ValueError(f"Columns {list(frame.columns)} do not match the store {store.manifest['columns']}")
+
+    new_features = frame[store.feature_names].to_numpy(np.float32, na_value=np.nan)
+    arrays = {'features': np.concatenate([store.features, new_features]),
+              'labels': np.concatenate([store.labels, _encode_labels(frame[store.label_names])])}
+    for i, column in enumerate(store.manifest['text']):
+        arrays[f'text_{i}'] = np.concatenate([store.text[column], frame[column].to_numpy(dtype=str, na_value='')])
+
+    manifest = dict(store.manifest, rows=store.rows + len(frame), source=source)
+    del store  # Release the memory maps before the files are replaced
+    _save(path, arrays, manifest)
+
+
+def update_labels(path, positions, values, source=None):
+    """
+    Overwrites the labels of some rows; only labels.npy and the manifest are rewritten.
+
+    Args:
+        positions (list): Row numbers.
+        values: (len(positions), n_labels) label values, None / NaN for missing.
+    """
+    manifest = read_manifest(path)
+    labels = np.load(os.path.join(path, 'labels.npy'))
+    labels[np.asarray(positions, dtype=np.int64)] = _encode_labels(
+        pd.DataFrame(values, columns=manifest['labels'], dtype='Float64'))
+    _save(path, {'labels': labels}, dict(manifest, source=source))
+
+
+def update_rows(path, positions, frame, source=None):
+    """Overwrites whole rows (same columns as the store), e.g. re-extracted feature values."""
+    store = FeatureStore(path, mmap=False)
+    if list(frame.columns) != store.manifest['columns']:
+        raise ValueError(f"Columns {list(frame.columns)} do not match the store {store.manifest['columns']}")
+
+    positions = np.asarray(positions, dtype=np.int64)
+    store.features[positions] = frame[store.feature_names].to_numpy(np.float32, na_value=np.nan)
+    store.labels[positions] = _encode_labels(frame[store.label_names])
+    arrays = {'features': store.features, 'labels': store.labels}
+    for i, column in enumerate(store.manifest['text']):
+        values = frame[column].to_numpy(dtype=str, na_value='')
+        text = store.text[column].astype(np.result_type(store.text[column], values))  # Widen if needed
+        text[positions] = values
+        arrays[f'text_{i}'] = text
+    _save(path, arrays, dict(store.manifest, source=source))
+
+
+def convert_csv(csv_path, path=None, chunk_rows=CHUNK_ROWS):
+    """
+    Converts an existing CSV into a store, same result as write_store(pd.read_csv(csv_path)).
+    The CSV is read in chunks of chunk_rows, so memory stays flat however long it is: a first
+    pass over the non-feature columns finds the row count, the column kinds and the text widths,
+    the second fills the memory-mapped arrays.
+
+    Returns:
+        str: The store path.
+    """
+    path = path or store_path(csv_path)
+    source = source_signature(csv_path)
+    columns = list(pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig').columns)
+    features = [c for c in columns if c in face_geometry.FEATURE_NAMES]
+    others = [c for c in columns if c not in features]
+
+    # 1. Layout: rows, which columns hold non-numeric values, longest text per column
+    rows, numeric, widths = 0, {c: True for c in others}, {c: 1 for c in others}
+    for chunk in pd.read_csv(csv_path, usecols=others, dtype=str, chunksize=chunk_rows, encoding='utf-8-sig'):
+        rows += len(chunk)
+        for column in others:
+            values = chunk[column].dropna()
+            numeric[column] &= bool(pd.to_numeric(values, errors='coerce').notna().all())
+            widths[column] = max(widths[column], int(values.str.len().max()) if len(values) else 0)
+    labels = [c for c in others if numeric[c]]
+    text = [c for c in others if not numeric[c]]
+
+    # 2. Values, chunk by chunk into the final arrays
+    arrays = {'features': _create(path, 'features', np.float32, (rows, len(features))),
+              'labels': _create(path, 'labels', np.int8, (rows, len(labels)))}
+    for i, column in enumerate(text):
+        arrays[f'text_{i}'] = _create(path, f'text_{i}', f'U{widths[column]}', (rows,))
+    start = 0
+    for chunk in pd.read_csv(csv_path, dtype={c: str for c in text}, chunksize=chunk_rows, encoding='utf-8-sig'):
+        end = start + len(chunk)
+        arrays['features'][start:end] = chunk[features].to_numpy(np.float32, na_value=np.nan)
+        arrays['labels'][start:end] = _encode_labels(chunk[labels])
+        for i, column in enumerate(text):
+            arrays[f'text_{i}'][start:end] = chunk[column].fillna('').to_numpy(dtype=str)
+        start = end
+
+    for array in arrays.values():
+        array.flush()
+    del arrays  # Close the memory maps before the files are renamed
+    _commit(path, ['features', 'labels'] + [f'text_{i}' for i in range(len(text))],
+            {'format': FORMAT_VERSION, 'rows': rows, 'columns': columns,
+             'features': features, 'labels': labels, 'text': text, 'source': source})
+    return path
+
+
+def remove_store(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+class FeatureStore:
+    """A store opened for reading; arrays are memory-mapped (read-only) unless mmap=False."""
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.manifest = read_manifest(path)
+        if self.manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature store format in {path}: {self.manifest.get('format')}")
+
+        mode = 'r' if mmap else None
+        self.rows = self.manifest['rows']
+        self.feature_names = self.manifest['features']
+        self.label_names = self.manifest['labels']
+        self.features = np.load(os.path.join(path, 'features.npy'), mmap_mode=mode)
+        self.labels = np.load(os.path.join(path, 'labels.npy'), mmap_mode=mode)
+        self.text = {column: np.load(os.path.join(path, f'text_{i}.npy'), mmap_mode=mode)
+                     for i, column in enumerate(self.manifest['text'])}
+
+    def X(self):
+        """Features as a float32 DataFrame backed by the store's memory (no copy)."""
+        return pd.DataFrame(self.features, columns=self.feature_names, copy=False)
+
+    def y(self, missing=0):
+        """Labels as an int8 DataFrame; missing labels become `missing` (copied only if any)."""
+        labels = self.labels
+        if (labels == MISSING_LABEL).any():
+            labels = np.where(labels == MISSING_LABEL, np.int8(missing), labels)
+        return pd.DataFrame(labels, columns=self.label_names, copy=False)
+
+
+def _encode_labels(frame):
+    """Label columns -> (n, k) int8 with MISSING_LABEL for missing values."""
+    values = frame.to_numpy(np.float64, na_value=np.nan).reshape(len(frame), frame.shape[1])
+    known = values[~np.isnan(values)]
+    if known.size and (known.min() < MISSING_LABEL + 1 or known.max() > np.iinfo(np.int8).max
+                       or (known != np.round(known)).any()):
+        raise ValueError("Labels must be integers between 0 and 127")
+    return np.where(np.isnan(values), MISSING_LABEL, values).astype(np.int8)
+
+
+def _save(path, arrays, manifest):
+    """Writes every array via a temporary file, then the manifest (so readers see old or new)."""
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy.tmp.npy'), array)
+    _commit(path, list(arrays), manifest)
+
+
+def _create(path, name, dtype, shape):
+    """A new array as a writable memory map on the temporary file that _commit renames."""
+    os.makedirs(path, exist_ok=True)
+    return np.lib.format.open_memmap(os.path.join(path, f'{name}.npy.tmp.npy'), mode='w+', dtype=dtype, shape=shape)
+
+
+def _commit(path, names, manifest):
+    """Moves the temporary array files into place, then writes the manifest."""
+    for name in names:
+        file_path = os.path.join(path, f'{name}.npy')
+        os.replace(file_path + '.tmp.npy', file_path)
+
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts feature CSVs into binary feature stores")
+    parser.add_argument('csv', nargs='*', default=['merged_celebrity_data.csv'], help='CSV files to convert')
+    args = parser.parse_args()
+
+    for csv_path in args.csv:
+        path = convert_csv(csv_path)
+        print(f"{csv_path} -> {path} ({read_manifest(path)['rows']} rows)")
@@ -0,0 +1,78 @@
+import os
+import csv
+import face_geometry
+import feature_store
+
+
+class FeatureCsvWriter:
+    """
+    Streams feature records to a CSV file in chunks, so memory stays flat no matter
+    how many images are processed and the rows written so far survive a crash.
+
+    The header is fixed up front: 'Celebrity', 'Filename' + face_geometry.FEATURE_NAMES.
+    The file is only created once the first record arrives.
+    With store_path the finished CSV is also converted into a binary feature store
+    (feature_store.py) on close, chunk by chunk, so memory stays flat there too.
+    """
+
+    def __init__(self, path, flush_rows=500, store_path=None):
+        """
+        Args:
+            path (str): Output CSV path.
+            flush_rows (int): Number of buffered records that triggers a flush to disk.
+            store_path (str): Optional feature store directory written next to the CSV.
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        self.store_path = store_path
+        self.columns = ['Celebrity', 'Filename'] + face_geometry.FEATURE_NAMES
+        self.rows_written = 0
+        self._buffer = []
+        self._file = None
+        self._writer = None
+
+    def write(self, celebrities, filenames, features):
+        """
+        Buffers a chunk of records.
+
+        Args:
+            celebrities (list): Celebrity name of every record.
+            filenames (list): Image filename of every record.
+            features (np.array): (n_records, 13) matrix in FEATURE_NAMES order.
+        """
+        for celebrity, filename, row in zip(celebrities, filenames, features.tolist()):
+            self._buffer.append([celebrity, filename] + row)
+
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered records and forces them to disk."""
+        if not self._buffer:
+            return
+
+        if self._file is None:
+            self._file = open(self.path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file, lineterminator='\n')
+            self._writer.writerow(self.columns)
+
+        self._writer.writerows(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self.store_path:
+                feature_store.convert_csv(self.path, self.store_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
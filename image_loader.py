@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+_DONE = object()
+
+# JPEG decode-time downscaling factors supported by OpenCV
+_REDUCED_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+
+def jpeg_size(path):
+    """
+    Reads (width, height) from a JPEG header without decoding the image.
+
+    Returns:
+        tuple: (width, height), or None if the file is not a readable JPEG.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            while True:
+                byte = f.read(1)
+                while byte and byte != b'\xff':
+                    byte = f.read(1)
+                while byte == b'\xff':
+                    byte = f.read(1)
+                if not byte:
+                    return None
+
+                marker = byte[0]
+                if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                    continue  # Markers without a length field
+
+                length = int.from_bytes(f.read(2), 'big')
+                # Start-of-frame markers (excluding DHT, JPG and DAC) hold the dimensions
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    header = f.read(5)
+                    return int.from_bytes(header[3:5], 'big'), int.from_bytes(header[1:3], 'big')
+                f.seek(length - 2, os.SEEK_CUR)
+    except OSError:
+        return None
+
+
+def fit_max_side(img, max_side):
+    """Downsizes an image so that its longest side is at most max_side (never upscales)."""
+    if img is None or not max_side:
+        return img
+
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1:
+        return img
+    return cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def read_image(path, max_side=None):
+    """
+    cv2.imread with an optional resolution bound.
+
+    With max_side set, large JPEGs are decoded at 1/2, 1/4 or 1/8 scale (OpenCV's
+    reduced decode, which skips most of the IDCT work) and any other image is
+    downsized after decoding, so the longest side ends up at most max_side.
+    All features are ratios of normalized coordinates, so they barely change.
+    """
+    if not max_side:
+        return cv2.imread(path)
+
+    flag = cv2.IMREAD_COLOR
+    size = jpeg_size(path) if path.lower().endswith(('.jpg', '.jpeg')) else None
+    if size:
+        for factor, reduced_flag in _REDUCED_FLAGS.items():
+            if max(size) / factor >= max_side:
+                flag = reduced_flag
+                break
+
+    return fit_max_side(cv2.imread(path, flag), max_side)
+
+
+def background_iter(iterable, depth=32):
+    """
+    Runs an iterator (e.g. a directory walk) in a daemon thread, staying up to
+    `depth` items ahead of the consumer. Items are yielded in the original order.
+    """
+    items = queue.Queue(maxsize=depth)
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        items.put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        item = items.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def prefetch_images(paths, threads=4, depth=32, max_side=None, pool=None):
+    """
+    Decodes images on a thread pool ahead of the consumer (cv2.imread releases the GIL),
+    so disk/network reads overlap with landmark inference.
+
+    Args:
+        paths (iterable): Image paths.
+        threads (int): Number of decode threads (ignored when a pool is given).
+        depth (int): Maximum number of decoded/in-flight images held ahead (backpressure).
+        max_side (int): Optional resolution bound, see read_image.
+        pool (ThreadPoolExecutor): Optional pool to decode on, kept open across calls by its owner.
+                                   None = a pool is created for this call and shut down at the end.
+
+    Yields:
+        np.array: Decoded BGR image of every path in order, or None if it cannot be read.
+    """
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=threads) as own_pool:
+            yield from prefetch_images(paths, threads, depth, max_side, own_pool)
+        return
+
+    window = deque()
+    for path in paths:
+        window.append(pool.submit(read_image, path, max_side))
+        if len(window) >= depth:
+            yield window.popleft().result()
+
+    while window:
+        yield window.popleft().result()
@@ -0,0 +1,344 @@
+"""
+Inference plan for DestinyPredictor, built once when the brain is loaded.
+
+Instead of running every model on its own (Love, then each specialized model, then the
+GENERAL MultiOutputClassifier, each with its own StandardScaler), the plan:
+  - evaluates all compiled forests (tree_engine.py) in ONE fused traversal over the input,
+    since their scalers are already folded into the thresholds,
+  - groups pickled pipelines by input columns + scaler parameters and scales each group once,
+  - calls any other model (e.g. test doubles, unknown model types) as before.
+Extra fortune categories therefore add trees to the fused pass instead of another model call.
+"""
+import time
+import numpy as np
+import tree_engine
+
+# Rows per fused traversal: small blocks keep the (n_trees, rows) work arrays in cache
+CHUNK_ROWS = 32
+
+
+class FusedForest:
+    """Several CompiledForests over the same input columns, evaluated in a single traversal."""
+
+    def __init__(self, forests):
+        """
+        Args:
+            forests (list): CompiledForest objects whose node features index the same matrix.
+        """
+        self.forests = list(forests)
+
+        # 1. Concatenate the node tables (child / root ids shifted by each forest's offset)
+        offsets = np.cumsum([0] + [len(f.feature) for f in self.forests])[:-1]
+        cat = lambda name: np.concatenate([getattr(f, name) for f in self.forests])
+        shifted = lambda name: np.concatenate([getattr(f, name) + off for f, off in zip(self.forests, offsets)])
+        self.nodes = tree_engine.CompiledForest(
+            cat('feature'), cat('threshold'), shifted('left'), shifted('right'),
+            cat('default_left'), cat('value'), shifted('roots'), classes=[0, 1]
+        )
+
+        # 2. Deepest trees first: level k of the traversal only advances the trees deeper than k
+        nodes = self.nodes
+        tree_depth = np.array([tree_engine._max_depth(nodes.left, nodes.right, root[np.newaxis])
+                               for root in nodes.roots])
+        order = np.argsort(-tree_depth, kind='stable')
+        self.roots = nodes.roots[order]
+        self.active = [int(np.sum(tree_depth > level)) for level in range(nodes.depth)]
+        column = np.empty_like(order)
+        column[order] = np.arange(len(order))  # Tree index -> row of leaves()
+
+        # 3. Reduction layout: each forest sums [base margin, its leaf values...] in tree order
+        #    and in its own precision, like CompiledForest.decision_function. Forests with the
+        #    same precision and tree count are summed together.
+        n_trees = len(self.roots)
+        tree_start = np.cumsum([0] + [len(f.roots) for f in self.forests])
+
+        self.reductions = []  # (dtype, forest indices, (n_members, 1 + trees) row index into the table)
+        for dtype, size in sorted({(f.accumulate, len(f.roots)) for f in self.forests}):
+            members = [i for i, f in enumerate(self.forests) if (f.accumulate, len(f.roots)) == (dtype, size)]
+            gather = np.array([np.concatenate([[n_trees + i], column[tree_start[i]:tree_start[i + 1]]])
+                               for i in members], dtype=np.intp)
+            self.reductions.append((np.dtype(dtype), np.array(members), gather))
+        self.base_margins = np.array([f.base_margin for f in self.forests])
+
+    def leaves(self, X):
+        """
+        Returns the (n_trees, n_rows) leaf node reached in every tree, deepest trees first.
+        Trees run along the first axis so each level works on one contiguous block.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        n = X.shape[0]
+        nodes = self.nodes
+        node = np.repeat(self.roots[:, np.newaxis], n, axis=1)
+        flat = np.ascontiguousarray(X.T).reshape(-1)  # Column-major: feature j of row r at j * n + r
+        rows = np.arange(n)
+
+        for n_active in self.active:
+            current = node[:n_active]
+            x = flat[nodes.feature[current] * n + rows]
+            go_left = np.where(np.isnan(x), nodes.default_left[current], x < nodes.threshold[current])
+            node[:n_active] = np.where(go_left, nodes.left[current], nodes.right[current])
+        return node
+
+    def decision_functions(self, X):
+        """Returns (n_rows, n_forests) margins, identical to each forest's decision_function."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        if len(X) > CHUNK_ROWS:
+            return np.vstack([self._margins(X[i:i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)])
+        return self._margins(X)
+
+    def _margins(self, X):
+        leaves = self.leaves(X)
+        n_trees, n = leaves.shape
+
+        # Leaf values, then one base margin row per forest
+        table = np.empty((n_trees + len(self.forests), n))
+        table[:n_trees] = self.nodes.value[leaves]
+        table[n_trees:] = self.base_margins[:, np.newaxis]
+
+        margins = np.empty((n, len(self.forests)))
+        for dtype, members, gather in self.reductions:
+            margins[:, members] = np.cumsum(table[gather].astype(dtype), axis=1, dtype=dtype)[:, -1].T
+        return margins
+
+    def predict(self, X):
+        """Returns a list with the (n_rows,) class labels of every forest."""
+        positive = (self.decision_functions(X) > 0).astype(np.intp)
+        return [forest.classes[positive[:, i]] for i, forest in enumerate(self.forests)]
+
+
+class ScalingGroup:
+    """Pickled Pipeline(scaler, classifier) models that share input columns and scaler parameters."""
+
+    def __init__(self, scaler, columns, dtype):
+        self.scaler = scaler
+        self.columns = columns  # None = every column of the input matrix
+        self.dtype = dtype
+        self.members = []  # (name, output labels, classifier)
+
+    def transform(self, X):
+        X_input = X if self.columns is None else X[:, self.columns]
+        return self.scaler.transform(X_input.astype(self.dtype, copy=False))
+
+
+class InferencePlan:
+    """
+    Runs every model of a loaded brain over a feature matrix with as little repeated work
+    as possible. Result keys and values match running each model on its own.
+    """
+
+    def __init__(self, models, feature_names):
+        """
+        Args:
+            models (dict): DestinyPredictor.models (pickled or compiled brain, without meaning_map).
+            feature_names (list): Column order of the matrices passed to predict().
+        """
+        self.feature_names = list(feature_names)
+        self.outputs = []  # Result labels in prediction order
+        self.fused_members = []  # (name, output label) per fused forest
+        self.fused = None
+        self.groups = []
+        self.others = []  # (name, output labels, predict(X) -> (n, len(labels)) array)
+        self.timings = {}  # Step -> seconds spent in the last predict() call
+
+        # Love first, GENERAL last, every specialized category in between
+        order = ['Love'] + [key for key in models if key not in ('Love', 'GENERAL')] + ['GENERAL']
+        forests = []
+        for name in order:
+            if name not in models:
+                continue
+            if name == 'GENERAL':
+                model, labels = models[name]['model'], list(models[name]['targets'])
+            else:
+                model, labels = models[name], [name]
+            self.outputs.extend(labels)
+            self._add(name, model, labels, forests)
+
+        if forests:
+            self.fused = FusedForest(forests)
+
+    def _add(self, name, model, labels, forests):
+        """Internal/Private function only works inside class. Assigns one model to a plan step."""
+        # 1. Compiled models join the fused traversal
+        if isinstance(model, tree_engine.CompiledForest):
+            forests.append(model)
+            self.fused_members.append((name, labels[0]))
+            return
+        if isinstance(model, tree_engine.CompiledMultiOutput):
+            forests.extend(model.forests)
+            self.fused_members.extend((name, label) for label in labels)
+            return
+        if isinstance(model, tree_engine.CompiledLoveModel):
+            columns = self._columns(model.features)
+            if columns is not None:
+                forests.append(model.forest.with_columns(columns))
+                self.fused_members.append((name, labels[0]))
+                return
+
+        # 2. Pickled pipelines share one scaling per (columns, dtype, scaler parameters)
+        if hasattr(model, 'features') and hasattr(model, 'model'):
+            # LoveModel: its pipeline sees float32 values of its own feature subset
+            columns = self._columns(model.features)
+            if columns is not None and self._add_pipeline(name, model.model, labels, columns, np.float32):
+                return
+        elif self._add_pipeline(name, model, labels, None, np.float64):
+            return
+
+        # 3. Anything else predicts on its own
+        self.others.append((name, labels, self._fallback_predict(name, model, labels)))
+
+    def _columns(self, features):
+        """Index array of features within feature_names, or None if one is missing."""
+        try:
+            return np.array([self.feature_names.index(f) for f in features], dtype=np.intp)
+        except ValueError:
+            return None
+
+    def _add_pipeline(self, name, pipeline, labels, columns, dtype):
+        """Adds a Pipeline(StandardScaler, classifier) to its scaling group. False if not one."""
+        steps = getattr(pipeline, 'steps', None)
+        if not steps or len(steps) != 2:
+            return False
+        scaler, classifier = steps[0][1], steps[1][1]
+        if getattr(scaler, 'mean_', None) is None or getattr(scaler, 'scale_', None) is None:
+            return False
+
+        for group in self.groups:
+            same_columns = (group.columns is None and columns is None) or (
+                group.columns is not None and columns is not None and np.array_equal(group.columns, columns))
+            if (same_columns and group.dtype == dtype and type(group.scaler) is type(scaler)
+                    and np.array_equal(group.scaler.mean_, scaler.mean_)
+                    and np.array_equal(group.scaler.scale_, scaler.scale_)):
+                break
+        else:
+            group = ScalingGroup(scaler, columns, dtype)
+            self.groups.append(group)
+        group.members.append((name, labels, classifier))
+        return True
+
+    def _fallback_predict(self, name, model, labels):
+        """predict(X) -> (n, len(labels)) for a model the plan cannot optimize."""
+        if name == 'Love':
+            if hasattr(model, 'predict_array'):
+                return lambda X: model.predict_array(X, self.feature_names)
+
+            # Models without an array interface get one single-row DataFrame per face
+            def predict_rows(X):
+                import pandas as pd
+                return np.array([model.predict(pd.DataFrame([row], columns=self.feature_names)) for row in X])
+            return predict_rows
+        return model.predict
+
+    def predict(self, X):
+        """
+        Runs every model once over X.
+
+        Args:
+            X (np.array): (n, len(feature_names)) float64 feature matrix.
+
+        Returns:
+            dict: Label -> (n,) int array of predictions (a failing model predicts 0).
+        """
+        n = len(X)
+        results = {}
+        self.timings = {}
+
+        # 1. Every compiled forest in one traversal
+        if self.fused is not None:
+            start = time.perf_counter()
+            try:
+                for (_, label), pred in zip(self.fused_members, self.fused.predict(X)):
+                    results[label] = pred.astype(int)
+            except Exception as e:
+                print(f"[InferencePlan] Fused prediction error: {e}")
+            self.timings['fused forests'] = time.perf_counter() - start
+
+        # 2. Pickled pipelines: scale once per group, then run each classifier
+        for i, group in enumerate(self.groups):
+            start = time.perf_counter()
+            try:
+                X_scaled = group.transform(X)
+            except Exception as e:
+                print(f"[InferencePlan] Scaling error: {e}")
+                X_scaled = None
+            self.timings[f"scaling group {i + 1}"] = time.perf_counter() - start
+
+            for name, labels, classifier in group.members:
+                if X_scaled is not None:
+                    self._run_step(name, labels, lambda: classifier.predict(X_scaled), n, results)
+
+        # 3. Models outside the plan
+        for name, labels, predict in self.others:
+            self._run_step(name, labels, lambda: predict(X), n, results)
+
+        # Keep the result order stable (and fill in anything that failed)
+        return {label: results.get(label, np.zeros(n, dtype=int)) for label in self.outputs}
+
+    def _run_step(self, name, labels, predict, n, results):
+        """Internal/Private function only works inside class. Times one model call and stores its labels."""
+        start = time.perf_counter()
+        try:
+            preds = np.asarray(predict()).reshape(n, len(labels)).astype(int)
+            for i, label in enumerate(labels):
+                results[label] = preds[:, i]
+        except Exception as e:
+            print(f"[InferencePlan] {name} prediction error: {e}")
+        self.timings[name] = time.perf_counter() - start
+
+    def describe(self):
+        """One-line summary of how the plan runs the models."""
+        parts = []
+        if self.fused is not None:
+            parts.append(f"{len(self.fused.forests)} compiled models in 1 fused pass "
+                         f"({len(self.fused.roots)} trees)")
+        for group in self.groups:
+            parts.append(f"{len(group.members)} pipeline(s) sharing 1 scaling")
+        if self.others:
+            parts.append(f"{len(self.others)} standalone model(s)")
+        return ", ".join(parts) or "no models"
+
+    def profile(self, X, repeat=20):
+        """
+        Times the whole plan and every model on its own (median over repeat runs).
+
+        Args:
+            X (np.array): (n, len(feature_names)) feature matrix, e.g. a single face.
+            repeat (int): Runs per measurement.
+
+        Returns:
+            dict: Step name -> median milliseconds. 'plan total' is one predict() call;
+                  the per-model entries show what each model would cost if run separately.
+        """
+        def median_ms(call):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                call()
+                times.append(time.perf_counter() - start)
+            return float(np.median(times)) * 1000
+
+        report = {'plan total': median_ms(lambda: self.predict(X))}
+        if self.fused is not None:
+            report['fused forests'] = median_ms(lambda: self.fused.predict(X))
+            for (name, label), forest in zip(self.fused_members, self.fused.forests):
+                step = name if name == label else f"{name}/{label}"
+                report[step] = median_ms(lambda: forest.predict(X))
+        for i, group in enumerate(self.groups):
+            report[f"scaling group {i + 1}"] = median_ms(lambda: group.transform(X))
+            X_scaled = group.transform(X)
+            for name, _, classifier in group.members:
+                report[name] = median_ms(lambda: classifier.predict(X_scaled))
+        for name, _, predict in self.others:
+            report[name] = median_ms(lambda: predict(X))
+        return report
+
+    def print_profile(self, X, repeat=20):
+        """Prints profile() as a table."""
+        report = self.profile(X, repeat)
+        print(f"--- Inference plan: {self.describe()} ---")
+        for step, ms in report.items():
+            print(f"{step:28}{ms:10.3f} ms")
+        return report
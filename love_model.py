@@ -1,10 +1,12 @@
 import numpy as np
 import pandas as pd
 from lightgbm import LGBMClassifier
-from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score
+from budgeted_search import make_search, search_summary
+import time
 import warnings
 
 # Use specific features for Love as optimized in previous steps
@@ -22,11 +24,17 @@ class LoveModel:
         self.features = LOVE_FEATURES
         self.scaler = StandardScaler()
         
-    def train(self, X_df, y_series):
+    def train(self, X_df, y_series, n_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+              cache=None):
         """
         Trains the specialized LightGBM model for Love.
         X_df: Full dataframe of features
         y_series: Series of 0/1 labels for Love
+        n_jobs: Parallel CV fits of the search (-1 = all cores)
+        model_threads: LightGBM threads per fit (None = library default)
+        search_mode: 'random' (full RandomizedSearchCV) or 'halving' (see budgeted_search.py)
+        time_budget: Seconds allowed for a 'halving' search (None = no limit)
+        cache: Optional SearchCache; a search seen before only refits the final model
         """
         print(f"\n[LoveModel] Initializing LightGBM Training...")
         print(f"[LoveModel] Using specialized features: {self.features}")
@@ -41,7 +49,7 @@ class LoveModel:
         # Define Pipeline
         pipe = Pipeline([
             ('scaler', self.scaler),
-            ('classifier', LGBMClassifier(random_state=42, verbose=-1))
+            ('classifier', LGBMClassifier(random_state=42, verbose=-1, n_jobs=model_threads))
         ])
 
         # Optimized Parameter Grid for LightGBM
@@ -54,13 +62,14 @@ class LoveModel:
         }
 
         # Search
-        search = RandomizedSearchCV(
-            pipe, param_distributions, n_iter=20, cv=3, n_jobs=-1, verbose=0, random_state=42
-        )
+        search = make_search(pipe, param_distributions, 20, n_jobs, search_mode, time_budget,
+                             cache=cache, name='Love')
 
+        start = time.perf_counter()
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
             search.fit(X_train, y_train)
+        print(f"[LoveModel] Search: {search_summary(search, time.perf_counter() - start)}")
 
         self.model = search.best_estimator_
 
@@ -86,3 +95,44 @@ class LoveModel:
 
         prediction = self.model.predict(X_input)[0]
         return int(prediction)
+
+    def predict_array(self, X, feature_names):
+        """
+        Predicts 'Love' for every row of a plain feature matrix.
+
+        Args:
+            X (np.array): (n, len(feature_names)) matrix.
+            feature_names (list): Column names of X; must include self.features.
+
+        Returns:
+            np.array: (n,) int predictions.
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet.")
+
+        X = np.asarray(X)
+        columns = self._columns_for(feature_names)
+
+        if len(X) == 1:
+            # Single prediction: cast into a reused float32 row instead of a fresh array
+            row = getattr(self, '_row32', None)
+            if row is None or row.shape[1] != len(columns):
+                row = self._row32 = np.empty((1, len(columns)), dtype=np.float32)
+            row[0] = X[0, columns]
+            X_input = row
+        else:
+            X_input = X[:, columns].astype(np.float32)
+
+        return self.model.predict(X_input).astype(int)
+
+    def _columns_for(self, feature_names):
+        """Index array of self.features within feature_names (computed once per column layout)."""
+        key = tuple(feature_names)
+        cached = getattr(self, '_columns', None)  # Models pickled before this cache lack it
+        if cached is None or cached[0] != key:
+            try:
+                columns = np.array([key.index(f) for f in self.features], dtype=np.intp)
+            except ValueError as e:
+                raise ValueError(f"Input data missing required features for Love Model: {e}")
+            cached = self._columns = (key, columns)
+        return cached[1]
@@ -1,8 +1,42 @@
+"""
+Merges the extracted face features with the celebrity labels into merged_celebrity_data.csv.
+
+The merge is incremental. A persistent SQLite index (merge_index.sqlite) maps every
+normalized celebrity name to its label row and records which feature rows
+(name, filename) the merged file already holds, at which position, with which line length and
+a digest of its feature values. Because of that:
+  - new feature rows are merged through the index and appended to the merged file,
+  - feature rows whose values changed (re-extracted images) are rewritten where they are,
+  - changed labels only rewrite the label fields of the merged rows that use them, in
+    place when the line length stays the same (new labels for celebrities without
+    features cost nothing),
+  - the whole file is only rebuilt on the first run, when columns change, or when feature
+    rows were removed from the features CSV.
+Every change is also applied to the binary copy used for training (feature_store.py).
+
+Usage:
+    python merge.py              # Sync merged_celebrity_data.csv with both CSVs
+    python merge.py --rebuild    # Full re-merge
+
+    from merge import MergeEngine
+    with MergeEngine() as engine:
+        engine.update_labels(new_labels_df)
+        engine.append_features(new_feature_rows_df)
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import numpy as np
 import pandas as pd
+import feature_store
+
+FEATURES_FILE = 'celebrity_face_features.csv'
+LABELS_FILE = 'celebrity_labels.csv'
+MERGED_FILE = 'merged_celebrity_data.csv'
+INDEX_FILE = 'merge_index.sqlite'
 
-# Load the datasets
-df_features = pd.read_csv('celebrity_face_features.csv')
-df_labels = pd.read_csv('celebrity_labels.csv')
 
 # Function to clean and standardize celebrity names
 # This handles differences like "Elon Musk" (space) vs "Elon_Musk" (underscore)
@@ -13,35 +47,452 @@ def clean_name(name):
         return '_'.join(name.strip().replace('_', ' ').split())
     return name
 
-# Apply the cleaning function to create a common key for merging
-df_features['Celebrity_Key'] = df_features['Celebrity'].apply(clean_name)
-df_labels['Celebrity_Key'] = df_labels['Celebrity'].apply(clean_name)
-
-# Merge the DataFrames
-# perform a Left Join to keep all rows from the benchmark (features) file
-merged_df = pd.merge(df_features, df_labels, on='Celebrity_Key', how='left', suffixes=('', '_label'))
-
-# Calculate match statistics
-# We use the 'Career' column to check if a label was found (since it comes from the labels file)
-num_matches = merged_df['Career'].notna().sum()
-total_benchmark = len(df_features)
-unmatched_count = total_benchmark - num_matches
-
-# Print statistics to the console
-print(f"Total celebrities in benchmark file: {total_benchmark}")
-print(f"Successfully matched with labels: {num_matches}")
-print(f"Unmatched celebrities: {unmatched_count}")
-
-# Identify and print unmatched celebrities for verification
-unmatched_list = merged_df[merged_df['Career'].isna()]['Celebrity'].tolist()
-print(f"List of unmatched celebrities: {unmatched_list}")
-
-# Cleanup: Drop temporary keys and redundant columns
-# We remove the helper column 'Celebrity_Key' and any duplicate 'Celebrity' column from the labels file
-cols_to_drop = ['Celebrity_Key', 'Celebrity_label']
-final_df = merged_df.drop(columns=[c for c in cols_to_drop if c in merged_df.columns])
-
-# Save the merged data to a CSV file
-output_filename = 'merged_celebrity_data.csv'
-final_df.to_csv(output_filename, index=False)
-print(f"Merged data saved to {output_filename}")
\ No newline at end of file
+
+def clean_names(names):
+    """
+    clean_name over a whole Series at once. Each distinct name is cleaned once
+    (a celebrity has many feature rows) with vectorized string operations.
+    """
+    codes, uniques = pd.factorize(names)
+    cleaned = pd.Series(uniques, dtype=object).astype(str).str.replace(r'[\s_]+', '_', regex=True).str.strip('_')
+    # Missing names (code -1) pick the trailing '' and never match anything
+    return pd.Series(np.append(cleaned.values, '')[codes], index=names.index, dtype=object)
+
+
+def _pair_ids(keys, filenames):
+    """One string per feature row identifying (normalized name, filename)."""
+    return keys + '\x1f' + filenames.astype(str)
+
+
+class MergeEngine:
+    """
+    Incremental features + labels merge backed by a persistent SQLite index.
+
+    Tables: labels (normalized name -> label values), rows (merged file position ->
+    normalized name, filename, line size in bytes, digest of the feature fields) and
+    meta (column layout, file sizes).
+    """
+
+    def __init__(self, merged_path=MERGED_FILE, index_path=INDEX_FILE):
+        """
+        Args:
+            merged_path (str): Merged CSV to create or extend. Its binary copy for training
+                               (feature_store.py) is kept up to date next to it.
+            index_path (str): SQLite index to create or reuse.
+        """
+        self.merged_path = merged_path
+        self.store_path = feature_store.store_path(merged_path)
+        self.index_path = index_path
+        self.conn = sqlite3.connect(index_path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " key TEXT PRIMARY KEY, celebrity TEXT NOT NULL, label_values TEXT NOT NULL)"
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(rows)")]
+        if columns and 'digest' not in columns:
+            # Index written before row digests existed: forget it, the next sync rebuilds
+            self.conn.execute("DROP TABLE rows")
+            self.conn.execute("DELETE FROM meta")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " position INTEGER PRIMARY KEY, key TEXT NOT NULL, filename TEXT NOT NULL, size INTEGER NOT NULL,"
+            " digest INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS rows_key ON rows (key)")
+        self.conn.commit()
+
+    # --- Public API ---
+
+    def update_labels(self, labels):
+        """
+        Adds new label rows and applies changed ones to the merged rows that use them.
+
+        Args:
+            labels (pd.DataFrame): 'Celebrity' + label columns (celebrity_labels.csv layout).
+
+        Returns:
+            dict: {'new_labels', 'changed_labels' (lists of keys), 'patched_rows' (int),
+                   'duplicate_labels' (keys listed more than once; the last row wins)}
+        """
+        label_columns = [c for c in labels.columns if c != 'Celebrity']
+        self._check_columns('label_columns', label_columns)
+
+        # 1. Normalize the names and encode every label row once
+        keys = clean_names(labels['Celebrity'])
+        values = labels[label_columns].astype('Int64').astype(object)
+        values = values.where(values.notna(), None).values.tolist()
+        table = pd.DataFrame({'key': keys, 'celebrity': labels['Celebrity'].astype(str),
+                              'label_values': [json.dumps(v) for v in values]})
+        table = table[table['key'] != '']
+        duplicates = table.loc[table['key'].duplicated(), 'key'].unique().tolist()
+        table = table.drop_duplicates('key', keep='last')
+
+        # 2. Diff against the index
+        stored = dict(self.conn.execute("SELECT key, label_values FROM labels").fetchall())
+        old_values = table['key'].map(stored)
+        new = table[old_values.isna()]
+        changed = table[old_values.notna() & (old_values != table['label_values'])]
+
+        # 3. Store, then patch merged rows whose labels changed (or were missing until now)
+        updates = pd.concat([new, changed])
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO labels (key, celebrity, label_values) VALUES (?, ?, ?)",
+            updates.itertuples(index=False, name=None)
+        )
+        patched = self._patch_labels(dict(zip(updates['key'], updates['label_values'])), len(label_columns))
+        self.conn.commit()
+
+        return {'new_labels': new['key'].tolist(), 'changed_labels': changed['key'].tolist(),
+                'patched_rows': patched, 'duplicate_labels': duplicates}
+
+    def append_features(self, features):
+        """
+        Merges the feature rows the merged file does not hold yet and appends them to it.
+        Rows it already holds with different feature values are rewritten in place.
+
+        Args:
+            features (pd.DataFrame): 'Celebrity', 'Filename' + feature columns
+                                     (celebrity_face_features.csv layout).
+
+        Returns:
+            dict: {'appended', 'updated' (rows whose feature values changed), 'skipped' (rows
+                   already merged as they are), 'unmatched' (keys of appended rows without labels)}
+        """
+        return self._append(features, clean_names(features['Celebrity']), self._merged_rows())
+
+    def rebuild(self, features, labels):
+        """Clears the index and merges everything again. Returns the combined report."""
+        self.conn.execute("DELETE FROM labels")
+        self.conn.execute("DELETE FROM rows")
+        self.conn.execute("DELETE FROM meta")
+        self.conn.commit()
+        if os.path.exists(self.merged_path):
+            os.remove(self.merged_path)
+        feature_store.remove_store(self.store_path)
+
+        report = self.update_labels(labels)
+        report.update(self.append_features(features))
+        report['rebuilt'] = True
+        return report
+
+    def sync(self, features_path=FEATURES_FILE, labels_path=LABELS_FILE):
+        """
+        Brings the merged file up to date with both CSVs, rebuilding only when it has to.
+
+        Returns:
+            dict: The update_labels + append_features report, plus 'rebuilt', 'total_rows',
+                  'unmatched' (all merged keys without labels) and 'unused_labels'.
+        """
+        features = pd.read_csv(features_path)
+        labels = pd.read_csv(labels_path)
+        keys = clean_names(features['Celebrity'])
+        merged_rows = self._merged_rows()
+
+        reason = self._rebuild_reason(features, keys, labels, merged_rows)
+        if reason:
+            print(f"[MergeEngine] Full merge: {reason}")
+            report = self.rebuild(features, labels)
+        else:
+            report = self.update_labels(labels)
+            report.update(self._append(features, keys, merged_rows), rebuilt=False)
+
+        if not feature_store.is_current(self.store_path, self.merged_path):
+            feature_store.convert_csv(self.merged_path, self.store_path)
+
+        report['total_rows'] = self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        report['unmatched'] = self.unmatched()
+        report['unused_labels'] = self.unused_labels()
+        return report
+
+    def unmatched(self):
+        """Normalized names of merged feature rows that have no labels."""
+        return [key for (key,) in self.conn.execute(
+            "SELECT DISTINCT r.key FROM rows r LEFT JOIN labels l ON r.key = l.key"
+            " WHERE l.key IS NULL ORDER BY r.key")]
+
+    def unused_labels(self):
+        """Normalized names that have labels but no feature rows."""
+        return [key for (key,) in self.conn.execute(
+            "SELECT l.key FROM labels l WHERE NOT EXISTS (SELECT 1 FROM rows r WHERE r.key = l.key)"
+            " ORDER BY l.key")]
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Internals ---
+
+    def _append(self, features, keys, merged_rows):
+        """append_features with the normalized names and the _merged_rows() already at hand."""
+        label_columns = self._get_meta('label_columns')
+        if label_columns is None:
+            raise ValueError("No labels in the index yet; call update_labels() first")
+        self._check_columns('feature_columns', list(features.columns))
+
+        # 1. Sort the (name, filename) pairs into new, changed (other feature values) and merged as they are
+        ids = _pair_ids(keys, features['Filename'])
+        digests = _row_digests(features)
+        first = ~ids.duplicated()
+        old_digests = ids.map(merged_rows['digest'])
+        is_new = (first & old_digests.isna()).values
+        is_changed = (first & old_digests.notna() & (old_digests != digests)).values
+
+        updated = 0
+        if is_changed.any():
+            positions = ids[is_changed].map(merged_rows['position']).tolist()
+            updated = self._rewrite_rows(features[is_changed], keys[is_changed], positions,
+                                         digests[is_changed], label_columns)
+
+        new_rows = features[is_new].reset_index(drop=True)
+        new_keys = keys[is_new].reset_index(drop=True)
+        if new_rows.empty:
+            return {'appended': 0, 'updated': updated, 'skipped': len(features) - updated, 'unmatched': []}
+
+        # 2. Look the labels up in the index (left join: rows without labels keep NA)
+        label_frame = self._label_frame(label_columns)
+        merged = self._with_labels(new_rows, new_keys, label_frame)
+
+        # 3. Append to the merged file and record where each row went, how long its line is and its digest
+        start = self.conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+        write_header = start == 0
+        store_current = write_header or feature_store.is_current(self.store_path, self.merged_path)
+        data, sizes = _encode_csv(merged, write_header)
+        with open(self.merged_path, 'wb' if write_header else 'ab') as f:
+            f.write(data)
+
+        # Same rows into the binary store (appended, or converted once if it had fallen behind)
+        if store_current:
+            if write_header:
+                feature_store.remove_store(self.store_path)
+            feature_store.append_rows(self.store_path, merged, feature_store.source_signature(self.merged_path))
+        else:
+            feature_store.convert_csv(self.merged_path, self.store_path)
+        if write_header:
+            self._set_meta('header_size', sizes.pop(0))
+        self.conn.executemany(
+            "INSERT INTO rows (position, key, filename, size, digest) VALUES (?, ?, ?, ?, ?)",
+            zip(range(start, start + len(merged)), new_keys.tolist(), new_rows['Filename'].astype(str).tolist(),
+                sizes, digests[is_new].tolist())
+        )
+        self._set_meta('merged_size', os.path.getsize(self.merged_path))
+        self.conn.commit()
+
+        unmatched = sorted(set(new_keys[~new_keys.isin(label_frame.index)]))
+        return {'appended': len(new_rows), 'updated': updated,
+                'skipped': len(features) - len(new_rows) - updated, 'unmatched': unmatched}
+
+    def _get_meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def _check_columns(self, name, columns):
+        """Stores the column layout on first use; a different layout needs rebuild()."""
+        stored = self._get_meta(name)
+        if stored is None:
+            self._set_meta(name, columns)
+        elif stored != columns:
+            raise ValueError(f"Columns changed ({name}: {stored} -> {columns}); run rebuild()")
+
+    def _merged_rows(self):
+        """Position and feature digest of every row in the merged file, indexed by _pair_ids."""
+        rows = self.conn.execute("SELECT key || char(31) || filename, position, digest FROM rows").fetchall()
+        return pd.DataFrame({'position': [row[1] for row in rows],
+                             'digest': pd.Series([row[2] for row in rows], dtype=object)}).set_axis(
+            pd.Index([row[0] for row in rows], dtype=object))
+
+    def _label_frame(self, label_columns):
+        """All label rows as an Int64 DataFrame indexed by normalized name."""
+        rows = self.conn.execute("SELECT key, label_values FROM labels").fetchall()
+        frame = pd.DataFrame([json.loads(values) for _, values in rows],
+                             index=[key for key, _ in rows], columns=label_columns)
+        return frame.astype('Int64')
+
+    @staticmethod
+    def _with_labels(rows, keys, label_frame):
+        """Feature rows + the label columns of their keys (NA for keys without labels)."""
+        labels = label_frame.reindex(keys).reset_index(drop=True)
+        return pd.concat([rows.reset_index(drop=True), labels], axis=1)
+
+    def _rewrite_rows(self, rows, keys, positions, digests, label_columns):
+        """
+        Merges feature rows again whose values changed and writes them over their old lines
+        (and rows of the binary store).
+
+        Returns:
+            int: Number of rows rewritten.
+        """
+        merged = self._with_labels(rows, keys.reset_index(drop=True), self._label_frame(label_columns))
+        data, sizes = _encode_csv(merged, False)
+        ends = np.cumsum(sizes)
+        lines = {position: data[end - size:end] for position, size, end in zip(positions, sizes, ends)}
+
+        store_current = feature_store.is_current(self.store_path, self.merged_path)
+        self._write_lines(lines)
+        self.conn.executemany("UPDATE rows SET digest = ? WHERE position = ?", zip(digests.tolist(), positions))
+        self.conn.commit()
+
+        signature = feature_store.source_signature(self.merged_path)
+        if store_current:
+            feature_store.update_rows(self.store_path, positions, merged, signature)
+        else:
+            feature_store.convert_csv(self.merged_path, self.store_path)
+        return len(lines)
+
+    def _line_offsets(self):
+        """(byte offset, size) arrays of every merged line, from the stored line sizes."""
+        sizes = np.array([size for (size,) in self.conn.execute("SELECT size FROM rows ORDER BY position")],
+                         dtype=np.int64)
+        return self._get_meta('header_size') + np.cumsum(sizes) - sizes, sizes
+
+    def _write_lines(self, lines):
+        """
+        Replaces merged lines (position -> bytes incl. newline). Lines that keep their length are
+        overwritten in place; otherwise the file is copied once with the new lines spliced in.
+        """
+        offsets, sizes = self._line_offsets()
+        if all(len(line) == sizes[position] for position, line in lines.items()):
+            with open(self.merged_path, 'r+b') as f:
+                for position, line in sorted(lines.items()):
+                    f.seek(offsets[position])
+                    f.write(line)
+        else:
+            tmp_path = self.merged_path + '.tmp'
+            with open(self.merged_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for position, line in sorted(lines.items()):
+                    _copy_bytes(src, dst, offsets[position] - src.tell())
+                    dst.write(line)
+                    src.seek(sizes[position], os.SEEK_CUR)
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, self.merged_path)
+            self.conn.executemany("UPDATE rows SET size = ? WHERE position = ?",
+                                  [(len(line), position) for position, line in lines.items()])
+
+        self._set_meta('merged_size', os.path.getsize(self.merged_path))
+
+    def _patch_labels(self, label_values, n_labels):
+        """
+        Rewrites the label fields (the last n_labels fields of a line) of the merged rows whose
+        key is in label_values (key -> JSON list), see _write_lines.
+
+        Returns:
+            int: Number of rows patched.
+        """
+        if not label_values or not n_labels or not os.path.exists(self.merged_path):
+            return 0
+        targets = [(position, key) for position, key
+                   in self.conn.execute("SELECT position, key FROM rows ORDER BY position") if key in label_values]
+        if not targets:
+            return 0
+
+        # 1. Byte offset of every line from the stored line sizes
+        offsets, sizes = self._line_offsets()
+
+        # 2. Build the new lines (feature fields unchanged, label fields from the index)
+        lines = {}
+        values = [json.loads(label_values[key]) for _, key in targets]
+        with open(self.merged_path, 'rb') as f:
+            for (position, key), row in zip(targets, values):
+                f.seek(offsets[position])
+                line = f.read(sizes[position])
+                fields = ','.join('' if v is None else str(v) for v in row)
+                lines[position] = line[:-1].rsplit(b',', n_labels)[0] + b',' + fields.encode() + b'\n'
+        store_current = feature_store.is_current(self.store_path, self.merged_path)
+
+        # 3. Write them back
+        self._write_lines(lines)
+
+        # 4. Same labels into the binary store (only its label array is rewritten)
+        signature = feature_store.source_signature(self.merged_path)
+        if store_current:
+            feature_store.update_labels(self.store_path, list(lines), values, signature)
+        else:
+            feature_store.convert_csv(self.merged_path, self.store_path)
+        return len(lines)
+
+    def _rebuild_reason(self, features, keys, labels, merged_rows):
+        """Why the merged file cannot be updated in place, or None if it can."""
+        if not os.path.exists(self.merged_path):
+            return f"{self.merged_path} does not exist"
+        if self._get_meta('merged_size') is None:
+            return f"no merge index at {self.index_path}"
+        if self._get_meta('merged_size') != os.path.getsize(self.merged_path):
+            return f"{self.merged_path} was changed outside the merge index"
+        if self._get_meta('feature_columns') != list(features.columns) or \
+                self._get_meta('label_columns') != [c for c in labels.columns if c != 'Celebrity']:
+            return "columns changed"
+        if not merged_rows.index.isin(_pair_ids(keys, features['Filename'])).all():
+            return "feature rows were removed"
+        return None
+
+
+def _row_digests(features):
+    """64-bit hash of every feature row (all its fields), as int64 so SQLite can store it."""
+    return pd.Series(pd.util.hash_pandas_object(features, index=False).values.view(np.int64),
+                     index=features.index)
+
+
+def _encode_csv(frame, header):
+    """
+    The frame as UTF-8 CSV bytes, plus the size of every line (header first if written).
+    Integer columns with missing values are written as '1' / '' (not '1.0').
+    """
+    data = frame.to_csv(index=False, header=header, lineterminator='\n').encode('utf-8')
+    lines = data.split(b'\n')[:-1]
+    if len(lines) != len(frame) + header:
+        raise ValueError("Line breaks inside values are not supported in the merged file")
+    return data, [len(line) + 1 for line in lines]
+
+
+def _copy_bytes(src, dst, n, block=1 << 20):
+    while n > 0:
+        chunk = src.read(min(block, n))
+        if not chunk:
+            break
+        dst.write(chunk)
+        n -= len(chunk)
+
+
+def print_report(report):
+    """Prints the statistics of a sync()/rebuild() report."""
+    matched = report['total_rows'] - len(report['unmatched'])
+    print(f"{'Rebuilt' if report.get('rebuilt') else 'Updated'} merged data: "
+          f"{report['appended']} rows appended, {report['updated']} rows with new feature values, "
+          f"{report['patched_rows']} rows relabeled, "
+          f"{len(report['new_labels'])} new / {len(report['changed_labels'])} changed label rows")
+    print(f"Total rows in merged file: {report['total_rows']}")
+    print(f"Successfully matched with labels: {matched}")
+    print(f"Unmatched celebrities: {report['unmatched']}")
+    if report['unused_labels']:
+        print(f"Labels without features: {report['unused_labels']}")
+    if report['duplicate_labels']:
+        print(f"Labelled more than once (last row used): {report['duplicate_labels']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merges the feature CSV with the labels CSV")
+    parser.add_argument('--features', default=FEATURES_FILE, help='Feature CSV from batch_process_faces.py')
+    parser.add_argument('--labels', default=LABELS_FILE, help='Labels CSV')
+    parser.add_argument('--output', default=MERGED_FILE, help='Merged CSV')
+    parser.add_argument('--index', default=INDEX_FILE, help='Persistent merge index')
+    parser.add_argument('--rebuild', action='store_true', help='Merge everything again')
+    args = parser.parse_args()
+
+    with MergeEngine(args.output, args.index) as engine:
+        if args.rebuild:
+            report = engine.rebuild(pd.read_csv(args.features), pd.read_csv(args.labels))
+            report.update(total_rows=report['appended'], unmatched=engine.unmatched(),
+                          unused_labels=engine.unused_labels())
+        else:
+            report = engine.sync(args.features, args.labels)
+    print_report(report)
+    print(f"Merged data saved to {args.output}")
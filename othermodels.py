@@ -2,12 +2,16 @@ import pandas as pd
 import numpy as np
 from xgboost import XGBClassifier
 from sklearn.multioutput import MultiOutputClassifier
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
+from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score
+from budgeted_search import make_search, search_summary
+import feature_store
 import warnings
+import os
 import sys
+import time
 
 # Import the separated Love Model
 # Note: Ensure love_model.py is in the same directory
@@ -32,6 +36,13 @@ ALL_FEATURES = [
     'eye_curvature_ratio', 'eye_symmetry'
 ]
 
+# All potential targets in the merged data
+TARGET_COLUMNS = [
+    'Career', 'Love', 'Love2', 'Wealth', 'Health',
+    'Children', 'Social', 'Authority',
+    'Authority2', 'Later-life', 'Social2'
+]
+
 # Targets managed by THIS main script (using XGBoost)
 XGB_TARGETS_SPECIAL = ['Wealth', 'Health', 'Later-life']
 
@@ -43,15 +54,12 @@ XGB_TARGETS_SPECIAL = ['Wealth', 'Health', 'Later-life']
 def load_label_descriptions(desc_filepath):
     try:
         desc_df = pd.read_csv(desc_filepath)
+        # Normalize whole columns at once instead of row by row
+        norm_labels = desc_df['label'].astype(str).str.strip().str.replace('-', '').str.lower()
+        values = desc_df['value'].astype(int).tolist()
         meaning_map = {}
-        for _, row in desc_df.iterrows():
-            raw_label = str(row['label']).strip()
-            norm_label = raw_label.replace('-', '').lower()
-            val = int(row['value'])
-            desc = row['description']
-            if norm_label not in meaning_map:
-                meaning_map[norm_label] = {}
-            meaning_map[norm_label][val] = desc
+        for norm_label, val, desc in zip(norm_labels, values, desc_df['description']):
+            meaning_map.setdefault(norm_label, {})[val] = desc
         return meaning_map
     except Exception as e:
         print(f"Warning: Could not load label descriptions: {e}")
@@ -59,6 +67,13 @@ def load_label_descriptions(desc_filepath):
 
 
 def load_data(filepath):
+    # Binary copy of the CSV (feature_store.py): no parsing, features stay memory-mapped
+    store = feature_store.store_path(filepath)
+    if feature_store.is_current(store, filepath):
+        return load_store(store)
+    if os.path.exists(store):
+        print(f"{store} is out of date; reading the CSV (run feature_store.py to refresh it)")
+
     print(f"Loading data from {filepath}...")
     df = pd.read_csv(filepath)
 
@@ -71,22 +86,49 @@ def load_data(filepath):
     X = df[ALL_FEATURES].fillna(df[ALL_FEATURES].mean())
 
     # Get all potential targets present in CSV
-    target_cols = [
-        'Career', 'Love', 'Love2', 'Wealth', 'Health',
-        'Children', 'Social', 'Authority',
-        'Authority2', 'Later-life', 'Social2'
-    ]
-    available_targets = [c for c in target_cols if c in df.columns]
+    available_targets = [c for c in TARGET_COLUMNS if c in df.columns]
     y = df[available_targets].fillna(0)
 
     print(f"Successfully loaded {len(df)} records.")
     return X, y
 
 
+def load_store(path):
+    """load_data from a feature store: float32 features (zero-copy) and int8 labels."""
+    print(f"Loading data from {path}...")
+    store = feature_store.FeatureStore(path)
+
+    # Validation
+    missing = [c for c in ALL_FEATURES if c not in store.feature_names]
+    if missing:
+        raise ValueError(f"Missing features: {missing}")
+
+    X = store.X()
+    if store.feature_names != ALL_FEATURES:
+        X = X[ALL_FEATURES]
+    # Fill NA (only copies when something is missing)
+    if np.isnan(store.features).any():
+        X = X.fillna(X.mean())
+
+    y = store.y()
+    y = y[[c for c in TARGET_COLUMNS if c in y.columns]]
+
+    print(f"Successfully loaded {store.rows} records.")
+    return X, y
+
+
 # --- 3. TRAINING XGBOOST MODELS ---
 
-def train_xgboost_specialized(X, y, label):
-    """Trains a specific XGBoost model for Wealth, Health, etc. Returns model and accuracy."""
+def train_xgboost_specialized(X, y, label, n_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+                              cache=None):
+    """
+    Trains a specific XGBoost model for Wealth, Health, etc. Returns model and accuracy.
+    n_jobs: Parallel CV fits of the search (-1 = all cores)
+    model_threads: XGBoost threads per fit (None = library default)
+    search_mode: 'random' (full RandomizedSearchCV) or 'halving' (see budgeted_search.py)
+    time_budget: Seconds allowed for a 'halving' search (None = no limit)
+    cache: Optional SearchCache; a search seen before only refits the final model
+    """
     print(f"\n[XGBoost] Training Specialized Model for '{label}'...")
 
     y_target = y[label].values.astype(int)
@@ -94,7 +136,7 @@ def train_xgboost_specialized(X, y, label):
 
     pipe = Pipeline([
         ('scaler', StandardScaler()),
-        ('classifier', XGBClassifier(random_state=42, eval_metric='logloss'))
+        ('classifier', XGBClassifier(random_state=42, eval_metric='logloss', n_jobs=model_threads))
     ])
 
     params = {
@@ -105,16 +147,22 @@ def train_xgboost_specialized(X, y, label):
         'classifier__colsample_bytree': [0.8, 1.0]
     }
 
-    search = RandomizedSearchCV(pipe, params, n_iter=20, cv=3, n_jobs=-1, verbose=0, random_state=42)
+    search = make_search(pipe, params, 20, n_jobs, search_mode, time_budget, cache=cache, name=label)
+    start = time.perf_counter()
     search.fit(X_train, y_train)
+    print(f"   > Search: {search_summary(search, time.perf_counter() - start)}")
 
     acc = accuracy_score(y_test, search.best_estimator_.predict(X_test))
     print(f"   > Accuracy: {acc:.2%}")
     return search.best_estimator_, acc
 
 
-def train_general_model(X, y, exclude_labels):
-    """Trains a Multi-Output XGBoost model for all remaining labels. Returns model, targets, and accuracies."""
+def train_general_model(X, y, exclude_labels, n_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+                        cache=None):
+    """
+    Trains a Multi-Output XGBoost model for all remaining labels. Returns model, targets, and accuracies.
+    n_jobs / model_threads / search_mode / time_budget / cache: as in train_xgboost_specialized
+    """
     print(f"\n[XGBoost] Training General Model for remaining labels...")
 
     targets = [col for col in y.columns if col not in exclude_labels]
@@ -127,7 +175,8 @@ def train_general_model(X, y, exclude_labels):
 
     pipe = Pipeline([
         ('scaler', StandardScaler()),
-        ('classifier', MultiOutputClassifier(XGBClassifier(random_state=42, eval_metric='logloss')))
+        ('classifier', MultiOutputClassifier(XGBClassifier(random_state=42, eval_metric='logloss',
+                                                           n_jobs=model_threads)))
     ])
 
     params = {
@@ -136,8 +185,10 @@ def train_general_model(X, y, exclude_labels):
         'classifier__estimator__max_depth': [3, 5]
     }
 
-    search = RandomizedSearchCV(pipe, params, n_iter=10, cv=3, n_jobs=-1, verbose=0, random_state=42)
+    search = make_search(pipe, params, 10, n_jobs, search_mode, time_budget, cache=cache, name='GENERAL')
+    start = time.perf_counter()
     search.fit(X_train, y_train)
+    print(f"   > Search: {search_summary(search, time.perf_counter() - start)}")
 
     # Eval
     accuracies = []
@@ -248,4 +299,4 @@ def get_description(label, val, meaning_map):
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
\ No newline at end of file
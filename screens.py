@@ -1,8 +1,9 @@
 import os
+import time
 import datetime
-import cv2
 import csv
 import re
+from concurrent.futures import ThreadPoolExecutor
 from kivy.app import App
 from kivy.uix.screenmanager import Screen
 from kivy.clock import Clock
@@ -14,10 +15,21 @@ from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.scrollview import ScrollView
 from kivy.utils import get_color_from_hex
+from kivy.logger import Logger
+
+from warmup import WarmupService, warm_up_analyzer, warm_up_predictor
+
+# The analyzer, predictor, visualizer and camera modules pull in mediapipe, cv2, pandas,
+# xgboost, lightgbm and sklearn. They are imported on first use (mostly on the warm-up
+# threads) so the window can open before any of them are loaded.
+
+AI_OFFLINE_TEXT = "Error: AI Core Offline (Run train_and_save.py)"
+
+# Smoothing factor for the preview frame time average
+PREVIEW_EMA_ALPHA = 0.1
+# The average is logged (debug level) once every this many preview frames (~10 s at 30 fps)
+PREVIEW_LOG_FRAMES = 300
 
-from face_analyzer import FaceAnalyzer
-from face_visualizer import FaceVisualizer
-from destiny_predictor import DestinyPredictor
 # --- UI Layout Definition ---
 KV_LAYOUT = '''
 #:import get_color_from_hex kivy.utils.get_color_from_hex
@@ -200,6 +212,17 @@ KV_LAYOUT = '''
 '''
 # --- Python Logic ---
 
+def _load_analyzer():
+    from face_analyzer import FaceAnalyzer
+    return FaceAnalyzer()
+
+
+def _load_predictor():
+    from destiny_predictor import DestinyPredictor
+    # Kiosk features are rounded to 3 decimals, so the cache key loses nothing
+    return DestinyPredictor(cache_size=128)
+
+
 class FortunePopup(Popup):
     """
     Custom Popup class to display detailed fortune results.
@@ -259,69 +282,145 @@ class MainScreen(Screen):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.capture = None
-        self.analyzer = FaceAnalyzer()
-        self.visualizer = FaceVisualizer()
+        self.grabber = None  # CameraGrabber, reads frames on its own thread
+        self.last_frame_seq = 0
+        self.analyzer = None  # Built by the warm-up service
+        self.visualizer = None  # Created on the first analysis
         self.update_event = None
         self.current_frame = None
 
+        # Camera preview: one texture per resolution, plus a running average of the
+        # time spent uploading each frame (in milliseconds)
+        self._preview_texture = None
+        self.preview_frame_ms = None
+        self.preview_frames = 0
+
+        # Analysis runs on one background thread (FaceMesh handles one image at a time);
+        # analysis_future is set while a capture is being processed
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.analysis_future = None
+        self.capture_latency_ms = None  # Age of the captured frame when the button was pressed
+
         self.predictor = None
-        Clock.schedule_once(self.init_predictor, 0.5)
 
-    def init_predictor(self, dt):
-        """Initialize the ML predictor in a scheduled event."""
-        self.predictor = DestinyPredictor()
-        if self.predictor.is_ready:
-            self.ids.status_label.text = "AI Core Online. Ready."
+        # Load FaceMesh and the models in the background (and run one dummy call through
+        # each) so the UI appears right away and the first capture isn't slower than the rest
+        self.warmup = WarmupService(on_progress=self.report_progress)
+        self.warmup.add('analyzer', _load_analyzer, warm_up_analyzer)
+        self.warmup.add('predictor', _load_predictor, warm_up_predictor)
+        self.warmup.start(on_done=lambda service: Clock.schedule_once(self.on_warmup_done))
+
+    def on_warmup_done(self, dt):
+        """UI thread: take over the warmed-up components and enable capturing."""
+        self.analyzer = self.warmup.results.get('analyzer')
+        self.predictor = self.warmup.results.get('predictor')
+
+        if self.analyzer is None:
+            self.ids.status_label.text = f"Error: Face Detector Offline ({self.warmup.errors.get('analyzer')})"
+        elif self.capture_ready():
+            self.ids.status_label.text = f"AI Core Online. Ready. ({self.warmup.summary()})"
             self.ids.capture_btn.disabled = False
         else:
-            self.ids.status_label.text = "Error: AI Core Offline (Run train_and_save.py)"
+            self.ids.status_label.text = AI_OFFLINE_TEXT
+
+    def capture_ready(self):
+        """True when both the face detector and the models are loaded."""
+        return self.analyzer is not None and self.predictor is not None and self.predictor.is_ready
 
     def on_enter(self):
-        self.start_camera()
+        # Open the camera after the first frame is drawn (importing cv2 and opening the
+        # device both take a while)
+        Clock.schedule_once(lambda dt: self.start_camera())
 
     def on_leave(self):
         self.stop_camera()
 
     def start_camera(self):
-        if self.capture is None:
-            self.capture = cv2.VideoCapture(0)
-            if not self.capture.isOpened():
-                self.capture = cv2.VideoCapture(1)
+        if self.grabber is None:
+            from camera_grabber import CameraGrabber
+            self.grabber = CameraGrabber()
+            self.grabber.start()
 
-        if self.update_event is None and self.capture.isOpened():
+        if self.update_event is None and self.grabber.is_opened():
             self.update_event = Clock.schedule_interval(self.update, 1.0 / 30.0)
-        elif not self.capture.isOpened():
+        elif not self.grabber.is_opened():
             self.ids.status_label.text = "Error: Camera Access Denied"
 
     def stop_camera(self):
-        if self.capture:
-            self.capture.release()
-            self.capture = None
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
+            self.last_frame_seq = 0
         if self.update_event:
             self.update_event.cancel()
             self.update_event = None
 
     def update(self, dt):
         """Update loop for camera frame."""
-        if self.capture:
-            ret, frame = self.capture.read()
-            if ret:
+        if self.grabber:
+            entry = self.grabber.latest()
+            # Only upload frames the preview hasn't shown yet
+            if entry is not None and entry[0] != self.last_frame_seq:
+                self.last_frame_seq, _, frame = entry
+                start = time.perf_counter()
                 self.current_frame = frame
-                display_frame = cv2.flip(frame, 1)
-                buf = cv2.flip(display_frame, 0).tobytes()
-                texture = Texture.create(size=(frame.shape[1], frame.shape[0]), colorfmt='bgr')
-                texture.blit_buffer(buf, colorfmt='bgr', bufferfmt='ubyte')
-                self.ids.camera_preview.texture = texture
+                texture = self._get_preview_texture(frame.shape[1], frame.shape[0])
+                # Upload straight from the frame buffer; mirroring and the bottom-up
+                # row order are handled by the texture coordinates, not by copying pixels
+                texture.blit_buffer(frame.reshape(-1), colorfmt='bgr', bufferfmt='ubyte')
+                self.ids.camera_preview.canvas.ask_update()
+
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if self.preview_frame_ms is None:
+                    self.preview_frame_ms = elapsed_ms
+                else:
+                    self.preview_frame_ms += PREVIEW_EMA_ALPHA * (elapsed_ms - self.preview_frame_ms)
+                self.preview_frames += 1
+                if self.preview_frames % PREVIEW_LOG_FRAMES == 0:
+                    Logger.debug(f"Mirror: preview upload {self.preview_frame_ms:.2f} ms/frame (average)")
+
+    def _get_preview_texture(self, width, height):
+        """
+        Returns the preview texture, creating it only when the camera resolution changes.
+        The texture is flipped once here so every frame can be blitted as-is.
+        """
+        texture = self._preview_texture
+        if texture is None or texture.size != (width, height):
+            texture = Texture.create(size=(width, height), colorfmt='bgr')
+            texture.flip_vertical()  # OpenCV rows are top-down, GL textures bottom-up
+            texture.flip_horizontal()  # Mirror the preview like a selfie camera
+            self._preview_texture = texture
+            self.ids.camera_preview.texture = texture
+        return texture
 
     def capture_and_analyze(self):
-        if self.current_frame is None:
+        """Start analyzing a snapshot of the current frame on the background worker."""
+        if self.analysis_future is not None:
             return
 
+        # Take the newest frame from the grabber rather than the last one shown
+        entry = self.grabber.latest() if self.grabber else None
+        if entry is not None:
+            _, timestamp, frame = entry
+            self.capture_latency_ms = (time.monotonic() - timestamp) * 1000
+            Logger.info(f"Mirror: captured frame was {self.capture_latency_ms:.0f} ms old")
+        elif self.current_frame is not None:
+            frame = self.current_frame
+        else:
+            return
+
+        frame = frame.copy()
+        self.ids.capture_btn.disabled = True
         self.ids.status_label.text = "Processing Neural Data..."
-        Clock.schedule_once(self.do_process, 0.1)
+
+        self.analysis_future = self.executor.submit(self.analyze_frame, frame)
+        # Results come back to the UI thread through the Kivy clock
+        self.analysis_future.add_done_callback(
+            lambda future: Clock.schedule_once(lambda dt: self.on_analysis_done(future))
+        )
 
     def save_captured_image(self, frame, prefix="face"):
+        import cv2
         save_dir = "captures"
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
@@ -330,28 +429,67 @@ class MainScreen(Screen):
         cv2.imwrite(filename, frame)
         return filename
 
-    def do_process(self, dt):
-        """Process the image, run predictions, and transition to result screen."""
-        stats = self.analyzer.process_image(self.current_frame)
+    def report_progress(self, text):
+        """Thread-safe status update (the label itself is changed on the UI thread)."""
+        Clock.schedule_once(lambda dt: setattr(self.ids.status_label, 'text', text))
+
+    def analyze_frame(self, frame):
+        """
+        Runs on the worker thread: process the image, run predictions and save the visualization.
+        Must not touch any widget directly.
+
+        Returns:
+            tuple: (fortune_results, saved_path), or None if no face was found.
+        """
+        self.report_progress("Detecting Face...")
+        stats = self.analyzer.process_image(frame)
+
+        if not stats:
+            return None
+
+        self.report_progress("Consulting the AI Core...")
+        fortune_results = self.predictor.predict_fortune(stats)
+        lms_data = self.analyzer.landmarks_np
+        custom_pts_data = self.analyzer.custom_points
+
+        self.report_progress("Rendering Destiny Map...")
+        if self.visualizer is None:
+            from face_visualizer import FaceVisualizer
+            self.visualizer = FaceVisualizer()
+        img_with_dots = self.visualizer.draw_landmarks(frame, lms_data)
+        final_visualized_img = self.visualizer.draw_custom_points(img_with_dots, custom_pts_data)
+
+        saved_path = self.save_captured_image(final_visualized_img, prefix="analyzed")
+        return fortune_results, saved_path
+
+    def on_analysis_done(self, future):
+        """UI thread: show the results of analyze_frame and transition to the result screen."""
+        self.analysis_future = None
+        if not self.capture_ready():
+            # The button stays disabled: another capture could not succeed either
+            self.ids.status_label.text = AI_OFFLINE_TEXT
+            return
+        self.ids.capture_btn.disabled = False
+
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Analysis error: {e}")
+            self.ids.status_label.text = "Analysis Failed. Please Try Again."
+            return
 
-        if stats:
-            fortune_results = self.predictor.predict_fortune(stats)
-            lms_data = self.analyzer.landmarks_np
-            custom_pts_data = self.analyzer.custom_points
+        if result is None:
+            self.ids.status_label.text = "No Face Detected"
+            return
 
-            img_to_draw = self.current_frame.copy()
-            img_with_dots = self.visualizer.draw_landmarks(img_to_draw, lms_data)
-            final_visualized_img = self.visualizer.draw_custom_points(img_with_dots, custom_pts_data)
+        fortune_results, saved_path = result
+        app = App.get_running_app()
+        result_screen = app.root.get_screen('result')
+        result_screen.display_data(fortune_results, saved_path)
+        app.root.current = 'result'
+        self.ids.status_label.text = "Analysis Complete"
 
-            saved_path = self.save_captured_image(final_visualized_img, prefix="analyzed")
 
-            app = App.get_running_app()
-            result_screen = app.root.get_screen('result')
-            result_screen.display_data(fortune_results, saved_path)
-            app.root.current = 'result'
-            self.ids.status_label.text = "Analysis Complete"
-        else:
-            self.ids.status_label.text = "No Face Detected"
 class ResultScreen(Screen):
     """
     Screen to display prediction results with interactive buttons.
@@ -374,7 +512,7 @@ class ResultScreen(Screen):
             'DEFAULT': '#06B6D4'  # Cyan
         }
 
-        def subscribe_vip(self):
+    def subscribe_vip(self):
         """Triggered when the Subscribe button is pressed."""
         self.show_fortune_popup(
             "VIP Subscription",
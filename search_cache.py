@@ -0,0 +1,153 @@
+"""
+Persistent cache of hyperparameter-search results, keyed by a fingerprint of the data.
+
+A search is identified by its training matrix, its label column(s), the pipeline and
+parameter grid, the search settings and the library versions. When all of those match a
+previous run, the stored best parameters are reused and only the final estimator is fit.
+Changing one label column therefore re-searches only that label, and edits that do not
+touch the training data (e.g. description texts in destiny_labels.csv) re-search nothing.
+"""
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from sklearn.base import BaseEstimator, clone
+
+CACHE_FILE = 'search_cache.json'
+
+# Libraries whose version changes can change the search results
+VERSIONED_LIBRARIES = ['numpy', 'sklearn', 'xgboost', 'lightgbm']
+
+
+class SearchCache:
+    """Search results stored in one JSON file: fingerprint -> entry."""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.new_entries = {}  # Added since loading (merged by the process that saves)
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[SearchCache] Ignoring unreadable cache {path}: {e}")
+
+    def fingerprint(self, X, y, search):
+        """Hex digest of everything that determines the search result."""
+        h = hashlib.blake2b(digest_size=20)
+        for array in (X, y):
+            array = np.ascontiguousarray(np.asarray(array, dtype=np.float64))
+            h.update(repr(array.shape).encode())
+            h.update(array.tobytes())
+        h.update(json.dumps(_search_settings(search), sort_keys=True, default=repr).encode())
+        h.update(json.dumps(library_versions(), sort_keys=True).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        return self.new_entries.get(key) or self.entries.get(key)
+
+    def put(self, key, entry):
+        self.new_entries[key] = entry
+
+    def merge(self, entries):
+        """Adds entries found by another process (e.g. a parallel training job)."""
+        self.new_entries.update(entries)
+
+    def save(self):
+        """Writes the cache (old and new entries) atomically."""
+        self.entries.update(self.new_entries)
+        self.new_entries = {}
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(self.path + '.tmp', self.path)
+
+
+class CachedSearch:
+    """Wraps a search (RandomizedSearchCV / HalvingSearch) so a known result skips the search."""
+
+    def __init__(self, search, cache, name):
+        self.search = search
+        self.cache = cache
+        self.name = name  # Model name stored with the entry, e.g. 'Wealth'
+        self.cache_hit = False
+
+    def fit(self, X, y):
+        key = self.cache.fingerprint(X, y, self.search)
+        entry = self.cache.get(key)
+
+        if entry is not None:
+            # Known result: refit the final estimator only
+            self.cache_hit = True
+            self.cache.hits += 1
+            self.best_params_ = entry['best_params']
+            self.best_score_ = entry['best_score']
+            self.best_estimator_ = clone(self.search.estimator).set_params(**self.best_params_).fit(X, y)
+            return self
+
+        self.cache.misses += 1
+        start = time.perf_counter()
+        self.search.fit(X, y)
+        self.best_params_ = self.search.best_params_
+        self.best_score_ = float(self.search.best_score_)
+        self.best_estimator_ = self.search.best_estimator_
+        self.cache.put(key, {
+            'model': self.name,
+            'best_params': _plain(self.best_params_),
+            'best_score': self.best_score_,
+            'cv_scores': _cv_scores(self.search),
+            'search_seconds': time.perf_counter() - start,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        return self
+
+
+def library_versions():
+    versions = {}
+    for name in VERSIONED_LIBRARIES:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def _search_settings(search):
+    """The search type, its settings and the pipeline configuration (thread counts excluded)."""
+    if hasattr(search, 'get_params'):
+        params = search.get_params(deep=False)
+    else:
+        params = {key: value for key, value in vars(search).items() if not key.endswith('_')}
+
+    settings = {'type': type(search).__name__}
+    for key, value in params.items():
+        if key == 'estimator':
+            settings['estimator'] = _estimator_settings(value)
+        elif not key.endswith('n_jobs') and key not in ('verbose', 'pre_dispatch'):
+            settings[key] = value
+    return settings
+
+
+def _estimator_settings(estimator):
+    params = {}
+    for key, value in estimator.get_params(deep=True).items():
+        if key.endswith('n_jobs') or key.endswith('verbose') or isinstance(value, list):
+            continue  # Thread counts don't change results; step lists are covered by their params
+        params[key] = type(value).__name__ if isinstance(value, BaseEstimator) else value
+    return params
+
+
+def _cv_scores(search):
+    """Candidate scores of a finished search, as JSON-friendly data."""
+    if hasattr(search, 'cv_results_'):
+        return [{'params': _plain(params), 'score': float(score)}
+                for params, score in zip(search.cv_results_['params'], search.cv_results_['mean_test_score'])]
+    return getattr(search, 'history_', [])
+
+
+def _plain(params):
+    """NumPy scalars -> Python numbers, so the parameters survive a JSON round trip."""
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in params.items()}
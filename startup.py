@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import time
+
+# Process start reference for time-to-window measurements
+STARTED_AT = time.perf_counter()
+
+# Modules that are slow to import and should stay out of the UI startup path
+HEAVY_MODULES = [
+    'cv2', 'mediapipe', 'numpy', 'pandas', 'joblib',
+    'xgboost', 'lightgbm', 'sklearn', 'matplotlib'
+]
+
+
+def seconds_since_start():
+    """Seconds since this module was first imported (the app imports it first thing)."""
+    return time.perf_counter() - STARTED_AT
+
+
+def loaded_heavy_modules():
+    """Returns the heavy modules that are already imported in this process."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def profile_imports(module, top=15):
+    """
+    Imports a module in a fresh interpreter with `-X importtime` and summarizes the result.
+
+    Args:
+        module (str): Module to import, e.g. 'screens'.
+        top (int): Number of slowest modules to include.
+
+    Returns:
+        dict: {'total_ms': float, 'slowest': [(name, cumulative_ms, self_ms), ...],
+               'heavy': [heavy modules pulled in by the import]}
+    """
+    code = f"import {module}, startup; print(','.join(startup.loaded_heavy_modules()))"
+    # KIVY_NO_ARGS keeps Kivy from parsing the child's command line
+    env = dict(os.environ, KIVY_NO_ARGS='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    rows = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(cumulative_us) / 1000, int(self_us) / 1000))
+        if not name.startswith('  '):  # Top-level imports add up to the total
+            total_us += int(cumulative_us)
+
+    rows.sort(key=lambda row: row[1], reverse=True)
+    heavy = proc.stdout.strip().split(',') if proc.stdout.strip() else []
+    return {'total_ms': total_us / 1000, 'slowest': rows[:top], 'heavy': heavy}
+
+
+def print_import_report(module, top=15):
+    """Prints profile_imports() as a readable table."""
+    report = profile_imports(module, top)
+    print(f"--- Import profile: {module} ({report['total_ms']:.0f} ms total) ---")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, cumulative_ms, self_ms in report['slowest']:
+        print(f"{cumulative_ms:14.1f} {self_ms:9.1f}  {name}")
+    print(f"Heavy modules loaded: {', '.join(report['heavy']) or 'none'}")
+    return report
+
+
+if __name__ == "__main__":
+    print_import_report(sys.argv[1] if len(sys.argv) > 1 else 'screens')
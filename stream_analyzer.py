@@ -0,0 +1,103 @@
+import numpy as np
+from face_analyzer import FaceAnalyzer
+
+
+class StreamingFaceAnalyzer(FaceAnalyzer):
+    """
+    FaceAnalyzer variant for live camera / video streams.
+
+    MediaPipe runs in tracking mode (static_image_mode=False), so full face detection
+    only runs when the face is lost. Each frame is cropped to a region of interest
+    around the previous frame's landmarks, and landmarks are smoothed over time so the
+    feature stream does not jitter.
+
+    A library piece for video tools: the kiosk app analyzes single captures, where
+    tracking and smoothing across frames do not apply, so it uses FaceAnalyzer.
+    """
+
+    def __init__(self, max_side=None, roi_margin=0.3, smoothing=0.5):
+        """
+        Args:
+            max_side (int): Optional resolution bound (see FaceAnalyzer).
+            roi_margin (float): Extra space around the landmark bounding box, relative to its size.
+            smoothing (float): Weight of the newest landmarks in the exponential moving
+                               average (1.0 disables smoothing).
+        """
+        super().__init__(max_side=max_side, static_image_mode=False)
+        self.roi_margin = roi_margin
+        self.smoothing = smoothing
+        self.roi = None  # (x0, y0, x1, y1) normalized crop region, None = full frame
+
+    def reset(self):
+        """Forgets the tracked face (e.g. when the camera changes)."""
+        self.roi = None
+        self.landmarks_np = None
+        self.custom_points = None
+
+    def process_frame(self, frame):
+        """
+        Stream pipeline: Detect in ROI -> Smooth -> Update ROI -> Measure -> Return Data
+
+        Returns:
+            dict: Same features as process_image, or None if no face is in the frame.
+        """
+        if frame is None: return None
+
+        lms = None
+        if self.roi is not None:
+            lms = self._detect_in_roi(frame, self.roi)
+            if lms is None:
+                # MediaPipe tracks in input coordinates: after the crop moved, tracking fails once
+                # and the next call re-runs detection, still on the (cheaper) crop
+                lms = self._detect_in_roi(frame, self.roi)
+        if lms is None:
+            # Lost the face (or first frame): search the whole frame and restart smoothing
+            self.landmarks_np = None
+            lms = self._detect_landmarks(frame)
+
+        if lms is None:
+            self.reset()
+            return None
+
+        # Exponential moving average over frames
+        if self.landmarks_np is not None and self.landmarks_np.shape == lms.shape:
+            lms = self.smoothing * lms + (1 - self.smoothing) * self.landmarks_np
+        self.landmarks_np = lms
+
+        self._update_roi(lms)
+        return self._features_from_landmarks(lms)
+
+    def _detect_in_roi(self, frame, roi):
+        """Runs FaceMesh on the ROI crop and maps the landmarks back to full-frame normalized coordinates."""
+        h, w = frame.shape[:2]
+        x0, y0 = int(roi[0] * w), int(roi[1] * h)
+        x1, y1 = int(np.ceil(roi[2] * w)), int(np.ceil(roi[3] * h))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+
+        lms = self._detect_landmarks(frame[y0:y1, x0:x1])
+        if lms is None:
+            return None
+
+        lms[:, 0] = (lms[:, 0] * (x1 - x0) + x0) / w
+        lms[:, 1] = (lms[:, 1] * (y1 - y0) + y0) / h
+        return lms
+
+    def _update_roi(self, lms):
+        """
+        Moves the ROI only when the face leaves it or it became much too large, so the
+        crop stays stable between frames and MediaPipe can keep tracking.
+        """
+        bx0, by0 = lms.min(axis=0)
+        bx1, by1 = lms.max(axis=0)
+        bw, bh = bx1 - bx0, by1 - by0
+
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            inside = rx0 <= bx0 and ry0 <= by0 and bx1 <= rx1 and by1 <= ry1
+            area_ratio = (rx1 - rx0) * (ry1 - ry0) / max(bw * bh, 1e-9)
+            if inside and area_ratio < 4 * (1 + 2 * self.roi_margin) ** 2:
+                return
+
+        mx, my = bw * self.roi_margin, bh * self.roi_margin
+        self.roi = (max(0.0, bx0 - mx), max(0.0, by0 - my), min(1.0, bx1 + mx), min(1.0, by1 + my))
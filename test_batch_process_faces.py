@@ -0,0 +1,209 @@
+import os
+import time
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import batch_process_faces
+
+
+@pytest.fixture
+def photo_folder(tmp_path):
+    """Two celebrity folders with a blank image and an unreadable file."""
+    for name in ["B_Person", "A_Person"]:
+        (tmp_path / name).mkdir()
+        cv2.imwrite(str(tmp_path / name / "blank.png"), np.full((64, 64, 3), 255, dtype=np.uint8))
+    (tmp_path / "A_Person" / "broken.jpg").write_text("not an image")
+    (tmp_path / "A_Person" / "notes.txt").write_text("ignored")
+    return tmp_path
+
+
+def test_iter_image_files_sorted(photo_folder):
+    entries = list(batch_process_faces.iter_image_files(str(photo_folder)))
+
+    assert [(c, f) for c, f, _ in entries] == [
+        ("A_Person", "blank.png"),
+        ("A_Person", "broken.jpg"),
+        ("B_Person", "blank.png"),
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_process_folder_reports_failures(photo_folder, tmp_path, monkeypatch, capsys, workers):
+    monkeypatch.chdir(tmp_path)
+    out_csv = tmp_path / "features.csv"
+
+    batch_process_faces.process_folder(str(photo_folder), str(out_csv), workers=workers, timeout=120)
+    out = capsys.readouterr().out
+
+    # No faces in blank images -> no CSV, but the unreadable file is reported
+    assert not out_csv.exists()
+    assert "1 image(s) could not be analyzed" in out
+    assert "broken.jpg: unreadable" in out
+
+
+def test_process_folder_writes_analyzed_faces(photo_folder, tmp_path, monkeypatch, capsys):
+    import feature_store
+    from bench_suite import synthetic_landmarks
+
+    # Every readable image "contains" the same synthetic face
+    lms = synthetic_landmarks(1)[0]
+    monkeypatch.setattr(batch_process_faces.FaceAnalyzer, "_detect_landmarks",
+                        lambda self, img: None if img is None else lms)
+    monkeypatch.chdir(tmp_path)
+    out_csv = tmp_path / "features.csv"
+
+    batch_process_faces.process_folder(str(photo_folder), str(out_csv))
+
+    df = pd.read_csv(out_csv, encoding="utf-8-sig")
+    assert list(zip(df["Celebrity"], df["Filename"])) == [("A_Person", "blank.png"), ("B_Person", "blank.png")]
+    assert df.iloc[:, 2:].notna().all().all()
+    assert "Extracted 2 records" in capsys.readouterr().out
+    assert feature_store.is_current(feature_store.store_path(str(out_csv)), str(out_csv))
+    assert (tmp_path / "processed_samples" / "sample_1_blank.png").exists()
+
+
+def test_serial_analyzer_decodes_every_chunk_on_one_pool(photo_folder, monkeypatch):
+    import image_loader
+    pools = []
+
+    class CountingPool(batch_process_faces.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(batch_process_faces, "ThreadPoolExecutor", CountingPool)
+    monkeypatch.setattr(image_loader, "ThreadPoolExecutor", CountingPool)
+    monkeypatch.setattr(batch_process_faces.FaceAnalyzer, "_detect_landmarks", lambda self, img: None)
+    entries = list(batch_process_faces.iter_image_files(str(photo_folder)))
+
+    analyzer = batch_process_faces._SerialAnalyzer(1, 2, 2, None)
+    try:
+        for entry in entries:  # One chunk per image, like a long run
+            assert len(list(analyzer.analyze([entry]))) == 1
+    finally:
+        analyzer.close()
+
+    assert len(pools) == 1
+    assert pools[0]._shutdown
+
+
+def _fast_or_slow(image_path):
+    """Worker task for the pool tests: hangs on 'slow', dies on 'crash'."""
+    if "slow" in image_path:
+        time.sleep(60)
+    if "crash" in image_path:
+        os._exit(1)
+    return 'no_face', None, None
+
+
+def test_worker_pool_times_out_hung_and_dead_workers():
+    pool = batch_process_faces._WorkerPool(2, None, task=_fast_or_slow)
+    try:
+        entries = [("A", name, name) for name in ["a.jpg", "slow.jpg", "b.jpg", "crash.jpg", "c.jpg"]]
+        # Warm up first, so the pool's start-up does not count against the deadline
+        assert list(pool.analyze(entries[:1])) == [('no_face', None, None)]
+        pool.timeout = 10
+
+        statuses = [status for status, _, _ in pool.analyze(entries)]
+    finally:
+        pool.close()
+
+    assert statuses == ['no_face', 'timeout after 10s', 'no_face', 'error: worker process died', 'no_face']
+
+
+def test_process_folder_closes_csv_and_reports_errors(photo_folder, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+
+    def fail(*args):
+        raise PermissionError(13, "Permission denied", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(batch_process_faces, "_cached_analyze", fail)
+
+    batch_process_faces.process_folder(str(photo_folder), str(tmp_path / "features.csv"),
+                                       cache_path=str(tmp_path / "cache.sqlite"))
+    out = capsys.readouterr().out
+    assert "Permission denied" in out and "Failed to save CSV" not in out
+
+
+def test_feature_cache_roundtrip(tmp_path):
+    from feature_cache import FeatureCache
+
+    image = tmp_path / "img.png"
+    image.write_bytes(b"fake image bytes")
+
+    cache = FeatureCache(str(tmp_path / "cache.sqlite"), "v1")
+    key = cache.file_hash(str(image))
+    assert cache.get(key) is None
+
+    cache.put(key, "ok", np.arange(13, dtype=float))
+    cache.close()
+
+    # Same content -> hit after reopening; another extractor version -> miss
+    reopened = FeatureCache(str(tmp_path / "cache.sqlite"), "v1")
+    status, features = reopened.get(reopened.file_hash(str(image)))
+    assert status == "ok"
+    assert np.array_equal(features, np.arange(13))
+    assert FeatureCache(str(tmp_path / "cache.sqlite"), "v2").get(key) is None
+
+
+def test_process_folder_uses_cache(photo_folder, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    cache_path = str(tmp_path / "cache.sqlite")
+
+    batch_process_faces.process_folder(str(photo_folder), str(tmp_path / "a.csv"), cache_path=cache_path)
+    assert "Feature cache: 0 of 3 images" in capsys.readouterr().out
+
+    batch_process_faces.process_folder(str(photo_folder), str(tmp_path / "b.csv"), cache_path=cache_path)
+    out = capsys.readouterr().out
+    assert "Feature cache: 3 of 3 images" in out
+    assert "broken.jpg: unreadable" in out
+
+
+def test_feature_csv_writer_streams_chunks(tmp_path):
+    from feature_writer import FeatureCsvWriter
+    import face_geometry
+
+    path = tmp_path / "features.csv"
+    writer = FeatureCsvWriter(str(path), flush_rows=2)
+    assert not path.exists()
+
+    writer.write(["A", "B"], ["a.jpg", "b.jpg"], np.zeros((2, 13)))
+    # Flushed chunk is already on disk before close
+    assert path.read_text(encoding="utf-8-sig").count("\n") == 3
+
+    writer.write(["C"], ["c.jpg"], np.ones((1, 13)))
+    writer.close()
+
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    assert list(df.columns) == ["Celebrity", "Filename"] + face_geometry.FEATURE_NAMES
+    assert list(df["Celebrity"]) == ["A", "B", "C"]
+    assert writer.rows_written == 3
+
+
+def test_prefetch_images_keeps_order(tmp_path):
+    from image_loader import background_iter, prefetch_images
+
+    paths = []
+    for i in range(6):
+        path = tmp_path / f"{i}.png"
+        cv2.imwrite(str(path), np.full((8, 8, 3), i, dtype=np.uint8))
+        paths.append(str(path))
+    paths.insert(3, str(tmp_path / "missing.png"))
+
+    images = list(prefetch_images(background_iter(paths, depth=2), threads=3, depth=2))
+
+    assert images[3] is None
+    assert [int(img[0, 0, 0]) for img in images if img is not None] == [0, 1, 2, 3, 4, 5]
+
+
+def test_read_image_bounds_resolution(tmp_path):
+    from image_loader import jpeg_size, read_image
+
+    path = str(tmp_path / "large.jpg")
+    cv2.imwrite(path, np.zeros((3000, 2000, 3), dtype=np.uint8))
+
+    assert jpeg_size(path) == (2000, 3000)
+    assert read_image(path).shape == (3000, 2000, 3)
+    assert max(read_image(path, max_side=640).shape[:2]) == 640
+    # Never upscales
+    assert read_image(path, max_side=5000).shape == (3000, 2000, 3)
@@ -0,0 +1,58 @@
+import json
+import pytest
+import bench_suite
+
+
+def baseline(**medians):
+    return {'stages': {stage: {'median_ms': ms} for stage, ms in medians.items()}}
+
+
+def test_compare_flags_only_real_slowdowns():
+    results = {
+        'predict_single': {'median_ms': 0.5},   # 2x slower
+        'load_model': {'median_ms': 22.0},      # Within tolerance
+        'train': {'median_ms': 5000.0},         # 2x faster
+        'eye_metrics': {'median_ms': 0.03},     # 3x, but below the noise floor
+        'predict_batch_32': {'median_ms': 3.0},
+    }
+    rows = bench_suite.compare(results, baseline(predict_single=0.25, load_model=20.0, train=10000.0,
+                                                 eye_metrics=0.01))
+
+    assert {row['stage']: row['status'] for row in rows} == {
+        'predict_single': 'REGRESSION', 'load_model': 'ok', 'train': 'faster',
+        'eye_metrics': 'ok', 'predict_batch_32': 'no baseline',
+    }
+
+
+def test_stage_tolerance_overrides_default():
+    base = baseline(train=10000.0)
+    base['stages']['train']['tolerance'] = 1.0
+
+    assert bench_suite.compare({'train': {'median_ms': 18000.0}}, base)[0]['status'] == 'ok'
+    assert bench_suite.compare({'train': {'median_ms': 21000.0}}, base)[0]['status'] == 'REGRESSION'
+
+
+def test_run_suite_and_baseline_roundtrip(tmp_path):
+    results = bench_suite.run_suite(['measure_face', 'calculate_ratios', 'eye_metrics'], repeat=5)
+
+    assert list(results) == ['measure_face', 'calculate_ratios', 'eye_metrics']
+    for result in results.values():
+        assert result['calls'] == 5 and 0 < result['min_ms'] <= result['median_ms'] <= result['p95_ms']
+
+    # Re-recording keeps a tolerance set by hand
+    path = str(tmp_path / "baseline.json")
+    bench_suite.save_baseline(results, path)
+    with open(path) as f:
+        stored = json.load(f)
+    stored['stages']['eye_metrics']['tolerance'] = 2.0
+    with open(path, 'w') as f:
+        json.dump(stored, f)
+    bench_suite.save_baseline(results, path)
+    with open(path) as f:
+        stored = json.load(f)
+    assert stored['stages']['eye_metrics']['tolerance'] == 2.0
+    assert stored['stages']['measure_face']['tolerance'] == bench_suite.DEFAULT_TOLERANCE
+    assert all(row['status'] == 'ok' for row in bench_suite.compare(results, stored))
+
+    with pytest.raises(ValueError):
+        bench_suite.run_suite(['gpu'])
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from budgeted_search import HalvingSearch, make_search, search_summary
+
+
+PARAMS = {
+    'classifier__n_estimators': [9, 18],
+    'classifier__learning_rate': [0.05, 0.1, 0.2],
+    'classifier__max_depth': [2, 3],
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = (X[:, 0] + 0.5 * X[:, 1] + rng.normal(0, 0.5, 120) > 0).astype(int)
+    return X, y
+
+
+def pipeline():
+    return Pipeline([('scaler', StandardScaler()),
+                     ('classifier', XGBClassifier(n_jobs=1, eval_metric='logloss'))])
+
+
+def test_halving_narrows_candidates_and_refits_at_full_size(data):
+    X, y = data
+    search = HalvingSearch(pipeline(), PARAMS, n_candidates=9, factor=3, n_jobs=1).fit(X, y)
+
+    assert [entry['candidates'] for entry in search.history_] == [9, 3]
+    assert [entry['fraction'] for entry in search.history_] == pytest.approx([1 / 3, 1])
+    assert search.n_fits_ == (9 + 3) * 3
+
+    # The winner is refit with its full number of trees
+    assert search.best_estimator_.named_steps['classifier'].n_estimators == search.best_params_['classifier__n_estimators']
+    assert search.best_score_ == search.history_[-1]['best_score']
+    assert "halving (9 -> 3 candidates)" in search_summary(search, 1.0)
+
+
+def test_time_budget_stops_the_search_early(data):
+    X, y = data
+    search = HalvingSearch(pipeline(), PARAMS, n_candidates=9, time_budget=1e-6, n_jobs=1).fit(X, y)
+
+    # Only the first batch of the first round fits in the budget; a model is still returned
+    assert len(search.history_) == 1 and search.history_[0]['candidates'] == 1
+    assert search.best_estimator_.predict(X).shape == (len(X),)
+
+
+def test_make_search_modes():
+    assert isinstance(make_search(pipeline(), PARAMS, 5), RandomizedSearchCV)
+    assert make_search(pipeline(), PARAMS, 5, search='halving', time_budget=3).n_candidates == 15
+    with pytest.raises(ValueError):
+        make_search(pipeline(), PARAMS, 5, search='grid')
@@ -0,0 +1,91 @@
+import threading
+import numpy as np
+from unittest.mock import patch
+
+import camera_grabber
+
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: hands out numbered frames until exhausted."""
+
+    def __init__(self, source, n_frames=5):
+        self.opened = source == 1
+        self.remaining = n_frames
+        self.count = 0
+        self.done = threading.Event()
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return True
+
+    def read(self):
+        if self.remaining == 0:
+            self.done.set()
+            return False, None
+        self.remaining -= 1
+        self.count += 1
+        return True, np.full((4, 4, 3), self.count, dtype=np.uint8)
+
+    def release(self):
+        self.opened = False
+
+
+def test_grabber_keeps_newest_frame_and_counts_drops():
+    captures = []
+
+    def make_capture(source):
+        captures.append(FakeCapture(source))
+        return captures[-1]
+
+    with patch.object(camera_grabber.cv2, "VideoCapture", side_effect=make_capture):
+        grabber = camera_grabber.CameraGrabber(sources=(0, 1), buffer_size=2)
+        assert grabber.latest() is None
+        assert grabber.start()  # Falls back to the second source
+
+        assert captures[-1].done.wait(timeout=5)
+        seq, timestamp, frame = grabber.latest()
+        grabber.stop()
+
+    assert seq == 5 and frame[0, 0, 0] == 5
+    assert timestamp > 0
+    assert grabber.frames_grabbed == 5
+    assert grabber.frames_dropped == 4
+    assert grabber.read_failures >= 1
+
+
+def test_grabber_reports_missing_camera():
+    with patch.object(camera_grabber.cv2, "VideoCapture", side_effect=lambda s: FakeCapture(-1)):
+        grabber = camera_grabber.CameraGrabber(sources=(0, 1))
+        assert not grabber.start()
+        assert not grabber.is_opened()
+
+
+def test_stop_leaves_the_release_to_a_thread_stuck_in_a_read(monkeypatch):
+    unblock = threading.Event()
+    capture = FakeCapture(1)
+    in_read = threading.Event()
+
+    def blocking_read():
+        in_read.set()
+        unblock.wait(timeout=5)
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    capture.read = blocking_read
+    monkeypatch.setattr(camera_grabber.CameraGrabber, "STOP_TIMEOUT", 0.05)
+    with patch.object(camera_grabber.cv2, "VideoCapture", return_value=capture):
+        grabber = camera_grabber.CameraGrabber(sources=(1,))
+        assert grabber.start()
+        thread = grabber.thread
+        assert in_read.wait(timeout=5)
+
+        grabber.stop()
+        assert capture.opened  # Not released under the read
+
+        unblock.set()
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not capture.opened
+    assert grabber.latest() is None  # The frame read after stop() is dropped
@@ -1,7 +1,10 @@
 import os
 import joblib
+import numpy as np
 import pandas as pd
 import pytest
+import destiny_predictor
+import tree_engine
 from destiny_predictor import DestinyPredictor
 
 
@@ -77,11 +80,7 @@ def test_predict_with_general_model(tmp_path, monkeypatch):
     Test prediction using the GENERAL model (multi-output).
     Ensure that each predicted target gets mapped to the correct text.
     """
-    class OM:
-        ALL_FEATURES = ["x", "y"]
-
-    import destiny_predictor
-    monkeypatch.setattr(destiny_predictor, "othermodels", OM)
+    monkeypatch.setattr(destiny_predictor, "FEATURE_NAMES", ["x", "y"])
 
     brain = {
         "meaning_map": {"career": {3: "excellent"}},
@@ -100,4 +99,151 @@ def test_predict_with_general_model(tmp_path, monkeypatch):
     out = dp.predict_fortune({"x": 1, "y": 2})
 
     assert "Career" in out
-    assert out["Career"]["sentence"] == "excellent"
\ No newline at end of file
+    assert out["Career"]["sentence"] == "excellent"
+
+class DummyBatchModel:
+    """Mock model labelling each row by the sign of its first feature."""
+    def predict(self, X):
+        return (X[:, 0] > 0).astype(int)
+
+
+def test_predict_fortune_batch_matches_single(tmp_path, monkeypatch):
+    """
+    Batch predictions must equal row-by-row predict_fortune, for arrays and dict lists alike.
+    """
+    monkeypatch.setattr(destiny_predictor, "FEATURE_NAMES", ["x", "y"])
+
+    brain = {
+        "meaning_map": {"wealth": {0: "modest", 1: "rich"}},
+        "Wealth": DummyBatchModel()
+    }
+    joblib.dump(brain, tmp_path / "destiny_brain.pkl")
+
+    monkeypatch.chdir(tmp_path)
+    dp = DestinyPredictor()
+
+    rows = [{"x": -1.0, "y": 0.0}, {"x": 2.0}, {"x": 0.5, "y": 1.0}]
+    batch = dp.predict_fortune_batch(rows)
+
+    assert [r["Wealth"]["sentence"] for r in batch] == ["modest", "rich", "rich"]
+    assert batch == [dp.predict_fortune(r) for r in rows]
+    assert dp.predict_fortune_batch(np.array([[-1.0, 0.0], [2.0, 0.0], [0.5, 1.0]])) == batch
+
+
+def test_predict_fortune_batch_rejects_wrong_width(tmp_path, monkeypatch):
+    joblib.dump({"meaning_map": {}, "Wealth": DummyBatchModel()}, tmp_path / "destiny_brain.pkl")
+    monkeypatch.chdir(tmp_path)
+    dp = DestinyPredictor()
+
+    out = dp.predict_fortune_batch(np.zeros((2, 3)))
+
+    assert len(out) == 2
+    assert out[0]["Error"]["sentence"].startswith("Data processing failed")
+
+
+class CountingModel:
+    """Mock model counting how often it is evaluated."""
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        self.last_input = X.copy()
+        return (X[:, 0] > 0).astype(int)
+
+
+def test_prediction_cache_hits_and_invalidation(tmp_path, monkeypatch):
+    """
+    Repeated (quantized) inputs are served from the cache until the model file changes.
+    """
+    joblib.dump({"meaning_map": {"wealth": {0: "modest", 1: "rich"}}, "Wealth": CountingModel()},
+                tmp_path / "destiny_brain.pkl")
+    monkeypatch.chdir(tmp_path)
+    dp = DestinyPredictor(cache_size=2, cache_decimals=3)
+    model = dp.models["Wealth"]
+
+    # Only the cache key is quantized: the model sees the real input
+    uncached = DestinyPredictor().predict_fortune({"face_lw_ratio": 0.0004})
+    assert dp.predict_fortune({"face_lw_ratio": 0.0004}) == uncached
+    assert model.last_input[0, 0] == 0.0004
+    assert DestinyPredictor().cache_size == 0  # Off unless asked for
+    dp.clear_cache()
+    model.calls = 0
+    dp.cache_hits = dp.cache_misses = 0
+
+    first = dp.predict_fortune({"face_lw_ratio": 0.5})
+    again = dp.predict_fortune({"face_lw_ratio": 0.5000001})  # Same after quantization
+
+    assert again == first
+    assert model.calls == 1
+    assert dp.cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'max_size': 2}
+
+    # Bounded: the least recently used entry is evicted
+    dp.predict_fortune({"face_lw_ratio": -1.0})
+    dp.predict_fortune({"face_lw_ratio": 2.0})
+    assert len(dp.cache) == 2
+    dp.predict_fortune({"face_lw_ratio": 0.5})
+    assert model.calls == 4
+
+    # Touching the model file reloads the models and empties the cache
+    stat = os.stat("destiny_brain.pkl")
+    os.utime("destiny_brain.pkl", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    dp.predict_fortune({"face_lw_ratio": 0.5})
+    assert dp.models["Wealth"] is not model
+    assert dp.models["Wealth"].calls == 1
+    assert len(dp.cache) == 1
+
+
+def test_warm_up_leaves_the_cache_untouched(tmp_path, monkeypatch):
+    joblib.dump({"meaning_map": {}, "Wealth": CountingModel()}, tmp_path / "destiny_brain.pkl")
+    monkeypatch.chdir(tmp_path)
+    dp = DestinyPredictor(cache_size=2)
+
+    dp.warm_up()
+
+    assert dp.plan is not None
+    assert dp.models["Wealth"].calls == 1
+    assert dp.cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'max_size': 2}
+
+    # Without models there is nothing to warm up
+    (tmp_path / "empty").mkdir()
+    monkeypatch.chdir(tmp_path / "empty")
+    unloaded = DestinyPredictor()
+    unloaded.warm_up()
+    assert unloaded.plan is None
+
+
+def stump(sign):
+    """Compiled one-split forest: positive class when sign * x > 0."""
+    return tree_engine.CompiledForest(
+        feature=[0, 0, 0], threshold=[0.0, np.inf, np.inf], left=[1, 1, 2], right=[2, 1, 2],
+        default_left=[True, True, True], value=[0.0, -sign, sign], roots=[0], classes=[0, 1]
+    )
+
+
+def test_compiled_categories_load_on_demand(tmp_path, monkeypatch):
+    """
+    Only the requested categories' model files are loaded, and a compiled brain built for
+    other feature columns is ignored.
+    """
+    monkeypatch.setattr(destiny_predictor, "FEATURE_NAMES", ["x", "y"])
+    monkeypatch.chdir(tmp_path)
+    tree_engine.save_compiled({"Wealth": stump(1), "Health": stump(-1),
+                               "meaning_map": {"wealth": {0: "modest", 1: "rich"}}},
+                              tree_engine.COMPILED_DIR, feature_names=["x", "y"])
+
+    dp = DestinyPredictor(categories=["Wealth"])
+    assert dp.is_compiled and dp.models.loaded == {}
+
+    assert dp.predict_fortune({"x": 2.0})["Wealth"]["sentence"] == "rich"
+    assert list(dp.models.loaded) == ["Wealth"]
+
+    monkeypatch.setattr(destiny_predictor, "FEATURE_NAMES", ["y", "x"])
+    assert DestinyPredictor().is_ready is False  # No .pkl to fall back to
+
+
+def test_import_keeps_the_training_stack_out():
+    """The compiled runtime path must not pull in the ML libraries at import time."""
+    import startup
+    heavy = startup.profile_imports('destiny_predictor')['heavy']
+    assert not {'xgboost', 'lightgbm', 'sklearn', 'pandas', 'joblib'} & set(heavy)
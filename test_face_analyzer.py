@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 import pytest
 from face_analyzer import FaceAnalyzer
+from eye_feature_extractor import EyeFeatureExtractor
+import face_geometry
 
 
 def test_face_analyzer_init():
@@ -88,4 +90,181 @@ def test_ratio_calculation():
 
     for key in expected_ratio_keys:
         assert key in ratios
-        assert isinstance(ratios[key], float)
\ No newline at end of file
+        assert isinstance(ratios[key], float)
+
+def _baseline_ratios(lms):
+    """
+    The scalar FaceAnalyzer._measure_face + _calculate_ratios from before face_geometry,
+    copied verbatim (less comments) as the reference for the vectorized engine.
+    """
+    pts = {
+        'chin': lms[152], 'chin_l': lms[176], 'chin_r': lms[400],
+        'nose_tip': lms[1], 'nose_bridge': lms[168],
+        'nose_l': lms[48], 'nose_r': lms[331],
+        'brow_mid': (lms[70] + lms[300]) / 2,
+        'brow_center': (lms[105] + lms[334]) / 2,
+        'face_l': lms[234], 'face_r': lms[454],
+        'jaw_l_pt': lms[172], 'jaw_r_pt': lms[288],
+        'mouth_l': lms[61], 'mouth_r': lms[291],
+        'mouth_l_top': lms[37], 'mouth_l_mid': lms[82], 'mouth_l_bottom': lms[84],
+        'mouth_r_top': lms[267], 'mouth_r_mid': lms[312], 'mouth_r_bottom': lms[314],
+        'top_forehead': lms[10],
+        'eye_l_in': lms[133], 'eye_r_in': lms[362]
+    }
+
+    def dist(p1, p2): return np.linalg.norm(p1 - p2)
+
+    def angle(p1, p2, p3):
+        v1 = p1 - p2
+        v2 = p3 - p2
+        dot = np.dot(v1, v2)
+        norm = np.linalg.norm(v1) * np.linalg.norm(v2)
+        if norm == 0: return 0.0
+        return np.degrees(np.arccos(np.clip(dot / norm, -1.0, 1.0)))
+
+    forehead_h = 1.7 * dist(pts['top_forehead'], pts['brow_mid'])
+    m = {
+        'face_width': dist(pts['face_l'], pts['face_r']),
+        'face_length': dist(pts['brow_mid'], pts['chin']) + forehead_h,
+        'forehead_height': forehead_h,
+        'midface_height': dist(pts['nose_tip'], pts['brow_center']),
+        'lower_face_height': dist(pts['nose_tip'], pts['chin']),
+        'eye_distance': dist(pts['eye_l_in'], pts['eye_r_in']),
+        'nose_width': dist(pts['nose_l'], pts['nose_r']),
+        'nose_length': dist(pts['nose_bridge'], pts['nose_tip']),
+        'mouth_width': dist(pts['mouth_l'], pts['mouth_r']),
+        'chin_width': dist(pts['chin_l'], pts['chin_r']),
+        'upper_lip_h': (dist(pts['mouth_l_top'], pts['mouth_l_mid']) + dist(pts['mouth_r_top'], pts['mouth_r_mid'])) / 2,
+        'lower_lip_h': (dist(pts['mouth_l_bottom'], pts['mouth_l_mid'])
+                        + dist(pts['mouth_r_bottom'], pts['mouth_r_mid'])) / 2,
+        'jaw_angle_left': angle(pts['face_l'], pts['jaw_l_pt'], pts['chin_l']),
+        'jaw_angle_right': angle(pts['face_r'], pts['jaw_r_pt'], pts['chin_r']),
+    }
+    return {
+        "face_lw_ratio": m['face_width'] / m['face_length'],
+        "forehead_ratio": m['forehead_height'] / m['face_length'],
+        "midface_ratio": m['midface_height'] / m['face_length'],
+        "lowerface_ratio": m['lower_face_height'] / m['face_length'],
+        "eye_distance_ratio": m['eye_distance'] / m['face_width'],
+        "nose_ratio": m['nose_width'] / m['nose_length'] if m['nose_length'] > 0 else 0,
+        "mouth_chin_ratio": m['mouth_width'] / m['chin_width'] if m['chin_width'] > 0 else 0,
+        "jaw_angle": (m['jaw_angle_left'] + m['jaw_angle_right']) / 2,
+        "upper_lip_ratio": m['upper_lip_h'] / m['mouth_width'] if m['mouth_width'] > 0 else 0,
+        "lower_lip_ratio": m['lower_lip_h'] / m['mouth_width'] if m['mouth_width'] > 0 else 0
+    }
+
+
+def test_batched_geometry_matches_pre_vectorization_math():
+    analyzer = FaceAnalyzer()
+    stack = np.random.default_rng(0).random((4, 478, 2))
+    # Degenerate faces hit the zero-denominator branches: collapsed nose, chin and mouth
+    stack[1, [168, 1]] = stack[1, 1]
+    stack[2, [176, 400]] = stack[2, 176]
+    stack[3, [61, 291]] = stack[3, 61]
+
+    matrix = face_geometry.featurize(stack)
+    assert matrix.shape == (4, len(face_geometry.FEATURE_NAMES))
+
+    for i, lms in enumerate(stack):
+        expected = _baseline_ratios(lms)
+        expected.update(EyeFeatureExtractor(lms).extract_metrics())
+        measured = analyzer._calculate_ratios(analyzer._measure_face(lms)[0])
+
+        for j, name in enumerate(face_geometry.FEATURE_NAMES):
+            assert matrix[i, j] == pytest.approx(expected[name], rel=1e-12, abs=1e-12), name
+            if name in measured:
+                assert measured[name] == pytest.approx(expected[name], rel=1e-12, abs=1e-12), name
+
+
+def test_landmarks_to_array_fills_preallocated_buffer():
+    class Lm:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    lms = [Lm(i * 0.1, i * 0.2) for i in range(5)]
+    out = np.zeros((5, 2))
+    result = face_geometry.landmarks_to_array(lms, out=out)
+
+    assert result is out
+    assert np.allclose(out[:, 0], [0.0, 0.1, 0.2, 0.3, 0.4])
+    assert np.allclose(out[:, 1], [0.0, 0.2, 0.4, 0.6, 0.8])
+
+
+def test_process_batch_no_faces():
+    analyzer = FaceAnalyzer()
+    blank = np.ones((200, 200, 3), dtype=np.uint8) * 255
+    features, valid = analyzer.process_batch([blank, None])
+
+    assert features.shape == (2, len(face_geometry.FEATURE_NAMES))
+    assert np.isnan(features).all()
+    assert not valid.any()
+    assert analyzer.batch_landmarks is None
+
+
+def test_feature_names_match_training_order():
+    import othermodels
+    assert face_geometry.FEATURE_NAMES == othermodels.ALL_FEATURES
+
+
+def test_streaming_analyzer_no_face_resets_roi():
+    from stream_analyzer import StreamingFaceAnalyzer
+
+    analyzer = StreamingFaceAnalyzer()
+    analyzer.roi = (0.2, 0.2, 0.8, 0.8)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    assert analyzer.process_frame(frame) is None
+    assert analyzer.roi is None
+    assert analyzer.landmarks_np is None
+
+
+def test_streaming_analyzer_roi_is_stable_while_face_inside():
+    from stream_analyzer import StreamingFaceAnalyzer
+
+    analyzer = StreamingFaceAnalyzer(roi_margin=0.5)
+    lms = np.array([[0.4, 0.4], [0.6, 0.6]])
+
+    analyzer._update_roi(lms)
+    roi = analyzer.roi
+    assert roi == pytest.approx((0.3, 0.3, 0.7, 0.7))
+
+    # Small movement inside the ROI keeps the crop, leaving it moves the crop
+    analyzer._update_roi(lms + 0.02)
+    assert analyzer.roi == roi
+    analyzer._update_roi(lms + 0.2)
+    assert analyzer.roi != roi
+
+
+def test_streaming_analyzer_maps_roi_landmarks_to_the_full_frame(monkeypatch):
+    from stream_analyzer import StreamingFaceAnalyzer
+
+    analyzer = StreamingFaceAnalyzer()
+    crops = []
+
+    def detect(image):
+        crops.append(image.shape[:2])
+        return np.array([[0.0, 0.0], [0.5, 0.5], [1.0, 1.0]])
+    monkeypatch.setattr(analyzer, "_detect_landmarks", detect)
+
+    # ROI (0.25, 0.5)-(0.75, 1.0) of a 200x400 frame is the 100x200 crop at x=100, y=100
+    lms = analyzer._detect_in_roi(np.zeros((200, 400, 3), dtype=np.uint8), (0.25, 0.5, 0.75, 1.0))
+
+    assert crops == [(100, 200)]
+    np.testing.assert_allclose(lms, [[0.25, 0.5], [0.5, 0.75], [0.75, 1.0]])
+
+
+def test_streaming_analyzer_smooths_landmarks_across_frames(monkeypatch):
+    from stream_analyzer import StreamingFaceAnalyzer
+
+    analyzer = StreamingFaceAnalyzer(smoothing=0.25)
+    base = np.random.default_rng(0).uniform(0.3, 0.7, size=(face_geometry.NUM_LANDMARKS, 2))
+    frames = iter([base, base + 0.04])
+    monkeypatch.setattr(analyzer, "_detect_landmarks", lambda image: next(frames).copy())
+    monkeypatch.setattr(analyzer, "_detect_in_roi", lambda frame, roi: analyzer._detect_landmarks(frame))
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    assert analyzer.process_frame(frame) is not None
+    np.testing.assert_allclose(analyzer.landmarks_np, base)
+    # Newest landmarks weigh 0.25, the running average 0.75
+    analyzer.process_frame(frame)
+    np.testing.assert_allclose(analyzer.landmarks_np, base + 0.01)
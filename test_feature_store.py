@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import face_geometry
+import feature_store
+import othermodels
+from feature_writer import FeatureCsvWriter
+
+
+@pytest.fixture
+def merged_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'Celebrity': ['A', 'B', 'C', 'D'], 'Filename': ['a.jpg', 'b.jpg', 'c.jpg', 'd.jpg']})
+    frame[othermodels.ALL_FEATURES] = rng.uniform(0, 1, (4, len(othermodels.ALL_FEATURES))).round(3)
+    frame['Career'] = [1, 0, None, 1]  # One missing label
+    frame['Wealth'] = [0, 1, 1, 0]
+    path = tmp_path / "merged.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def test_load_data_reads_the_store_without_copying(merged_csv):
+    csv_X, csv_y = othermodels.load_data(merged_csv)
+    path = feature_store.convert_csv(merged_csv)
+    assert path.endswith("merged.store")
+
+    X, y = othermodels.load_data(merged_csv)
+
+    # float32 features straight from the memory-mapped file
+    assert (X.dtypes == np.float32).all() and not X.values.flags.writeable
+    np.testing.assert_allclose(X.values, csv_X.values, rtol=1e-6)
+    # int8 labels, missing labels filled with 0 like the CSV path
+    assert (y.dtypes == np.int8).all() and list(y.columns) == ['Career', 'Wealth']
+    np.testing.assert_array_equal(y.values, csv_y.values)
+    assert feature_store.FeatureStore(path).text['Celebrity'].tolist() == ['A', 'B', 'C', 'D']
+
+
+def test_changed_csv_falls_back_to_parsing(merged_csv, capsys):
+    feature_store.convert_csv(merged_csv)
+    with open(merged_csv, 'a') as f:
+        f.write("E,e.jpg," + ",".join(["0.5"] * 13) + ",1,1\n")
+
+    X, _ = othermodels.load_data(merged_csv)
+    assert len(X) == 5 and X.dtypes.iloc[0] == np.float64
+    assert "out of date" in capsys.readouterr().out
+
+
+def test_append_and_update_labels(merged_csv):
+    path = feature_store.convert_csv(merged_csv)
+    new = pd.read_csv(merged_csv).tail(1).assign(Celebrity='E')
+    feature_store.append_rows(path, new)
+    feature_store.update_labels(path, [2], [[1, None]])
+
+    store = feature_store.FeatureStore(path)
+    assert store.rows == 5 and store.text['Celebrity'][-1] == 'E'
+    np.testing.assert_array_equal(store.labels[:, 0], [1, 0, 1, 1, 1])
+    assert store.labels[2, 1] == feature_store.MISSING_LABEL
+
+    with pytest.raises(ValueError):
+        feature_store.append_rows(path, new.drop(columns='Wealth'))
+
+
+def test_feature_writer_writes_matching_store(tmp_path):
+    csv_path = str(tmp_path / "features.csv")
+    with FeatureCsvWriter(csv_path, flush_rows=1, store_path=feature_store.store_path(csv_path)) as writer:
+        writer.write(["A", "B"], ["a.jpg", "b.jpg"], np.full((2, 13), 0.25))
+        writer.write(["C"], ["c.jpg"], np.ones((1, 13)))
+
+    path = feature_store.store_path(csv_path)
+    assert feature_store.is_current(path, csv_path)
+    store = feature_store.FeatureStore(path)
+    assert store.feature_names == face_geometry.FEATURE_NAMES and store.label_names == []
+    assert store.text['Filename'].tolist() == ["a.jpg", "b.jpg", "c.jpg"]
+    np.testing.assert_array_equal(store.features[:, 0], [0.25, 0.25, 1.0])
+
+
+def test_chunked_convert_matches_in_memory_store(merged_csv, tmp_path):
+    chunked = feature_store.FeatureStore(feature_store.convert_csv(merged_csv, chunk_rows=3))
+    feature_store.write_store(pd.read_csv(merged_csv), str(tmp_path / "whole.store"))
+    whole = feature_store.FeatureStore(str(tmp_path / "whole.store"))
+
+    assert {k: v for k, v in chunked.manifest.items() if k != 'source'} == \
+           {k: v for k, v in whole.manifest.items() if k != 'source'}
+    np.testing.assert_array_equal(chunked.features, whole.features)
+    np.testing.assert_array_equal(chunked.labels, whole.labels)
+    for column in whole.text:
+        assert chunked.text[column].tolist() == whole.text[column].tolist()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from lightgbm import LGBMClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+import tree_engine
+from inference_plan import InferencePlan
+from love_model import LoveModel, LOVE_FEATURES
+import othermodels
+
+
+def xgb_pipeline(n_estimators, max_depth):
+    return Pipeline([('scaler', StandardScaler()),
+                     ('classifier', XGBClassifier(n_estimators=n_estimators, max_depth=max_depth))])
+
+
+@pytest.fixture(scope="module")
+def brain():
+    """A small pickled-style brain: Love, two specialized models and a GENERAL model."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(0.5, 0.2, size=(300, len(othermodels.ALL_FEATURES)))
+    y = (X[:, 0] + X[:, 5] + rng.normal(0, 0.1, 300) > 1).astype(int)
+
+    love = LoveModel()
+    love.model = Pipeline([('scaler', StandardScaler()),
+                           ('classifier', LGBMClassifier(n_estimators=20, num_leaves=7, verbose=-1))])
+    X_love = pd.DataFrame(X, columns=othermodels.ALL_FEATURES)[LOVE_FEATURES].values.astype(np.float32)
+    love.model.fit(X_love, y)
+
+    general = Pipeline([('scaler', StandardScaler()),
+                        ('classifier', MultiOutputClassifier(XGBClassifier(n_estimators=10, max_depth=2)))])
+    general.fit(X, np.column_stack([y, 1 - y]))
+
+    return X, {
+        'Love': love,
+        'Wealth': xgb_pipeline(15, 3).fit(X, y),
+        'Health': xgb_pipeline(40, 4).fit(X, 1 - y),
+        'GENERAL': {'model': general, 'targets': ['Career', 'Social']},
+    }
+
+
+def separate_predictions(models, X):
+    """Every model run on its own, as DestinyPredictor did before the plan."""
+    results = {'Love': models['Love'].predict_array(X, othermodels.ALL_FEATURES)}
+    for label in ['Wealth', 'Health']:
+        results[label] = models[label].predict(X)
+    gen_preds = models['GENERAL']['model'].predict(X)
+    for i, target in enumerate(models['GENERAL']['targets']):
+        results[target] = gen_preds[:, i]
+    return results
+
+
+def test_pickled_models_share_scaling(brain):
+    X, models = brain
+    plan = InferencePlan(models, othermodels.ALL_FEATURES)
+
+    # Love has its own features; the other pipelines were fit on the same data -> one scaler
+    assert [len(group.members) for group in plan.groups] == [1, 3]
+    assert plan.fused is None and plan.others == []
+
+    results = plan.predict(X)
+    expected = separate_predictions(models, X)
+    assert list(results) == ['Love', 'Wealth', 'Health', 'Career', 'Social']
+    for label, preds in expected.items():
+        np.testing.assert_array_equal(results[label], preds)
+
+
+def test_compiled_models_run_in_one_fused_pass(brain):
+    X, models = brain
+    plan = InferencePlan(tree_engine.compile_brain(models), othermodels.ALL_FEATURES)
+
+    assert plan.groups == [] and plan.others == []
+    assert len(plan.fused.forests) == 5
+
+    # Rows on both sides of the chunk size, with missing values
+    X_check = X.copy()
+    X_check[::9, 3] = np.nan
+    expected = separate_predictions(models, X_check)
+    for rows in (X_check[:1], X_check):
+        results = plan.predict(rows)
+        for label, preds in expected.items():
+            np.testing.assert_array_equal(results[label], preds[:len(rows)])
+
+
+def test_profile_reports_every_model(brain):
+    X, models = brain
+    plan = InferencePlan(tree_engine.compile_brain(models), othermodels.ALL_FEATURES)
+
+    report = plan.profile(X[:1], repeat=2)
+
+    assert {'plan total', 'fused forests', 'Love', 'Wealth', 'Health',
+            'GENERAL/Career', 'GENERAL/Social'} <= set(report)
+    assert all(ms >= 0 for ms in report.values())
+    assert 'fused forests' in plan.timings
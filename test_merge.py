@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import feature_store
+import merge
+from merge import MergeEngine
+
+
+def features_df(rows):
+    """rows: (celebrity, filename, ratio) tuples in celebrity_face_features.csv layout."""
+    return pd.DataFrame(rows, columns=['Celebrity', 'Filename', 'face_lw_ratio'])
+
+
+LABELS = pd.DataFrame({'Celebrity': ['Elon Musk', 'Reed_Hastings', 'Oprah Winfrey'],
+                       'Career': [1, 0, 1], 'Love': [0, 1, 1]})
+FEATURES = features_df([('Elon_Musk', 'a.jpg', 0.5), ('Reed  Hastings ', 'b.jpg', 0.25),
+                        ('Elon Musk', 'c.jpg', 0.75)])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    with MergeEngine(str(tmp_path / "merged.csv"), str(tmp_path / "index.sqlite")) as engine:
+        yield engine
+
+
+def read_merged(engine):
+    return pd.read_csv(engine.merged_path)
+
+
+def test_clean_names_matches_clean_name():
+    names = pd.Series(['Elon Musk', ' Elon_Musk ', 'Reed__Hastings', 'a _ b', '_x_', 'Oprah\tWinfrey'])
+    assert merge.clean_names(names).tolist() == [merge.clean_name(name) for name in names]
+
+
+def test_sync_matches_full_left_join(engine, tmp_path):
+    FEATURES.to_csv(tmp_path / "features.csv", index=False)
+    LABELS.to_csv(tmp_path / "labels.csv", index=False)
+
+    report = engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+
+    expected = FEATURES.assign(key=FEATURES['Celebrity'].apply(merge.clean_name)).merge(
+        LABELS.assign(key=LABELS['Celebrity'].apply(merge.clean_name)).drop(columns='Celebrity'),
+        on='key', how='left').drop(columns='key')
+    pd.testing.assert_frame_equal(read_merged(engine), expected)
+    assert report['rebuilt'] and report['total_rows'] == 3
+    assert report['unmatched'] == [] and report['unused_labels'] == ['Oprah_Winfrey']
+
+    # Nothing changed: nothing is merged again
+    report = engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+    assert not report['rebuilt'] and report['appended'] == 0 and report['patched_rows'] == 0
+
+
+def test_appends_and_label_updates_touch_only_new_rows(engine, tmp_path):
+    engine.update_labels(LABELS)
+    engine.append_features(FEATURES)
+    with open(engine.merged_path, 'rb') as f:
+        before = f.read()
+
+    # 1. New feature rows (one already merged, one without labels) are appended
+    report = engine.append_features(features_df([('Elon_Musk', 'a.jpg', 0.5), ('Oprah_Winfrey', 'd.jpg', 0.1),
+                                                 ('Bill Gates', 'e.jpg', 0.2)]))
+    assert (report['appended'], report['skipped'], report['unmatched']) == (2, 1, ['Bill_Gates'])
+    with open(engine.merged_path, 'rb') as f:
+        assert f.read().startswith(before)
+    assert engine.unmatched() == ['Bill_Gates']
+    assert read_merged(engine)['Career'].isna().tolist() == [False, False, False, False, True]
+
+    # 2. Labels for the unmatched row and a changed label are patched into the existing rows
+    labels = pd.concat([LABELS, pd.DataFrame({'Celebrity': ['Bill_Gates'], 'Career': [1], 'Love': [0]})])
+    labels.loc[labels['Celebrity'] == 'Elon Musk', 'Love'] = 1
+    report = engine.update_labels(labels)
+    assert report['new_labels'] == ['Bill_Gates'] and report['changed_labels'] == ['Elon_Musk']
+    assert report['patched_rows'] == 3
+    assert engine.unmatched() == []
+
+    # Same bytes as merging everything from scratch
+    all_features = pd.concat([FEATURES, features_df([('Oprah_Winfrey', 'd.jpg', 0.1), ('Bill Gates', 'e.jpg', 0.2)])])
+    with MergeEngine(str(tmp_path / "full.csv"), str(tmp_path / "full.sqlite")) as full:
+        full.rebuild(all_features, labels)
+    with open(engine.merged_path, 'rb') as f, open(full.merged_path, 'rb') as g:
+        assert f.read() == g.read()
+
+    # The binary store followed every append and patch
+    assert feature_store.is_current(engine.store_path, engine.merged_path)
+    store = feature_store.FeatureStore(engine.store_path)
+    merged = read_merged(engine)
+    np.testing.assert_array_equal(store.labels, merged[['Career', 'Love']].values)
+    np.testing.assert_array_equal(store.features[:, 0], merged['face_lw_ratio'].astype(np.float32))
+
+
+def test_sync_rewrites_rows_with_changed_feature_values(engine, tmp_path):
+    LABELS.to_csv(tmp_path / "labels.csv", index=False)
+    FEATURES.to_csv(tmp_path / "features.csv", index=False)
+    engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+
+    # Re-extracted images: one value keeps its line length, one makes the line longer
+    features = FEATURES.copy()
+    features.loc[0, 'face_lw_ratio'] = 0.9
+    features.loc[2, 'face_lw_ratio'] = 0.123456
+    features.to_csv(tmp_path / "features.csv", index=False)
+    report = engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+
+    assert not report['rebuilt'] and (report['appended'], report['updated']) == (0, 2)
+    assert read_merged(engine)['face_lw_ratio'].tolist() == [0.9, 0.25, 0.123456]
+    with MergeEngine(str(tmp_path / "full.csv"), str(tmp_path / "full.sqlite")) as full:
+        full.rebuild(features, LABELS)
+    with open(engine.merged_path, 'rb') as f, open(full.merged_path, 'rb') as g:
+        assert f.read() == g.read()
+    store = feature_store.FeatureStore(engine.store_path)
+    assert feature_store.is_current(engine.store_path, engine.merged_path)
+    np.testing.assert_array_equal(store.features[:, 0], np.float32([0.9, 0.25, 0.123456]))
+
+    # Unchanged afterwards: nothing to do
+    report = engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+    assert (report['appended'], report['updated'], report['skipped']) == (0, 0, 3)
+
+
+def test_sync_rebuilds_when_rows_were_removed_or_file_edited(engine, tmp_path):
+    LABELS.to_csv(tmp_path / "labels.csv", index=False)
+    FEATURES.to_csv(tmp_path / "features.csv", index=False)
+    engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+
+    FEATURES.iloc[1:].to_csv(tmp_path / "features.csv", index=False)
+    report = engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))
+    assert report['rebuilt'] and report['total_rows'] == 2
+
+    with open(engine.merged_path, 'a') as f:
+        f.write("Someone,x.jpg,0.1,1,1\n")
+    assert engine.sync(str(tmp_path / "features.csv"), str(tmp_path / "labels.csv"))['rebuilt']
+    assert len(read_merged(engine)) == 2
+
+    with pytest.raises(ValueError):
+        engine.append_features(FEATURES.assign(extra=1.0))
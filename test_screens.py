@@ -1,13 +1,8 @@
-import sys
 import os
 import pytest
 from unittest.mock import MagicMock, patch, mock_open
 
-# Mock libs before import so the app doesn't crash on load
-sys.modules['face_analyzer'] = MagicMock()
-sys.modules['face_visualizer'] = MagicMock()
-sys.modules['destiny_predictor'] = MagicMock()
-
+# screens imports the analyzer and predictor lazily, so no mocks are needed to load it
 import screens
 
 
@@ -25,13 +20,13 @@ class TestResultScreen:
 
         return s
 
-    def test_export_features_to_csv_success(self, screen):
-        """Check if CSV export works without touching disk."""
+    def test_save_results_to_csv_success(self, screen):
+        """Check if the results CSV export works without touching disk."""
 
         # Dummy data
-        screen.current_raw_stats = {
-            'Eye_Distance': 0.45,
-            'Jaw_Width': 0.60
+        screen.current_fortune_results = {
+            'Love': {'label': 'Love', 'sentence': 'Romantic'},
+            'Wealth': {'label': 'Wealth', 'sentence': 'Prosperous'}
         }
 
         # Mock IO to stop real file creation.
@@ -40,16 +35,122 @@ class TestResultScreen:
                 patch("os.makedirs") as mocked_mkdirs, \
                 patch("os.path.exists", return_value=False), \
                 patch.object(screen, 'show_fortune_popup') as mocked_popup:
-            screen.export_features_to_csv()
+            screen.save_results_to_csv()
 
             # Did we try to make the dir?
-            mocked_mkdirs.assert_called_with("feature_data")
+            mocked_mkdirs.assert_called_with("fortune_results")
 
             # Did we write the data?
             handle = mocked_file()
-            handle.write.assert_any_call("Eye_Distance,0.45\r\n")
-            handle.write.assert_any_call("Jaw_Width,0.6\r\n")
+            handle.write.assert_any_call("Category,Prediction\r\n")
+            handle.write.assert_any_call("Love,Romantic\r\n")
+            handle.write.assert_any_call("Wealth,Prosperous\r\n")
 
             # Check success popup
             args, _ = mocked_popup.call_args
-            assert "exported successfully" in args[1]
+            assert "Destiny archived to" in args[1]
+
+
+class TestMainScreenAnalysis:
+
+    @pytest.fixture
+    def screen(self):
+        s = screens.MainScreen()
+        s.ids['status_label'] = MagicMock()
+        s.ids['capture_btn'] = MagicMock()
+        return s
+
+    def test_analyze_frame_no_face(self, screen):
+        screen.analyzer = MagicMock()
+        screen.analyzer.process_image.return_value = None
+
+        assert screen.analyze_frame(MagicMock()) is None
+
+    def test_capture_runs_in_background_and_reports_back(self, screen):
+        screen.current_frame = MagicMock()
+        screen.analyzer = MagicMock()
+        screen.predictor = MagicMock(is_ready=True)
+        screen.analyze_frame = MagicMock(return_value=None)
+
+        with patch.object(screens.Clock, "schedule_once", side_effect=lambda cb, *a: cb(0)):
+            screen.capture_and_analyze()
+            screen.executor.shutdown(wait=True)
+
+        screen.analyze_frame.assert_called_once()
+        assert screen.analysis_future is None
+        assert screen.ids['capture_btn'].disabled is False
+        assert screen.ids['status_label'].text == "No Face Detected"
+
+    def test_preview_reuses_texture_until_resolution_changes(self, screen):
+        import numpy as np
+        screen.ids['camera_preview'] = MagicMock()
+        screen.grabber = MagicMock()
+
+        with patch.object(screens, "Texture") as texture_cls:
+            texture_cls.create.side_effect = lambda size, colorfmt: MagicMock(size=size)
+
+            for seq, shape in enumerate([(48, 64, 3), (48, 64, 3), (48, 64, 3), (96, 128, 3)], 1):
+                screen.grabber.latest.return_value = (seq, 0.0, np.zeros(shape, dtype=np.uint8))
+                screen.update(0)
+
+        # One texture per resolution, flipped once instead of per frame
+        assert texture_cls.create.call_count == 2
+        assert screen._preview_texture.size == (128, 96)
+        screen._preview_texture.flip_vertical.assert_called_once()
+        assert screen.preview_frame_ms is not None
+
+    def test_preview_frame_time_is_averaged_and_logged(self, screen, monkeypatch):
+        import numpy as np
+        screen.ids['camera_preview'] = MagicMock()
+        screen.grabber = MagicMock()
+        monkeypatch.setattr(screens, "PREVIEW_LOG_FRAMES", 2)
+        clock = MagicMock()
+        clock.perf_counter.side_effect = [0.0, 0.004, 1.0, 1.002, 2.0, 2.008]  # Uploads of 4, 2 and 8 ms
+
+        with patch.object(screens, "Texture"), patch.object(screens, "Logger") as logger, \
+                patch.object(screens, "time", clock):
+            for seq in range(1, 4):
+                screen.grabber.latest.return_value = (seq, 0.0, np.zeros((48, 64, 3), dtype=np.uint8))
+                screen.update(0)
+
+            # Running average: 4 -> 3.8 -> 4.22 ms, logged every second frame
+            assert screen.preview_frame_ms == pytest.approx(4.22)
+            assert screen.preview_frames == 3
+            logger.debug.assert_called_once()
+            assert "3.80 ms/frame" in logger.debug.call_args[0][0]
+
+    def test_capture_latency_is_logged(self, screen):
+        screen.executor = MagicMock()
+        screen.grabber = MagicMock()
+        screen.grabber.latest.return_value = (4, 99.75, MagicMock())
+        clock = MagicMock()
+        clock.monotonic.return_value = 100.0
+
+        with patch.object(screens, "Logger") as logger, patch.object(screens, "time", clock):
+            screen.capture_and_analyze()
+
+        assert screen.capture_latency_ms == pytest.approx(250)
+        assert "250 ms old" in logger.info.call_args[0][0]
+
+    def test_analysis_done_keeps_capture_disabled_without_models(self, screen):
+        screen.analysis_future = MagicMock()
+        screen.analyzer = MagicMock()
+        screen.predictor = MagicMock(is_ready=False)
+        screen.ids['capture_btn'].disabled = True
+
+        screen.on_analysis_done(MagicMock())
+
+        assert screen.analysis_future is None
+        assert screen.ids['capture_btn'].disabled is True
+        assert screen.ids['status_label'].text == screens.AI_OFFLINE_TEXT
+
+    def test_warmup_done_enables_capture(self, screen):
+        screen.warmup = MagicMock()
+        screen.warmup.results = {'analyzer': MagicMock(), 'predictor': MagicMock(is_ready=True)}
+        screen.warmup.summary.return_value = "analyzer 0.5s, predictor 1.0s"
+
+        screen.on_warmup_done(0)
+
+        assert screen.analyzer is screen.warmup.results['analyzer']
+        assert screen.ids['capture_btn'].disabled is False
+        assert "Ready" in screen.ids['status_label'].text
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import RandomizedSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from budgeted_search import make_search
+from search_cache import SearchCache
+
+
+PARAMS = {'classifier__n_estimators': [5, 10], 'classifier__max_depth': [2, 3]}
+
+
+def pipeline(threads=1):
+    return Pipeline([('scaler', StandardScaler()),
+                     ('classifier', XGBClassifier(n_jobs=threads, eval_metric='logloss'))])
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, 3))
+    return X, (X[:, 0] > 0).astype(int)
+
+
+def test_fingerprint_tracks_data_and_grid_but_not_threads(tmp_path, data):
+    X, y = data
+    cache = SearchCache(str(tmp_path / "cache.json"))
+    search = RandomizedSearchCV(pipeline(), PARAMS, n_iter=2, cv=3, random_state=42)
+    key = cache.fingerprint(X, y, search)
+
+    assert cache.fingerprint(X.copy(), y.copy(), search) == key
+    threaded = RandomizedSearchCV(pipeline(threads=4), PARAMS, n_iter=2, cv=3, n_jobs=4, random_state=42)
+    assert cache.fingerprint(X, y, threaded) == key
+
+    y_changed = y.copy()
+    y_changed[0] = 1 - y_changed[0]
+    assert cache.fingerprint(X, y_changed, search) != key
+    assert cache.fingerprint(X[:-1], y[:-1], search) != key
+    wider = RandomizedSearchCV(pipeline(), dict(PARAMS, classifier__max_depth=[2, 3, 4]),
+                               n_iter=2, cv=3, random_state=42)
+    assert cache.fingerprint(X, y, wider) != key
+
+
+def test_cached_search_skips_the_search_on_rerun(tmp_path, data):
+    X, y = data
+    path = str(tmp_path / "cache.json")
+
+    cache = SearchCache(path)
+    first = make_search(pipeline(), PARAMS, 3, n_jobs=1, cache=cache, name='Wealth').fit(X, y)
+    assert not first.cache_hit and cache.misses == 1
+    cache.save()
+
+    # A new process: only the final estimator is fit, with the stored parameters
+    cache = SearchCache(path)
+    again = make_search(pipeline(), PARAMS, 3, n_jobs=1, cache=cache, name='Wealth').fit(X, y)
+
+    assert again.cache_hit and cache.hits == 1
+    assert again.best_params_ == first.best_params_
+    assert again.best_score_ == pytest.approx(first.best_score_)
+    np.testing.assert_array_equal(again.best_estimator_.predict(X), first.best_estimator_.predict(X))
+
+    entry = next(iter(cache.entries.values()))
+    assert entry['model'] == 'Wealth' and len(entry['cv_scores']) == 3
@@ -0,0 +1,10 @@
+import startup
+
+
+def test_screens_import_stays_light():
+    """The UI module must not pull in mediapipe / cv2 / the ML stack at import time."""
+    report = startup.profile_imports('screens')
+
+    assert report['slowest']
+    assert report['total_ms'] > 0
+    assert report['heavy'] == []
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import othermodels
+import train_and_save
+
+
+@pytest.mark.parametrize("n_tasks, cores, expected", [
+    (5, 16, {'parallel_jobs': 5, 'search_jobs': 3, 'model_threads': 1}),
+    (5, 2, {'parallel_jobs': 2, 'search_jobs': 1, 'model_threads': 1}),
+    (5, 1, {'parallel_jobs': 1, 'search_jobs': 1, 'model_threads': 1}),
+])
+def test_plan_core_budget_never_oversubscribes(n_tasks, cores, expected):
+    budget = train_and_save.plan_core_budget(n_tasks, cores)
+
+    assert {key: budget[key] for key in expected} == expected
+    assert budget['parallel_jobs'] * budget['search_jobs'] * budget['model_threads'] <= cores
+
+
+def test_train_models_passes_budget_and_reports(monkeypatch):
+    """With one core the jobs run in-process, so the trainers can be replaced by fakes."""
+    calls = []
+
+    def fake_special(X, y, label, n_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+                     cache=None):
+        calls.append((label, n_jobs, model_threads))
+        return f"model-{label}", 0.5
+
+    def fake_general(X, y, exclude, n_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+                     cache=None):
+        calls.append(('GENERAL', n_jobs, model_threads))
+        return "model-general", ['Career'], [0.75]
+
+    monkeypatch.setattr(othermodels, "train_xgboost_specialized", fake_special)
+    monkeypatch.setattr(othermodels, "train_general_model", fake_general)
+
+    X = pd.DataFrame({'face_lw_ratio': [0.1, 0.2]})
+    y = pd.DataFrame({'Wealth': [0, 1], 'Career': [1, 0]})
+    models, report = train_and_save.train_models(X, y, cores=1)
+
+    assert list(models) == ['Wealth', 'GENERAL']
+    assert models['GENERAL'] == {'model': "model-general", 'targets': ['Career']}
+    assert sorted(calls) == [('GENERAL', 1, 1), ('Wealth', 1, 1)]
+    assert list(report['jobs']) == ['Wealth', 'GENERAL']
+    assert report['jobs']['GENERAL']['accuracies'] == [0.75]
+    assert report['wall_seconds'] >= 0
+
+
+def test_parity_failure_keeps_the_pickled_brain(tmp_path, monkeypatch, capsys):
+    import tree_engine
+
+    def reject(model_file):
+        raise ValueError(f"Compiled models disagree with {model_file} for ['Wealth']; not exported")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(othermodels, "load_label_descriptions", lambda path: {})
+    monkeypatch.setattr(othermodels, "load_data", lambda path: (None, None))
+    monkeypatch.setattr(train_and_save, "train_models", lambda *args: ({'Wealth': 'model'}, {}))
+    monkeypatch.setattr(train_and_save, "print_report", lambda report: None)
+    monkeypatch.setattr(tree_engine, "export_brain", reject)
+
+    train_and_save.save_all_models(report_file=None, use_cache=False)
+
+    assert (tmp_path / "destiny_brain.pkl").exists()
+    assert "disagree" in capsys.readouterr().out
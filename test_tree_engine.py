@@ -0,0 +1,154 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from lightgbm import LGBMClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+import tree_engine
+from love_model import LoveModel, LOVE_FEATURES
+import othermodels
+
+
+def boundary_rows(X, forest, columns=None):
+    """Rows that sit exactly on (and one ulp either side of) every compiled threshold."""
+    rows = []
+    for i in np.flatnonzero(forest.left != np.arange(len(forest.left))):
+        j = forest.feature[i] if columns is None else columns[forest.feature[i]]
+        t = forest.threshold[i]
+        for v in (t, np.nextafter(t, -np.inf), np.nextafter(t, np.inf)):
+            row = X[i % len(X)].copy()
+            row[j] = v
+            rows.append(row)
+    return np.array(rows)
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal([0.9, 0.3, 140.0, 0.2], [0.05, 0.02, 5.0, 0.03], size=(300, 4))
+    y = ((X[:, 0] - 0.9) * 20 + (X[:, 2] - 140) / 5 + rng.normal(0, 1, 300) > 0).astype(int)
+    return X, y
+
+
+def test_xgboost_pipeline_parity(training_data):
+    X, y = training_data
+    pipe = Pipeline([('scaler', StandardScaler()),
+                     ('classifier', XGBClassifier(n_estimators=30, max_depth=3, eval_metric='logloss'))])
+    pipe.fit(X, y)
+    forest = tree_engine.compile_pipeline(pipe)
+
+    X_check = np.vstack([X, boundary_rows(X, forest)])
+    X_check[::7, 1] = np.nan  # Missing values take the default direction
+    np.testing.assert_array_equal(forest.predict(X_check), pipe.predict(X_check))
+
+
+def test_lightgbm_love_model_parity(training_data):
+    X, y = training_data
+    X_df = pd.DataFrame(np.zeros((len(X), len(othermodels.ALL_FEATURES))), columns=othermodels.ALL_FEATURES)
+    X_df[LOVE_FEATURES[:4]] = X
+
+    love = LoveModel()
+    love.model = Pipeline([('scaler', StandardScaler()),
+                           ('classifier', LGBMClassifier(n_estimators=30, num_leaves=7, verbose=-1))])
+    love.model.fit(X_df[LOVE_FEATURES].values.astype(np.float32), y)
+    compiled = tree_engine.compile_brain({'Love': love})['Love']
+
+    X_check = np.vstack([X_df[LOVE_FEATURES].values, boundary_rows(X_df[LOVE_FEATURES].values, compiled.forest)])
+    X_check[::5, 0] = np.nan
+    expected = love.model.predict(X_check.astype(np.float32))
+    np.testing.assert_array_equal(compiled.forest.predict(X_check), expected)
+
+    # Same interface as LoveModel.predict
+    assert compiled.predict(X_df.iloc[[3]]) == love.predict(X_df.iloc[[3]])
+
+    # Matrix fast paths (full ALL_FEATURES rows), batched and one row at a time
+    X_full = X_df.values
+    expected = love.model.predict(X_df[LOVE_FEATURES].values.astype(np.float32))
+    for model in (love, compiled):
+        np.testing.assert_array_equal(model.predict_array(X_full, othermodels.ALL_FEATURES), expected)
+        singles = [model.predict_array(X_full[i:i + 1], othermodels.ALL_FEATURES)[0] for i in range(20)]
+        np.testing.assert_array_equal(singles, expected[:20])
+
+
+def test_multi_output_and_file_roundtrip(training_data, tmp_path):
+    X, y = training_data
+    Y = np.column_stack([y, 1 - y])
+    pipe = Pipeline([('scaler', StandardScaler()),
+                     ('classifier', MultiOutputClassifier(XGBClassifier(n_estimators=10, max_depth=2)))])
+    pipe.fit(X, Y)
+
+    brain = {'GENERAL': {'model': pipe, 'targets': ['Career', 'Social']},
+             'meaning_map': {'career': {0: "quiet", 1: "bright"}}}
+    path = tmp_path / "brain"
+    tree_engine.save_compiled(tree_engine.compile_brain(brain), path, source_hash="abc",
+                              feature_names=['a', 'b', 'c', 'd'])
+    loaded = tree_engine.load_compiled(path)
+
+    np.testing.assert_array_equal(loaded['GENERAL']['model'].predict(X), pipe.predict(X))
+    assert loaded['GENERAL']['targets'] == ['Career', 'Social']
+    assert loaded.meaning_map == brain['meaning_map']
+    assert tree_engine.read_manifest(path)['source_hash'] == "abc"
+    assert loaded.feature_schema == tree_engine.feature_schema_hash(['a', 'b', 'c', 'd'])
+
+
+def test_split_artifact_loads_lazily_from_memory_map(training_data, tmp_path):
+    X, y = training_data
+    compiled = {label: tree_engine.compile_pipeline(
+                    Pipeline([('scaler', StandardScaler()),
+                              ('classifier', XGBClassifier(n_estimators=5, max_depth=2))]).fit(X, target))
+                for label, target in [('Wealth', y), ('Health', 1 - y)]}
+    tree_engine.save_compiled(compiled, tmp_path, feature_names=['a', 'b', 'c', 'd'])
+    assert sorted(os.listdir(tmp_path)) == ['Health.npy', 'Wealth.npy', 'manifest.json']
+
+    brain = tree_engine.load_compiled(tmp_path)
+    assert list(brain) == ['Wealth', 'Health'] and brain.loaded == {}
+
+    wealth = brain['Wealth']
+    assert list(brain.loaded) == ['Wealth']
+    assert isinstance(wealth.threshold.base, np.memmap)  # A view of the mapped file, not a copy
+    np.testing.assert_array_equal(wealth.predict(X), compiled['Wealth'].predict(X))
+
+    # A corrupted model file is rejected when it loads
+    with open(tmp_path / 'Health.npy', 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b'\x01')
+    with pytest.raises(ValueError, match="Checksum"):
+        brain['Health']
+
+
+@pytest.mark.skipif(not os.path.exists('destiny_brain.pkl'), reason="trained brain not available")
+def test_destiny_brain_parity():
+    import joblib
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        saved_data = joblib.load('destiny_brain.pkl')
+    compiled = tree_engine.compile_brain(saved_data)
+
+    scaler = saved_data['Wealth'].steps[0][1]
+    rng = np.random.default_rng(1)
+    X = scaler.mean_ + scaler.scale_ * rng.normal(0, 1.5, (2000, len(scaler.mean_)))
+
+    assert all(count == 0 for count in tree_engine.check_parity(saved_data, compiled, X).values())
+
+
+def test_export_brain_refuses_models_that_disagree(training_data, tmp_path, monkeypatch):
+    import joblib
+    X, y = training_data
+    pipe = Pipeline([('scaler', StandardScaler()),
+                     ('classifier', XGBClassifier(n_estimators=5, max_depth=2, eval_metric='logloss'))])
+    pipe.fit(X, y)
+    joblib.dump({'Wealth': pipe, 'meaning_map': {}}, tmp_path / "brain.pkl")
+    output_dir = tmp_path / "compiled"
+
+    assert tree_engine.export_brain(str(tmp_path / "brain.pkl"), str(output_dir), n_check=500) == {'Wealth': 0}
+    assert (output_dir / tree_engine.MANIFEST_FILE).exists()
+
+    monkeypatch.setattr(tree_engine, "check_parity", lambda saved, compiled, X: {'Wealth': 3})
+    with pytest.raises(ValueError, match="disagree"):
+        tree_engine.export_brain(str(tmp_path / "brain.pkl"), str(tmp_path / "rejected"), n_check=500)
+    assert not (tmp_path / "rejected").exists()
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+from warmup import WarmupService, warm_up_predictor
+
+
+def test_warmup_builds_and_warms_every_component():
+    progress = []
+    finished = []
+    service = WarmupService(on_progress=progress.append)
+
+    warm = MagicMock()
+    service.add('analyzer', lambda: "analyzer-object", warm)
+    service.add('broken', MagicMock(side_effect=RuntimeError("no model file")))
+    service.start(on_done=finished.append)
+
+    assert service.wait(timeout=5)
+    assert finished == [service]
+    assert service.results == {'analyzer': "analyzer-object"}
+    warm.assert_called_once_with("analyzer-object")
+    assert set(service.timings['analyzer']) == {'load', 'warmup'}
+    assert isinstance(service.errors['broken'], RuntimeError)
+    assert any("broken failed" in text for text in progress)
+    assert service.summary().startswith("analyzer ")
+
+
+def test_warm_up_predictor_bypasses_the_prediction_cache():
+    predictor = MagicMock(is_ready=True)
+    warm_up_predictor(predictor)
+    predictor.warm_up.assert_called_once_with()
+    predictor.predict_fortune.assert_not_called()
@@ -1,11 +1,134 @@
-import joblib
+import argparse
+import json
 import os
+import time
+import joblib
 import pandas as pd
 from love_model import LoveModel
 import othermodels
+import tree_engine
+from search_cache import SearchCache
+
+# Machine-readable timing report of the last training run
+REPORT_FILE = 'training_report.json'
+
+
+def plan_core_budget(n_tasks, cores=None):
+    """
+    Splits a core budget between concurrent training jobs so the levels don't oversubscribe.
+
+    Args:
+        n_tasks (int): Number of training jobs (one per model).
+        cores (int): Total cores to use (None = all cores of this machine).
+
+    Returns:
+        dict: {'cores', 'parallel_jobs' (jobs trained at once), 'search_jobs' (parallel CV fits
+               per job), 'model_threads' (XGBoost / LightGBM threads per fit)}
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+    parallel_jobs = max(1, min(n_tasks, cores))
+    search_jobs = max(1, cores // parallel_jobs)
+    # The CV fits already fill every core, so each booster gets a single thread
+    return {'cores': cores, 'parallel_jobs': parallel_jobs, 'search_jobs': search_jobs, 'model_threads': 1}
+
+
+def train_job(name, X, y, search_jobs=-1, model_threads=None, search_mode='random', time_budget=None,
+              cache=None):
+    """
+    Trains one model of the brain ('Love', a specialized label or 'GENERAL').
+    search_mode / time_budget select the hyperparameter search (see budgeted_search.py);
+    cache (SearchCache) reuses earlier search results (see search_cache.py).
+
+    Returns:
+        dict: {'name', 'model' (as stored in destiny_brain.pkl, None if nothing to train),
+               'accuracies', 'seconds', 'search_jobs', 'model_threads', 'cache_hit',
+               'cache_entries' (search results to add to the cache)}
+    """
+    start = time.perf_counter()
+    search = {'n_jobs': search_jobs, 'model_threads': model_threads,
+              'search_mode': search_mode, 'time_budget': time_budget, 'cache': cache}
+    hits_before = cache.hits if cache is not None else 0
+
+    # CV fits run in worker processes capped at model_threads threads each
+    with joblib.parallel_config(backend='loky', inner_max_num_threads=model_threads):
+        if name == 'Love':
+            model = LoveModel()
+            accuracies = [model.train(X, y['Love'], **search)]
+        elif name == 'GENERAL':
+            exclude = othermodels.XGB_TARGETS_SPECIAL + ['Love']
+            gen_model, gen_targets, accuracies = othermodels.train_general_model(X, y, exclude, **search)
+            model = {'model': gen_model, 'targets': gen_targets} if gen_model else None
+        else:
+            model, acc = othermodels.train_xgboost_specialized(X, y, name, **search)
+            accuracies = [acc]
+
+    return {'name': name, 'model': model, 'accuracies': accuracies,
+            'seconds': time.perf_counter() - start,
+            'search_jobs': search_jobs, 'model_threads': model_threads,
+            'cache_hit': cache is not None and cache.hits > hits_before,
+            'cache_entries': cache.new_entries if cache is not None else {}}
 
 
-def save_all_models():
+def train_models(X, y, cores=None, search_mode='random', time_budget=None, cache=None):
+    """
+    Trains every model of the brain concurrently under one core budget.
+    time_budget is per model (seconds of 'halving' search). New search results are merged
+    into cache (the caller saves it).
+
+    Returns:
+        tuple: (models dict in destiny_brain.pkl layout, timing report dict)
+    """
+    # Biggest job first so it does not start last and stretch the total
+    names = ['GENERAL'] + (['Love'] if 'Love' in y.columns else [])
+    names += [label for label in othermodels.XGB_TARGETS_SPECIAL if label in y.columns]
+
+    budget = plan_core_budget(len(names), cores)
+    print(f"Training {len(names)} models: {budget['parallel_jobs']} at a time, "
+          f"{budget['search_jobs']} CV fits each, {budget['model_threads']} thread(s) per fit "
+          f"({budget['cores']} cores)")
+
+    start = time.perf_counter()
+    results = joblib.Parallel(n_jobs=budget['parallel_jobs'], backend='loky')(
+        joblib.delayed(train_job)(name, X, y, budget['search_jobs'], budget['model_threads'],
+                                  search_mode, time_budget, cache)
+        for name in names
+    )
+    wall = time.perf_counter() - start
+
+    # Jobs ran on copies of the cache; collect what they searched
+    if cache is not None:
+        for result in results:
+            cache.merge(result['cache_entries'])
+
+    # Same key order as the sequential training always produced
+    by_name = {result['name']: result for result in results}
+    order = ['Love'] + othermodels.XGB_TARGETS_SPECIAL + ['GENERAL']
+    models = {name: by_name[name]['model'] for name in order
+              if name in by_name and by_name[name]['model'] is not None}
+
+    report = dict(budget, search_mode=search_mode, time_budget=time_budget, wall_seconds=wall,
+                  rows=len(X), jobs={
+        name: {key: by_name[name][key]
+               for key in ('seconds', 'search_jobs', 'model_threads', 'accuracies', 'cache_hit')}
+        for name in order if name in by_name
+    })
+    report['sum_job_seconds'] = sum(job['seconds'] for job in report['jobs'].values())
+    return models, report
+
+
+def print_report(report):
+    """Prints the timing report of train_models() as a table."""
+    print("\n--- Training time ---")
+    print(f"{'model':12}{'seconds':>10}{'CV fits':>9}{'threads':>9}  accuracy")
+    for name, job in report['jobs'].items():
+        accuracy = sum(job['accuracies']) / len(job['accuracies']) if job['accuracies'] else 0.0
+        cached = "  (cached search)" if job.get('cache_hit') else ""
+        print(f"{name:12}{job['seconds']:10.1f}{job['search_jobs']:9}{job['model_threads']:9}  {accuracy:.2%}{cached}")
+    print(f"Wall time {report['wall_seconds']:.1f}s for {report['sum_job_seconds']:.1f}s of training "
+          f"({report['cores']} cores, {report['parallel_jobs']} jobs at a time)")
+
+
+def save_all_models(cores=None, report_file=REPORT_FILE, search_mode='random', time_budget=None, use_cache=True):
     print("Starting training process...")
 
     # 1. Load Data
@@ -16,26 +139,15 @@ def save_all_models():
         print(f"Error: Could not find CSV files. Make sure they are in this folder.\n{e}")
         return
 
-    saved_data = {}
-
-    # 2. Train Love Model
-    if 'Love' in y.columns:
-        print("Training Love Model...")
-        love = LoveModel()
-        love.train(X, y['Love'])
-        saved_data['Love'] = love
-
-    # 3. Train Specialized XGBoost Models (Wealth, Health, etc.)
-    for label in othermodels.XGB_TARGETS_SPECIAL:
-        if label in y.columns:
-            print(f"Training {label} Model...")
-            model, _ = othermodels.train_xgboost_specialized(X, y, label)
-            saved_data[label] = model
-    # 4. Train General Model
-    exclude = othermodels.XGB_TARGETS_SPECIAL + ['Love']
-    gen_model, gen_targets, _ = othermodels.train_general_model(X, y, exclude)
-    if gen_model:
-        saved_data['GENERAL'] = {'model': gen_model, 'targets': gen_targets}
+    # 2-4. Train Love, the specialized XGBoost models (Wealth, Health, etc.) and the General Model
+    cache = SearchCache() if use_cache else None
+    saved_data, report = train_models(X, y, cores, search_mode, time_budget, cache)
+    print_report(report)
+    if cache is not None:
+        cache.save()
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
 
     # 5. Save the "Dictionary" (Meaning Map)
     saved_data['meaning_map'] = meaning_map
@@ -45,5 +157,23 @@ def save_all_models():
     joblib.dump(saved_data, output_file)
     print(f"\nSuccess! All models saved to '{output_file}'")
 
+    # 7. Export the dependency-free compiled copy used by the app (checked for parity)
+    try:
+        tree_engine.export_brain(output_file)
+    except ValueError as e:
+        # The .pkl is saved and complete; without a matching compiled copy the app loads it instead
+        print(f"[Compile] {e}")
+        print(f"[Compile] The app will use '{output_file}' until the models compile exactly.")
+
 if __name__ == "__main__":
-    save_all_models()
+    parser = argparse.ArgumentParser(description="Trains every model and saves destiny_brain.pkl")
+    parser.add_argument('--cores', type=int, default=None, help='Core budget for training (default: all)')
+    parser.add_argument('--search', choices=['random', 'halving'], default='random',
+                        help="Hyperparameter search: full random search or budgeted successive halving")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Seconds of 'halving' search per model (default: no limit)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Search again even if the data and grids are unchanged (search_cache.json)')
+    args = parser.parse_args()
+    save_all_models(cores=args.cores, search_mode=args.search, time_budget=args.time_budget,
+                    use_cache=not args.no_cache)
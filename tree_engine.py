@@ -0,0 +1,635 @@
+"""
+Compiled tree ensembles for destiny_brain.pkl.
+
+The trained pipelines (StandardScaler + XGBoost / LightGBM) are flattened into plain
+NumPy arrays so predictions need neither xgboost, lightgbm, sklearn nor pandas.
+The scaler is folded into every split threshold: a split "scaled(x) < t" becomes
+"x < T" on the raw feature value, where T is found exactly (bit by bit, including the
+float32 casts the libraries apply), so compiled predictions match the original models.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+import numpy as np
+
+
+# Bump when the layout of the exported arrays changes
+FORMAT_VERSION = 2
+
+# Compiled brain directory: manifest.json + one memory-mappable .npy file per model
+COMPILED_DIR = 'destiny_brain_compiled'
+MANIFEST_FILE = 'manifest.json'
+
+# Byte alignment of every array inside a model file
+_ALIGNMENT = 64
+
+_SIGN_BIT = np.int64(-0x8000000000000000)
+_MAGNITUDE = np.int64(0x7FFFFFFFFFFFFFFF)
+
+
+class CompiledForest:
+    """
+    A binary tree ensemble over raw (unscaled) features, stored as flat node arrays.
+    Replaces a Pipeline(StandardScaler, XGBClassifier/LGBMClassifier): predict(X) takes the
+    same input matrix and returns the same labels.
+    """
+
+    ARRAYS = ['feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots', 'classes']
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, classes,
+                 base_margin=0.0, accumulate='float64'):
+        """
+        Args:
+            feature (np.array): (n_nodes,) input column tested by each node.
+            threshold (np.array): (n_nodes,) raw-space thresholds; go left when x < threshold.
+            left, right (np.array): (n_nodes,) child node ids. Leaves point to themselves.
+            default_left (np.array): (n_nodes,) direction taken by NaN inputs.
+            value (np.array): (n_nodes,) leaf outputs (0 for inner nodes).
+            roots (np.array): (n_trees,) root node id of every tree.
+            classes (np.array): The two class labels, [negative, positive].
+            base_margin (float): Margin every prediction starts from.
+            accumulate (str): 'float32' (XGBoost) or 'float64' (LightGBM) margin arithmetic.
+        """
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.classes = np.asarray(classes)
+        self.base_margin = float(base_margin)
+        self.accumulate = accumulate
+        self.depth = _max_depth(self.left, self.right, self.roots)
+
+    def leaves(self, X):
+        """Returns the (n_rows, n_trees) leaf node reached in every tree."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+
+        # Index the flattened matrix directly (cheaper than take_along_axis for small batches)
+        flat = X.reshape(-1)
+        row_offset = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+
+        # All trees advance one level per step; leaves point to themselves so they stay put
+        for _ in range(self.depth):
+            x = flat[row_offset + self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def decision_function(self, X):
+        """Raw margins (log-odds), summed in tree order like the original library."""
+        values = self.value[self.leaves(X)]
+        dtype = np.dtype(self.accumulate)
+        start = np.full((values.shape[0], 1), self.base_margin, dtype=dtype)
+        return np.cumsum(np.hstack([start, values.astype(dtype)]), axis=1, dtype=dtype)[:, -1]
+
+    def predict(self, X):
+        """Class labels for every row of X."""
+        return self.classes[(self.decision_function(X) > 0).astype(np.intp)]
+
+    def with_columns(self, columns):
+        """Copy of this forest whose nodes read input column columns[feature] instead."""
+        forest = copy.copy(self)
+        forest.feature = np.asarray(columns, dtype=np.intp)[self.feature]
+        return forest
+
+    def to_arrays(self, prefix):
+        """The node arrays (base_margin and accumulate are stored in the manifest)."""
+        return {f"{prefix}.{name}": getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix, base_margin=0.0, accumulate='float64'):
+        kwargs = {name: arrays[f"{prefix}.{name}"] for name in cls.ARRAYS}
+        return cls(base_margin=base_margin, accumulate=accumulate, **kwargs)
+
+
+class CompiledLoveModel:
+    """Drop-in replacement for a trained LoveModel (same predict interface)."""
+
+    def __init__(self, forest, features):
+        self.forest = forest  # Node features index into self.features
+        self.features = list(features)
+        self._remapped = None  # (feature_names, forest reading those columns directly)
+
+    def predict(self, input_features_df):
+        """Predicts 'Love' for the first row of a DataFrame holding (at least) self.features."""
+        try:
+            X_input = input_features_df[self.features].values
+        except KeyError as e:
+            raise ValueError(f"Input data missing required features for Love Model: {e}")
+        return int(self.forest.predict(X_input)[0])
+
+    def predict_array(self, X, feature_names):
+        """Predicts 'Love' for every row of a matrix whose columns are feature_names."""
+        key = tuple(feature_names)
+        if self._remapped is None or self._remapped[0] != key:
+            try:
+                columns = np.array([key.index(f) for f in self.features], dtype=np.intp)
+            except ValueError as e:
+                raise ValueError(f"Input data missing required features for Love Model: {e}")
+            # Point the nodes straight at the full matrix columns, so rows need no subsetting
+            self._remapped = (key, self.forest.with_columns(columns))
+        return self._remapped[1].predict(X).astype(int)
+
+
+class CompiledMultiOutput:
+    """Drop-in replacement for Pipeline(StandardScaler, MultiOutputClassifier(XGBClassifier))."""
+
+    def __init__(self, forests):
+        self.forests = forests
+
+    def predict(self, X):
+        return np.column_stack([forest.predict(X) for forest in self.forests])
+
+
+# --- Compiling ---
+
+def compile_pipeline(pipeline):
+    """
+    Compiles Pipeline(StandardScaler, XGBClassifier or LGBMClassifier) into a CompiledForest.
+
+    Returns:
+        CompiledForest: Takes the same input columns as the pipeline.
+    """
+    scaler, classifier = pipeline.steps[0][1], pipeline.steps[-1][1]
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+
+    if hasattr(classifier, 'get_booster'):
+        return _compile_xgboost(classifier, mean, scale)
+    if hasattr(classifier, 'booster_'):
+        return _compile_lightgbm(classifier, mean, scale)
+    raise TypeError(f"Unsupported classifier: {type(classifier).__name__}")
+
+
+def compile_brain(saved_data):
+    """
+    Compiles every model of a loaded destiny_brain.pkl dictionary.
+
+    Returns:
+        dict: Same keys as saved_data, with compiled models in place of the originals.
+    """
+    compiled = {}
+    for key, value in saved_data.items():
+        if key == 'meaning_map':
+            compiled[key] = value
+        elif key == 'GENERAL':
+            scaler, multi = value['model'].steps[0][1], value['model'].steps[-1][1]
+            # Each estimator is compiled as its own scaler + classifier pipeline
+            forests = [compile_pipeline(_Steps(scaler, est)) for est in multi.estimators_]
+            compiled[key] = {'model': CompiledMultiOutput(forests), 'targets': list(value['targets'])}
+        elif hasattr(value, 'features') and hasattr(value, 'model'):
+            # LoveModel: the pipeline sees float32 values of its own feature subset
+            compiled[key] = CompiledLoveModel(compile_pipeline(value.model), value.features)
+        else:
+            compiled[key] = compile_pipeline(value)
+    return compiled
+
+
+class _Steps:
+    """Minimal stand-in for a two-step Pipeline."""
+
+    def __init__(self, scaler, classifier):
+        self.steps = [('scaler', scaler), ('classifier', classifier)]
+
+
+def _compile_xgboost(classifier, mean, scale):
+    """XGBoost: go left when float32(scaled x) < float32 threshold; margins add up in float32."""
+    model = json.loads(classifier.get_booster().save_raw('json'))
+    learner = model['learner']
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree' or learner['objective']['name'] != 'binary:logistic':
+        raise ValueError("Only binary:logistic gbtree models can be compiled")
+
+    trees = booster['model']['trees']
+    best_iteration = classifier.get_booster().attr('best_iteration')
+    if best_iteration is not None:
+        trees = trees[:int(best_iteration) + 1]
+
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]').split(',')[0])
+    base_margin = np.float32(np.log(base_score / (1 - base_score)))
+
+    nodes = _NodeTable()
+    for tree in trees:
+        offset = nodes.size
+        nodes.roots.append(offset)
+        for i, (left, right) in enumerate(zip(tree['left_children'], tree['right_children'])):
+            if left == -1:
+                nodes.add_leaf(offset + i, tree['split_conditions'][i])
+            else:
+                nodes.add_split(tree['split_indices'][i], np.float32(tree['split_conditions'][i]),
+                                offset + left, offset + right, bool(tree['default_left'][i]))
+
+    # Go right when float32((x - mean) / scale) >= t
+    def scaled(x, j):
+        with np.errstate(over='ignore', invalid='ignore'):
+            return ((x - mean[j]) / scale[j]).astype(np.float32)
+
+    feature, threshold = nodes.fold(lambda x, j, t: scaled(x, j) >= t)
+    return nodes.build(feature, threshold, classifier.classes_, base_margin, 'float32')
+
+
+def _compile_lightgbm(classifier, mean, scale):
+    """
+    LightGBM (fed float32 inputs, see LoveModel): go left when the float32 scaled value
+    <= the float64 threshold; margins add up in float64.
+    """
+    dump = classifier.booster_.dump_model()
+    if dump['objective'].split()[0] != 'binary' or dump['num_tree_per_iteration'] != 1:
+        raise ValueError("Only binary LightGBM models can be compiled")
+
+    tree_info = dump['tree_info']
+    best_iteration = classifier.booster_.best_iteration
+    if best_iteration > 0:
+        tree_info = tree_info[:best_iteration]
+
+    nodes = _NodeTable()
+    for info in tree_info:
+        nodes.roots.append(nodes.size)
+        _add_lightgbm_node(nodes, info['tree_structure'])
+
+    # The scaler keeps float32 input in float32 (mean and scale are cast to float32 too)
+    mean32, scale32 = mean.astype(np.float32), scale.astype(np.float32)
+
+    def scaled(x, j):
+        with np.errstate(over='ignore', invalid='ignore'):
+            return ((x.astype(np.float32) - mean32[j]) / scale32[j]).astype(np.float64)
+
+    feature, threshold = nodes.fold(lambda x, j, t: scaled(x, j) > t)
+    return nodes.build(feature, threshold, classifier.classes_, 0.0, 'float64')
+
+
+def _add_lightgbm_node(nodes, node):
+    """Appends one LightGBM dump node (and its subtree) depth-first. Returns its node id."""
+    node_id = nodes.size
+    if 'leaf_value' in node:
+        nodes.add_leaf(node_id, node['leaf_value'])
+        return node_id
+
+    if node['decision_type'] != '<=':
+        raise ValueError("Categorical LightGBM splits are not supported")
+    threshold = float(node['threshold'])
+    if node['missing_type'] == 'None':
+        default_left = 0.0 <= threshold  # LightGBM replaces NaN with 0 (in scaled space)
+    elif node['missing_type'] == 'NaN':
+        default_left = bool(node['default_left'])
+    else:
+        raise ValueError(f"Unsupported LightGBM missing type: {node['missing_type']}")
+
+    nodes.add_split(node['split_feature'], threshold, -1, -1, default_left)
+    nodes.left[node_id] = _add_lightgbm_node(nodes, node['left_child'])
+    nodes.right[node_id] = _add_lightgbm_node(nodes, node['right_child'])
+    return node_id
+
+
+class _NodeTable:
+    """Internal/Private helper that collects nodes of all trees before packing them."""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right = [], [], [], []
+        self.default_left, self.value, self.roots = [], [], []
+
+    @property
+    def size(self):
+        return len(self.feature)
+
+    def add_leaf(self, node_id, value):
+        self._append(0, np.inf, node_id, node_id, True, value)
+
+    def add_split(self, feature, threshold, left, right, default_left):
+        self._append(feature, threshold, left, right, default_left, 0.0)
+
+    def _append(self, feature, threshold, left, right, default_left, value):
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(left)
+        self.right.append(right)
+        self.default_left.append(default_left)
+        self.value.append(value)
+
+    def fold(self, goes_right):
+        """
+        Converts every split into a raw-space threshold.
+
+        Args:
+            goes_right (callable): goes_right(x, feature, threshold) for raw float64 values x,
+                                   monotone in x (False ... False True ... True).
+
+        Returns:
+            tuple: (feature, raw_threshold) arrays; raw x goes left iff x < raw_threshold.
+        """
+        feature = np.array(self.feature, dtype=np.intp)
+        threshold = np.array(self.threshold, dtype=np.float64)
+        splits = np.flatnonzero(np.array(self.left) != np.arange(self.size))
+
+        raw = np.full(self.size, np.inf)
+        raw[splits] = _smallest_true(
+            lambda x: goes_right(x, feature[splits], threshold[splits]), len(splits)
+        )
+        return feature, raw
+
+    def build(self, feature, threshold, classes, base_margin, accumulate):
+        return CompiledForest(feature, threshold, self.left, self.right, self.default_left,
+                              self.value, self.roots, classes, base_margin, accumulate)
+
+
+def _to_key(x):
+    """Maps float64 values to int64 keys with the same ordering (-0.0 and 0.0 share key 0)."""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits < 0, -(bits & _MAGNITUDE), bits)
+
+
+def _from_key(key):
+    return np.where(key < 0, (-key) | _SIGN_BIT, key).view(np.float64)
+
+
+def _smallest_true(predicate, n):
+    """
+    For n monotone predicates over float64, finds the smallest x where each one is True
+    (by bisection over the ordered bit patterns, so the result is exact).
+    Predicates that are never True get +inf.
+    """
+    lo = np.full(n, _to_key(-np.inf), dtype=np.int64)
+    hi = np.full(n, _to_key(np.inf), dtype=np.int64)
+    never = ~predicate(_from_key(hi))
+
+    for _ in range(64):
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)  # Overflow-free floor average
+        is_true = predicate(_from_key(mid))
+        hi = np.where(is_true, mid, hi)
+        lo = np.where(is_true, lo, mid + 1)
+
+    result = _from_key(hi)
+    result[never] = np.inf
+    return result
+
+
+def _max_depth(left, right, roots):
+    """Number of steps needed to reach a leaf from every root."""
+    depth = 0
+    frontier = np.unique(roots)
+    while True:
+        inner = frontier[left[frontier] != frontier]
+        if len(inner) == 0:
+            return depth
+        frontier = np.unique(np.concatenate([left[inner], right[inner]]))
+        depth += 1
+
+
+# --- Export / Import ---
+
+def file_digest(path):
+    """blake2b hex digest of a file (ties compiled models to their .pkl, checksums model files)."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def feature_schema_hash(feature_names):
+    """Digest of the input column order the compiled node features index into."""
+    return hashlib.blake2b(json.dumps(list(feature_names)).encode(), digest_size=20).hexdigest()
+
+
+def save_compiled(compiled, path=COMPILED_DIR, source_hash=None, feature_names=None):
+    """
+    Writes compiled models (as returned by compile_brain) to a directory: manifest.json plus
+    one .npy file per model. Only plain arrays are stored, so loading needs no pickle, and
+    the .npy files can be memory-mapped (processes loading the same files share the pages).
+
+    Args:
+        source_hash (str): Optional file_digest() of the .pkl the models were compiled from.
+        feature_names (list): Input column order of the models (othermodels.ALL_FEATURES).
+    """
+    if feature_names is None:
+        import othermodels
+        feature_names = othermodels.ALL_FEATURES
+    os.makedirs(path, exist_ok=True)
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'source_hash': source_hash,
+        'features': list(feature_names),
+        'feature_schema': feature_schema_hash(feature_names),
+        'models': {},
+    }
+
+    for key, value in compiled.items():
+        if key == 'meaning_map':
+            # JSON keys must be strings; keep the (label, value, text) triples instead
+            manifest['meaning_map'] = [[label, val, text] for label, texts in value.items()
+                                       for val, text in texts.items()]
+            continue
+
+        if isinstance(value, dict):
+            forests = value['model'].forests
+            entry = {'kind': 'multi', 'targets': list(value['targets'])}
+        elif isinstance(value, CompiledLoveModel):
+            forests = [value.forest]
+            entry = {'kind': 'love', 'features': list(value.features)}
+        else:
+            forests = [value]
+            entry = {'kind': 'forest'}
+
+        entry['file'] = f"{key}.npy"
+        entry['forests'] = [{'base_margin': forest.base_margin, 'accumulate': forest.accumulate}
+                            for forest in forests]
+        arrays = {}
+        for i, forest in enumerate(forests):
+            arrays.update(forest.to_arrays(str(i)))
+        entry['arrays'], blob = _pack_arrays(arrays)
+
+        # Write next to the target and rename: readers that still map the old file keep it intact
+        file_path = os.path.join(path, entry['file'])
+        np.save(file_path + '.tmp.npy', blob)
+        os.replace(file_path + '.tmp.npy', file_path)
+        entry['checksum'] = file_digest(file_path)
+        manifest['models'][key] = entry
+
+    # The manifest goes last, so it never points at files that are not written yet
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+
+def _pack_arrays(arrays):
+    """
+    Packs named arrays into one uint8 blob (each array 64-byte aligned).
+
+    Returns:
+        tuple: ({name: [offset, dtype, shape]}, blob)
+    """
+    layout, chunks, offset = {}, [], 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        padding = -offset % _ALIGNMENT
+        chunks.append(np.zeros(padding, dtype=np.uint8))
+        offset += padding
+        layout[name] = [offset, array.dtype.str, list(array.shape)]
+        chunks.append(array.reshape(-1).view(np.uint8))
+        offset += array.nbytes
+    return layout, np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+
+
+def _unpack_arrays(layout, blob):
+    """Views into blob (no copies, so a memory-mapped blob stays shared)."""
+    arrays = {}
+    for name, (offset, dtype, shape) in layout.items():
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        arrays[name] = blob[offset:offset + count * dtype.itemsize].view(dtype).reshape(shape)
+    return arrays
+
+
+def read_manifest(path=COMPILED_DIR):
+    """Reads only the manifest (format, source hash, feature schema, model layout)."""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def load_compiled(path=COMPILED_DIR, mmap=True, verify=True):
+    """
+    Opens a directory written by save_compiled(). Only the manifest is read here;
+    each model file is loaded the first time its model is requested.
+
+    Args:
+        mmap (bool): Memory-map the model files instead of reading them into memory.
+        verify (bool): Check each model file against its manifest checksum when it loads.
+
+    Returns:
+        CompiledBrain: Mapping of model key -> compiled model, plus .meaning_map.
+    """
+    manifest = read_manifest(path)
+    if manifest['format'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled model format: {manifest['format']}")
+    return CompiledBrain(path, manifest, mmap, verify)
+
+
+class CompiledBrain(Mapping):
+    """
+    The models of a compiled brain directory, loaded lazily: brain['Wealth'] reads
+    Wealth.npy on first access only. Safe to use from several threads.
+    """
+
+    def __init__(self, path, manifest, mmap=True, verify=True):
+        self.path = path
+        self.manifest = manifest
+        self.mmap = mmap
+        self.verify = verify
+        self.feature_schema = manifest.get('feature_schema')
+        self.loaded = {}
+        self.lock = threading.Lock()
+
+        self.meaning_map = {}
+        for label, val, text in manifest.get('meaning_map', []):
+            self.meaning_map.setdefault(label, {})[val] = text
+
+    def __getitem__(self, key):
+        if key not in self.loaded:
+            entry = self.manifest['models'][key]  # KeyError for unknown models
+            with self.lock:
+                if key not in self.loaded:
+                    self.loaded[key] = self._load(entry)
+        return self.loaded[key]
+
+    def __iter__(self):
+        return iter(self.manifest['models'])
+
+    def __len__(self):
+        return len(self.manifest['models'])
+
+    def _load(self, entry):
+        """Internal/Private function only works inside class. Reads one model file."""
+        file_path = os.path.join(self.path, entry['file'])
+        if self.verify and file_digest(file_path) != entry['checksum']:
+            raise ValueError(f"Checksum mismatch for {file_path}; re-export the compiled models")
+
+        blob = np.load(file_path, mmap_mode='r' if self.mmap else None, allow_pickle=False)
+        arrays = _unpack_arrays(entry['arrays'], blob)
+        forests = [CompiledForest.from_arrays(arrays, str(i), **params)
+                   for i, params in enumerate(entry['forests'])]
+
+        if entry['kind'] == 'multi':
+            return {'model': CompiledMultiOutput(forests), 'targets': entry['targets']}
+        if entry['kind'] == 'love':
+            return CompiledLoveModel(forests[0], entry['features'])
+        return forests[0]
+
+
+def check_parity(saved_data, compiled, X):
+    """
+    Compares original and compiled predictions on the rows of X (ALL_FEATURES order).
+
+    Returns:
+        dict: Model key -> number of rows where the predictions differ.
+    """
+    import pandas as pd
+    import othermodels
+
+    mismatches = {}
+    for key, original in saved_data.items():
+        if key == 'meaning_map':
+            continue
+        if key == 'GENERAL':
+            expected = original['model'].predict(X)
+            actual = compiled[key]['model'].predict(X)
+            mismatches[key] = int(np.any(expected != actual, axis=1).sum())
+        elif isinstance(compiled[key], CompiledLoveModel):
+            df = pd.DataFrame(X, columns=othermodels.ALL_FEATURES)
+            expected = original.model.predict(df[original.features].values.astype(np.float32))
+            actual = compiled[key].forest.predict(df[original.features].values)
+            mismatches[key] = int((expected != actual).sum())
+        else:
+            mismatches[key] = int((original.predict(X) != compiled[key].predict(X)).sum())
+    return mismatches
+
+
+def export_brain(model_file='destiny_brain.pkl', output_dir=COMPILED_DIR, n_check=20000):
+    """
+    Compiles destiny_brain.pkl, verifies parity on random inputs around the training
+    distribution and writes the compiled model directory. Nothing is written if any
+    prediction differs (an older compiled copy no longer matches the .pkl, so the
+    predictor ignores it and uses the .pkl).
+
+    Returns:
+        dict: Mismatch counts per model (all zeros).
+
+    Raises:
+        ValueError: If the compiled models disagree with the pickled ones.
+    """
+    import joblib
+
+    saved_data = joblib.load(model_file)
+    compiled = compile_brain(saved_data)
+
+    # Random rows spread around the training statistics (the all-feature scalers share them)
+    pipelines = [v['model'] if isinstance(v, dict) else v for k, v in saved_data.items() if k != 'meaning_map']
+    scaler = next(p.steps[0][1] for p in pipelines if hasattr(p, 'steps'))
+    rng = np.random.default_rng(0)
+    X = scaler.mean_ + scaler.scale_ * rng.normal(0, 1.5, (n_check, len(scaler.mean_)))
+
+    mismatches = check_parity(saved_data, compiled, X)
+    for key, count in mismatches.items():
+        print(f"[Compile] {key:12}: {count} of {n_check} predictions differ")
+    differing = sorted(key for key, count in mismatches.items() if count > 0)
+    if differing:
+        raise ValueError(f"Compiled models disagree with {model_file} for {differing}; not exported")
+
+    save_compiled(compiled, output_dir, source_hash=file_digest(model_file))
+    size_kb = sum(os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir)) / 1024
+    print(f"[Compile] Saved compiled models to '{output_dir}/' ({size_kb:.0f} KB)")
+    return mismatches
+
+
+if __name__ == "__main__":
+    export_brain()
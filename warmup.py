@@ -0,0 +1,113 @@
+import threading
+import time
+
+
+class WarmupService:
+    """
+    Builds slow components (models, FaceMesh) on background threads at startup and runs
+    one dummy call through each, so neither the UI nor the first real capture pays
+    the loading / first-call cost.
+    """
+
+    def __init__(self, on_progress=None):
+        """
+        Args:
+            on_progress (callable): Optional on_progress(text), called from worker threads
+                                    with human-readable status updates.
+        """
+        self.on_progress = on_progress
+        self.tasks = []  # (name, factory, warm_up)
+        self.results = {}  # name -> built object
+        self.errors = {}  # name -> exception
+        self.timings = {}  # name -> {'load': seconds, 'warmup': seconds}
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.done = threading.Event()
+
+    def add(self, name, factory, warm_up=None):
+        """
+        Registers a component.
+
+        Args:
+            name (str): Key for results / timings.
+            factory (callable): Builds the component, e.g. a class.
+            warm_up (callable): Optional warm_up(component) that runs a dummy inference.
+        """
+        self.tasks.append((name, factory, warm_up))
+
+    def start(self, on_done=None):
+        """
+        Starts one daemon thread per registered component.
+
+        Args:
+            on_done (callable): Optional on_done(service), called once from the worker thread
+                                that finishes last.
+        """
+        self.pending = len(self.tasks)
+        if not self.tasks:
+            self.done.set()
+            if on_done:
+                on_done(self)
+            return
+
+        for task in self.tasks:
+            threading.Thread(target=self._run, args=task + (on_done,), daemon=True).start()
+
+    def is_ready(self):
+        return self.done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until every component has finished (or failed). Returns True if done."""
+        return self.done.wait(timeout)
+
+    def summary(self):
+        """Short timing summary, e.g. 'analyzer 0.8s, predictor 1.3s'."""
+        parts = []
+        for name, _, _ in self.tasks:
+            if name in self.timings:
+                total = self.timings[name]['load'] + self.timings[name]['warmup']
+                parts.append(f"{name} {total:.1f}s")
+        return ", ".join(parts)
+
+    def _report(self, text):
+        print(f"[Warmup] {text}")
+        if self.on_progress:
+            self.on_progress(text)
+
+    def _run(self, name, factory, warm_up, on_done):
+        """Internal/Private function only works inside class. Builds and warms up one component."""
+        try:
+            self._report(f"Loading {name}...")
+            start = time.perf_counter()
+            component = factory()
+            loaded = time.perf_counter()
+
+            if warm_up:
+                warm_up(component)
+            finished = time.perf_counter()
+
+            self.results[name] = component
+            self.timings[name] = {'load': loaded - start, 'warmup': finished - loaded}
+            self._report(f"{name} ready (load {loaded - start:.2f}s, first call {finished - loaded:.2f}s)")
+        except Exception as e:
+            self.errors[name] = e
+            self._report(f"{name} failed: {e}")
+
+        with self.lock:
+            self.pending -= 1
+            last = self.pending == 0
+        if last:
+            self.done.set()
+            if on_done:
+                on_done(self)
+
+
+def warm_up_analyzer(analyzer):
+    """Runs FaceMesh once on a blank camera-sized frame to initialize its graph."""
+    import numpy as np
+    analyzer.process_image(np.zeros((480, 640, 3), dtype=np.uint8))
+
+
+def warm_up_predictor(predictor):
+    """Runs every loaded model once on a neutral feature vector (outside the prediction cache)."""
+    predictor.warm_up()